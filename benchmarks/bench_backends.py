@@ -0,0 +1,106 @@
+"""
+Benchmark de throughput de los backends EC2
+
+Mide listados paginados, lecturas por ID y detenciones en lote sobre el
+backend en memoria y sobre el backend boto3. Por defecto boto3 apunta a moto
+dentro del proceso, por lo que no requiere red; con ``--endpoint-url`` se
+puede apuntar a un moto server local (``moto_server -p 5000``).
+
+Uso:
+    python -m benchmarks.bench_backends --instances 500 --iterations 20
+"""
+
+import argparse
+import os
+import time
+from contextlib import nullcontext
+from typing import Callable
+
+from src.models import AWSRegion
+from src.repositories import InstanceRepository
+from src.services.backends import Boto3Backend, InMemoryBackend
+from src.services.ec2_service import EC2Service
+from src.utils.mock_data import get_mock_instances
+
+
+def _measure(label: str, operation: Callable[[], int], iterations: int):
+    """Ejecuta la operación y reporta operaciones e items por segundo"""
+    items = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        items += operation()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<40} {iterations / elapsed:>10.1f} ops/s "
+        f"{items / elapsed:>12.1f} items/s {elapsed * 1000 / iterations:>9.2f} ms/op"
+    )
+
+
+def _seed_boto3(backend: Boto3Backend, instances: int) -> list:
+    """Lanza instancias en el endpoint configurado (en lotes de hasta 500)"""
+    client = backend.client(AWSRegion.US_EAST_1)
+    instance_ids = []
+    while len(instance_ids) < instances:
+        count = min(500, instances - len(instance_ids))
+        response = client.run_instances(
+            ImageId="ami-12c6146b",
+            MinCount=count,
+            MaxCount=count,
+            InstanceType="t3.micro",
+            TagSpecifications=[{"ResourceType": "instance", "Tags": [{"Key": "Name", "Value": "bench"}]}],
+        )
+        instance_ids.extend(instance["InstanceId"] for instance in response["Instances"])
+    return instance_ids
+
+
+def _run(service: EC2Service, instance_ids: list, label: str, iterations: int, page_size: int):
+    _measure(
+        f"{label}: get_all_instances(limit={page_size})",
+        lambda: len(service.get_all_instances(limit=page_size)),
+        iterations,
+    )
+    _measure(
+        f"{label}: get_instance_by_id",
+        lambda: int(service.get_instance_by_id(instance_ids[0]) is not None),
+        iterations,
+    )
+    _measure(
+        f"{label}: stop_instances({len(instance_ids[:100])})",
+        lambda: len(service.stop_instances(instance_ids[:100])),
+        iterations,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, default=500, help="Instancias a lanzar en el backend boto3")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--endpoint-url", default=None, help="Endpoint de un moto server local")
+    parser.add_argument("--max-pool-connections", type=int, default=50)
+    args = parser.parse_args()
+    
+    repository = InstanceRepository(get_mock_instances())
+    memory = EC2Service(backend=InMemoryBackend(repository))
+    _run(memory, list(repository), "memory", args.iterations, args.page_size)
+    
+    if args.endpoint_url:
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        context = nullcontext()
+    else:
+        from moto import mock_ec2
+        context = mock_ec2()
+    
+    with context:
+        backend = Boto3Backend(
+            regions=[AWSRegion.US_EAST_1],
+            endpoint_url=args.endpoint_url,
+            max_pool_connections=args.max_pool_connections,
+        )
+        instance_ids = _seed_boto3(backend, args.instances)
+        _run(EC2Service(backend=backend), instance_ids, "boto3", args.iterations, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
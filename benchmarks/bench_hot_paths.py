@@ -0,0 +1,282 @@
+"""
+Benchmark de los caminos críticos de la API
+
+Mide, para cada tamaño de flota, ``get_all_instances``, ``get_instance_by_id``,
+``stop_instance`` y el round trip ASGI completo de ``src.app:app`` vía httpx.
+Por cada operación registra percentiles de latencia (p50/p95/p99), throughput
+y el pico de memoria asignada durante la operación.
+
+Los resultados se pueden guardar como baseline y comparar en corridas
+posteriores: una operación se marca como regresión si su p95 empeora o su
+throughput cae más que la tolerancia. Con regresiones el comando sale con
+código 1.
+
+Uso:
+    python -m benchmarks.bench_hot_paths --sizes 10,1000,100000,1000000
+    python -m benchmarks.bench_hot_paths --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_hot_paths --baseline benchmarks/baseline.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import random
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from itertools import chain
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+from src.app import app
+from src.models import InstanceState
+from src.repositories import InstanceRepository
+from src.services.backends import InMemoryBackend
+from src.services.ec2_service import EC2Service
+from src.utils.fleet import gc_paused, iter_fleet
+from src.utils.mock_data import MOCK_INSTANCES_DB, get_mock_instances
+
+DEFAULT_SIZES = (10, 1_000, 100_000, 1_000_000)
+
+# Corridas cortas y separadas para medir memoria: tracemalloc distorsiona los tiempos
+MEMORY_ITERATIONS = 20
+
+
+@dataclass
+class Result:
+    """Métricas de una operación sobre un tamaño de flota"""
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    ops_per_s: float
+    peak_kib: float
+
+
+def _percentile(sorted_values: Sequence[float], percentile: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _summarize(latencies: List[float], elapsed: float, peak_bytes: int) -> Result:
+    latencies.sort()
+    return Result(
+        p50_ms=_percentile(latencies, 50) * 1000,
+        p95_ms=_percentile(latencies, 95) * 1000,
+        p99_ms=_percentile(latencies, 99) * 1000,
+        ops_per_s=len(latencies) / elapsed,
+        peak_kib=peak_bytes / 1024,
+    )
+
+
+def measure(operation: Callable[[], object], iterations: int, warmup: int = 10) -> Result:
+    """Ejecuta una operación sincrónica y calcula sus métricas"""
+    for _ in range(warmup):
+        operation()
+    
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for _ in range(iterations):
+        call_started = clock()
+        operation()
+        latencies.append(clock() - call_started)
+    elapsed = clock() - started
+    
+    tracemalloc.start()
+    for _ in range(MEMORY_ITERATIONS):
+        operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return _summarize(latencies, elapsed, peak)
+
+
+async def measure_async(operation: Callable[[], Awaitable[object]], iterations: int, warmup: int = 10) -> Result:
+    """Versión de ``measure`` para operaciones asíncronas"""
+    for _ in range(warmup):
+        await operation()
+    
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for _ in range(iterations):
+        call_started = clock()
+        await operation()
+        latencies.append(clock() - call_started)
+    elapsed = clock() - started
+    
+    tracemalloc.start()
+    for _ in range(MEMORY_ITERATIONS):
+        await operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return _summarize(latencies, elapsed, peak)
+
+
+def build_fleet(size: int, seed: int = 42) -> List:
+    """Instancias de ejemplo más una flota sintética hasta completar ``size``"""
+    examples = get_mock_instances()[:size]
+    with gc_paused():
+        return list(chain(examples, iter_fleet(max(0, size - len(examples)), seed=seed)))
+
+
+def _stop_targets(repository: InstanceRepository, count: int) -> List[str]:
+    """IDs de instancias encendidas a detener, una por iteración"""
+    running = list(repository.iter_ids(state=InstanceState.RUNNING))
+    return running[:count] or list(repository)[:1]
+
+
+def bench_service(instances: List, iterations: int, page_size: int) -> Dict[str, Result]:
+    """Mide los métodos de EC2Service sobre el backend en memoria, sin cache"""
+    with gc_paused():
+        repository = InstanceRepository(instances)
+    service = EC2Service(backend=InMemoryBackend(repository), cache=None)
+    rng = random.Random(0)
+    instance_ids = list(repository)
+    targets = iter(_stop_targets(repository, iterations + 10 + MEMORY_ITERATIONS))
+    
+    def stop():
+        # Cada iteración detiene una instancia distinta; al agotarse mide el rechazo
+        instance_id = next(targets, instance_ids[0])
+        service.stop_instance(instance_id)
+    
+    return {
+        f"get_all_instances(limit={page_size})": measure(lambda: service.get_all_instances(limit=page_size), iterations),
+        "get_all_instances(state,region)": measure(
+            lambda: service.get_all_instances(state="running", region="us-east-1", limit=page_size), iterations
+        ),
+        "get_instance_by_id": measure(lambda: service.get_instance_by_id(rng.choice(instance_ids)), iterations),
+        "stop_instance": measure(stop, iterations),
+    }
+
+
+async def _bench_asgi(iterations: int, page_size: int) -> Dict[str, Result]:
+    rng = random.Random(0)
+    instance_ids = list(MOCK_INSTANCES_DB)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def list_page():
+            response = await client.get("/instances/", params={"limit": page_size})
+            response.raise_for_status()
+        
+        async def get_one():
+            response = await client.get(f"/instances/{rng.choice(instance_ids)}")
+            response.raise_for_status()
+        
+        return {
+            f"asgi GET /instances/?limit={page_size}": await measure_async(list_page, iterations),
+            "asgi GET /instances/{id}": await measure_async(get_one, iterations),
+        }
+
+
+def bench_asgi(instances: List, iterations: int, page_size: int) -> Dict[str, Result]:
+    """Mide el round trip HTTP completo por la app, con la flota cargada en la base mock"""
+    with gc_paused():
+        MOCK_INSTANCES_DB.clear()
+        MOCK_INSTANCES_DB.update({instance.id: instance for instance in instances})
+    try:
+        return asyncio.run(_bench_asgi(iterations, page_size))
+    finally:
+        MOCK_INSTANCES_DB.clear()
+        MOCK_INSTANCES_DB.update({instance.id: instance for instance in get_mock_instances()})
+
+
+def run_suite(sizes: Sequence[int], iterations: int = 1000, page_size: int = 100, verbose: bool = True) -> Dict[str, Dict]:
+    """
+    Corre todos los benchmarks para cada tamaño de flota
+    
+    Returns:
+        Dict[str, Dict]: Métricas por ``"<tamaño>/<operación>"``
+    """
+    results = {}
+    for size in sizes:
+        started = time.perf_counter()
+        instances = build_fleet(size)
+        build_seconds = time.perf_counter() - started
+        if verbose:
+            print(f"\n== {size:,} instancias (flota generada en {build_seconds:.1f}s) ==")
+        
+        # La flota del servicio y la de la app se construyen de nuevo: cada stop modifica las instancias
+        size_results = bench_service(instances, iterations, page_size)
+        size_results.update(bench_asgi(build_fleet(size), iterations, page_size))
+        del instances
+        gc.collect()
+        
+        for operation, result in size_results.items():
+            results[f"{size}/{operation}"] = asdict(result)
+            if verbose:
+                print(
+                    f"{operation:<40} p50 {result.p50_ms:>8.3f} ms  p95 {result.p95_ms:>8.3f} ms  "
+                    f"p99 {result.p99_ms:>8.3f} ms  {result.ops_per_s:>10.1f} ops/s  "
+                    f"pico {result.peak_kib:>9.1f} KiB"
+                )
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float = 0.2) -> List[str]:
+    """
+    Compara los resultados contra un baseline
+    
+    Args:
+        results (Dict[str, Dict]): Resultados de ``run_suite``
+        baseline (Dict[str, Dict]): Resultados guardados de una corrida anterior
+        tolerance (float): Empeoramiento relativo admitido (0.2 = 20%)
+    
+    Returns:
+        List[str]: Una descripción por cada regresión encontrada
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if result["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {reference['p95_ms']:.3f} -> {result['p95_ms']:.3f} ms")
+        if result["ops_per_s"] < reference["ops_per_s"] / (1 + tolerance):
+            regressions.append(f"{key}: throughput {reference['ops_per_s']:.1f} -> {result['ops_per_s']:.1f} ops/s")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Tamaños de flota separados por coma",
+    )
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--baseline", default=None, help="Archivo JSON contra el que detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Empeoramiento relativo admitido")
+    parser.add_argument("--save-baseline", default=None, help="Guarda los resultados como baseline")
+    args = parser.parse_args(argv)
+    
+    # Los logs por request de la app inundarían la salida
+    logging.disable(logging.INFO)
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        results = run_suite(sizes, args.iterations, args.page_size)
+    finally:
+        logging.disable(logging.NOTSET)
+    
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print(f"\nBaseline guardado en {args.save_baseline}")
+    
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regresiones (tolerancia {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nSin regresiones contra {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
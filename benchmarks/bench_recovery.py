@@ -0,0 +1,95 @@
+"""
+Benchmark de la recuperación del repositorio persistido
+
+Genera una flota sintética en un directorio de datos (snapshot inicial),
+aplica ``--transitions`` cambios de estado que quedan solo en el journal y
+mide, en ``--runs`` recuperaciones, el tiempo de ``InstanceStore.open``:
+leer el snapshot y aplicar la cola del journal. Lo compara con el tiempo de
+generar y cargar la flota desde cero, que es lo que costaba cada reinicio
+sin persistencia (más el primer snapshot). Con ``--max-ms`` falla si la mediana supera el umbral.
+
+Uso:
+    python -m benchmarks.bench_recovery --instances 1000000 --transitions 10000
+    python -m benchmarks.bench_recovery --data-dir /var/lib/ec2 --runs 3
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, Optional, Sequence
+
+from src.models import InstanceState
+from src.repositories import InstanceRepository
+from src.repositories.persistence import InstanceStore
+from src.utils.fleet import load_fleet
+
+
+def prepare(directory: str, instances: int, transitions: int, seed: int = 42) -> float:
+    """
+    Crea el directorio de datos: snapshot de la flota y ``transitions`` registros en el journal
+    
+    Returns:
+        float: Segundos del primer arranque (generar y cargar la flota, y escribir el snapshot)
+    """
+    store = InstanceStore(directory)
+    started = time.perf_counter()
+    repository = store.open(lambda: load_fleet(InstanceRepository(), instances, seed=seed))
+    elapsed = time.perf_counter() - started
+    
+    states = itertools.cycle((InstanceState.STOPPING, InstanceState.STOPPED, InstanceState.RUNNING))
+    for instance_id in itertools.islice(itertools.cycle(list(repository.iter_ids())), transitions):
+        repository.set_state(instance_id, next(states))
+    store.close(snapshot=False)
+    return elapsed
+
+
+def measure_recovery(directory: str, runs: int = 5) -> Dict:
+    """
+    Recupera el repositorio ``runs`` veces
+    
+    Returns:
+        Dict: ``median_ms``, ``runs_ms`` e ``instances``
+    """
+    samples = []
+    instances = 0
+    for _ in range(runs):
+        store = InstanceStore(directory)
+        started = time.perf_counter()
+        repository = store.open(lambda: ())
+        samples.append((time.perf_counter() - started) * 1000)
+        instances = len(repository)
+        store.close(snapshot=False)
+    return {"median_ms": statistics.median(samples), "runs_ms": samples, "instances": instances}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, default=1_000_000)
+    parser.add_argument("--transitions", type=int, default=10_000, help="Registros del journal a aplicar")
+    parser.add_argument("--runs", type=int, default=5, help="Recuperaciones (se reporta la mediana)")
+    parser.add_argument("--data-dir", default=None, help="Directorio de datos (por defecto uno temporal)")
+    parser.add_argument("--max-ms", type=float, default=None, help="Umbral para la mediana de la recuperación")
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = args.data_dir or temporary
+        initial = prepare(directory, args.instances, args.transitions)
+        size = os.path.getsize(InstanceStore(directory).snapshot_path)
+        result = measure_recovery(directory, args.runs)
+    
+    runs = ", ".join(f"{sample:.0f}" for sample in result["runs_ms"])
+    print(f"instancias         {result['instances']:>12}")
+    print(f"snapshot           {size / 1e6:>12.1f} MB")
+    print(f"primer arranque    {initial * 1000:>12.1f} ms")
+    print(f"recuperación       {result['median_ms']:>12.1f} ms  (corridas: {runs})")
+    if args.max_ms is not None and result["median_ms"] > args.max_ms:
+        print(f"\nrecuperación {result['median_ms']:.1f} ms > {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+"""
+Benchmark del servidor completo: perfil dev contra perfil prod
+
+Levanta ``python -m src.server`` en cada perfil, espera a que responda
+``/health`` y genera carga durante ``--duration`` segundos con
+``--connections`` conexiones HTTP/1.1 keep-alive, rotando entre el listado,
+la lectura por ID y el resumen. Reporta requests por segundo, p50/p99 y
+errores, y detiene el servidor con SIGINT (apagado ordenado).
+
+El generador de carga es un cliente HTTP mínimo sobre asyncio, para que su
+costo no oculte el del servidor; igualmente corre en la misma máquina, así
+que con pocos núcleos compite con los workers. Para cifras absolutas
+conviene un generador externo (``wrk``, ``oha``) desde otra máquina.
+
+Uso:
+    python -m benchmarks.bench_server --duration 10 --connections 32
+    python -m benchmarks.bench_server --modes prod --workers 4 --fleet-size 100000
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = (
+    "/instances/?limit=100",
+    "/instances/i-1234567890abcdef0",
+    "/instances/summary?group_by=region",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int, workers: Optional[int] = None, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """Lanza ``python -m src.server`` en el perfil indicado"""
+    command = [sys.executable, "-m", "src.server", "--mode", mode, "--host", "127.0.0.1", "--port", str(port)]
+    if workers is not None and mode == "prod":
+        command += ["--workers", str(workers)]
+    return subprocess.Popen(
+        command,
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=ROOT, **(env or {})),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_server(process: subprocess.Popen, timeout: float = 30.0):
+    """Detiene el servidor con SIGINT y espera el apagado ordenado"""
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> int:
+    """Envía un GET y lee la respuesta completa; retorna el status"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def wait_ready(port: int, timeout: float = 60.0):
+    """Espera a que ``/health`` responda 200"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                if await _request(reader, writer, "/health") == 200:
+                    return
+            finally:
+                writer.close()
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Server on port {port} not ready after {timeout}s")
+        await asyncio.sleep(0.2)
+
+
+async def generate_load(port: int, duration: float, connections: int, paths: Sequence[str] = PATHS) -> Dict:
+    """
+    Genera carga con ``connections`` conexiones keep-alive durante ``duration`` segundos
+    
+    Returns:
+        Dict: ``requests``, ``errors``, ``rps``, ``p50_ms`` y ``p99_ms``
+    """
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    
+    async def worker(offset: int):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        index = offset
+        try:
+            while time.perf_counter() < deadline:
+                path = paths[index % len(paths)]
+                index += 1
+                started = time.perf_counter()
+                status = await _request(reader, writer, path)
+                latencies.append(time.perf_counter() - started)
+                if status >= 400:
+                    errors += 1
+        finally:
+            writer.close()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": count / elapsed,
+        "p50_ms": latencies[count // 2] * 1000 if count else 0.0,
+        "p99_ms": latencies[min(count - 1, int(count * 0.99))] * 1000 if count else 0.0,
+    }
+
+
+def run_mode(mode: str, duration: float, connections: int, workers: Optional[int] = None, env: Optional[Dict[str, str]] = None) -> Dict:
+    """Levanta el servidor en ``mode``, lo carga y lo detiene"""
+    port = _free_port()
+    process = start_server(mode, port, workers, env)
+    try:
+        asyncio.run(wait_ready(port))
+        # Calentamiento: primeras serializaciones y conexiones
+        asyncio.run(generate_load(port, min(1.0, duration), connections))
+        return asyncio.run(generate_load(port, duration, connections))
+    finally:
+        stop_server(process)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="dev,prod", help="Perfiles a comparar, separados por coma")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga por perfil")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="Workers del perfil prod (por defecto uno por núcleo)")
+    parser.add_argument("--fleet-size", type=int, default=0, help="Instancias sintéticas (EC2_MOCK_FLEET_SIZE)")
+    args = parser.parse_args(argv)
+    
+    env = {"EC2_MOCK_FLEET_SIZE": str(args.fleet_size), "EC2_TRANSITIONS_ENABLED": "false"}
+    print(f"{'perfil':<8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+        result = run_mode(mode, args.duration, args.connections, args.workers, env)
+        print(f"{mode:<8} {result['rps']:>10.1f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
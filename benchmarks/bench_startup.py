@@ -0,0 +1,142 @@
+"""
+Benchmark del arranque en frío de la app
+
+Mide en procesos nuevos, con ``python -X importtime``, dos etapas:
+
+- ``import``: ``import src.app``, lo que paga cada worker antes de escuchar
+- ``ready``: el import más la construcción del backend (lo que hace el lifespan)
+
+Reporta la mediana del tiempo de pared de cada etapa, el costo de import
+agrupado por paquete de primer nivel y los módulos más caros. Con
+``--forbid`` falla si alguno de esos módulos se importa al arrancar (por
+defecto boto3 y moto, que solo usan los backends ``boto3`` y ``moto``), y con
+``--max-import-ms`` si la mediana del import supera el umbral.
+
+Uso:
+    python -m benchmarks.bench_startup --runs 5
+    EC2_MOCK_FLEET_SIZE=100000 python -m benchmarks.bench_startup --top 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = {
+    "import": "import src.app",
+    "ready": "import src.app; src.app.ec2_service.backend",
+}
+
+DEFAULT_FORBIDDEN = ("boto3", "botocore", "moto")
+
+
+@dataclass
+class ImportEntry:
+    """Una línea de ``-X importtime``: tiempos en microsegundos"""
+    
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(output: str) -> List[ImportEntry]:
+    """Parsea la salida de ``python -X importtime`` (stderr)"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Encabezado "self [us] | cumulative | imported package"
+            continue
+        entries.append(ImportEntry(fields[2].strip(), int(fields[0]), int(fields[1])))
+    return entries
+
+
+def by_package(entries: Sequence[ImportEntry]) -> Dict[str, int]:
+    """Tiempo propio (us) sumado por paquete de primer nivel, de mayor a menor"""
+    totals: Dict[str, int] = {}
+    for entry in entries:
+        package = entry.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + entry.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def run_stage(code: str, runs: int = 5) -> Dict:
+    """
+    Ejecuta ``code`` en ``runs`` procesos nuevos y retorna sus tiempos
+    
+    Returns:
+        Dict: ``wall_ms`` (mediana), ``runs_ms`` y ``entries`` de la corrida mediana
+    """
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT,
+            env=dict(os.environ, PYTHONPATH=ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(((time.perf_counter() - started) * 1000, parse_importtime(completed.stderr)))
+    samples.sort(key=lambda sample: sample[0])
+    wall_ms, entries = samples[len(samples) // 2]
+    return {"wall_ms": wall_ms, "runs_ms": [sample[0] for sample in samples], "entries": entries}
+
+
+def _report(stage: str, result: Dict, top: int):
+    runs = ", ".join(f"{sample:.0f}" for sample in result["runs_ms"])
+    print(f"{stage:<8} mediana {result['wall_ms']:>8.1f} ms  (corridas: {runs})")
+    if stage != "import" or not top:
+        return
+    
+    print("\n  Paquetes (tiempo de import propio):")
+    for package, self_us in list(by_package(result["entries"]).items())[:top]:
+        print(f"    {package:<32} {self_us / 1000:>8.1f} ms")
+    print("\n  Módulos más caros (acumulado):")
+    for entry in sorted(result["entries"], key=lambda entry: entry.cumulative_us, reverse=True)[:top]:
+        print(f"    {entry.module:<48} {entry.cumulative_us / 1000:>8.1f} ms")
+    print()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Procesos por etapa (se reporta la mediana)")
+    parser.add_argument("--top", type=int, default=10, help="Paquetes y módulos a listar")
+    parser.add_argument(
+        "--forbid",
+        default=",".join(DEFAULT_FORBIDDEN),
+        help="Módulos que no deben importarse al arrancar, separados por coma",
+    )
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Umbral para la mediana del import")
+    args = parser.parse_args(argv)
+    
+    results = {stage: run_stage(code, args.runs) for stage, code in STAGES.items()}
+    for stage, result in results.items():
+        _report(stage, result, args.top)
+    
+    failures = []
+    forbidden = {module.strip() for module in args.forbid.split(",") if module.strip()}
+    imported = {entry.module.split(".")[0] for entry in results["import"]["entries"]}
+    for module in sorted(forbidden & imported):
+        failures.append(f"{module} se importa al arrancar")
+    if args.max_import_ms is not None and results["import"]["wall_ms"] > args.max_import_ms:
+        failures.append(f"import {results['import']['wall_ms']:.1f} ms > {args.max_import_ms:.1f} ms")
+    
+    if failures:
+        print(f"\n{len(failures)} problemas:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
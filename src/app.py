@@ -1,21 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 import logging
-import sys
+from src.logging_config import configure_logging
+from src.middleware import AdmissionMiddleware, LogContextMiddleware, MetricsMiddleware
 from src.routes.instances import router as instances_router
+from src.services.async_ec2_service import async_ec2_service
+from src.services.ec2_service import ec2_service
+from src.services.metrics import registry
+from src.services.scheduler import transition_scheduler
+from src.config import get_settings
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configurar logging (formato, cola hacia el thread escritor y sampling por ruta)
+configure_logging(get_settings())
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida de la aplicación: scheduler de transiciones y liberación de recursos"""
+    # El backend (y la flota) se construye acá y no al importar la app
+    backend = ec2_service.backend
+    if get_settings().ec2_transitions_enabled and backend.simulated:
+        await transition_scheduler.start()
+    yield
+    await transition_scheduler.stop()
+    async_ec2_service.shutdown()
+    backend.close()
+
+
+# Respuestas JSON con orjson si está instalado (varias veces más rápido que json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DefaultResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
 # Crear la aplicación FastAPI
 app = FastAPI(
     title="EC2 Manager API",
@@ -29,9 +53,14 @@ app = FastAPI(
     
     Utiliza datos mock y simula las respuestas de AWS EC2.
     """,
-    
+    lifespan=lifespan,
+    default_response_class=DefaultResponse,
 )
 
+# Tope de mutaciones en curso y límite por cliente; queda por dentro de CORS
+# para que los rechazos lleven sus headers
+app.add_middleware(AdmissionMiddleware, admission=ec2_service.admission)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +70,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Scope del request disponible para el sampling de logs
+app.add_middleware(LogContextMiddleware)
+
+# Métricas por request; se agrega al final para quedar por fuera de CORS y medirlo también
+app.add_middleware(MetricsMiddleware)
+
 # Incluir las rutas
 app.include_router(instances_router)
 
@@ -48,7 +83,7 @@ app.include_router(instances_router)
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Manejador global de excepciones"""
-    logger.error(f"Global exception handler caught: {type(exc).__name__}: {str(exc)}")
+    logger.error("Global exception handler caught: %s: %s", type(exc).__name__, exc)
     return JSONResponse(
         status_code=500,
         content={
@@ -72,7 +107,7 @@ async def root():
 @app.get("/health", tags=["health"])
 async def health_check():
     """Endpoint detallado de verificación de salud"""
-    return {
+    health = {
         "status": "healthy",
         "service": "EC2 Manager API",
         "version": "1.0.0",
@@ -81,16 +116,20 @@ async def health_check():
             "mock_data": "ok"
         }
     }
+    if ec2_service.cache is not None:
+        health["cache"] = ec2_service.cache.stats()
+    return health
+
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics():
+    """Métricas de la aplicación en formato de texto de Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
-    import uvicorn
+    from src.server import main
     
-    logger.info("Starting EC2 Manager API...")
-    uvicorn.run(
-        "src.app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    # Perfil dev por defecto; EC2_SERVER_MODE=prod (o python -m src.server --mode prod) para producción
+    raise SystemExit(main())
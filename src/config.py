@@ -0,0 +1,197 @@
+"""Configuración de la aplicación a partir de variables de entorno"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+def _env_str(name: str, default: Optional[str]) -> Optional[str]:
+    value = os.environ.get(name)
+    return value if value not in (None, "") else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_tuple(name: str, default: Tuple[str, ...]) -> Tuple[str, ...]:
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Configuración de la aplicación"""
+    
+    # Backend EC2: "memory" (datos mock), "boto3" (endpoint real o moto server) o "moto" (moto en proceso)
+    ec2_backend: str = "memory"
+    ec2_endpoint_url: Optional[str] = None
+    ec2_regions: Tuple[str, ...] = ("us-east-1",)
+    
+    # Pool de conexiones de botocore
+    ec2_max_pool_connections: int = 50
+    ec2_connect_timeout: float = 2.0
+    ec2_read_timeout: float = 10.0
+    ec2_max_attempts: int = 3
+    
+    # Máximo de llamadas bloqueantes al backend ejecutándose en paralelo
+    ec2_max_concurrency: int = 32
+    
+    # Listado multi-región: timeout por región y umbral para reportarla como lenta (segundos)
+    ec2_region_timeout: float = 5.0
+    ec2_region_slow_threshold: float = 1.0
+    
+    # Cache de lecturas: "auto" (solo backends remotos), "on" u "off"
+    ec2_cache: str = "auto"
+    ec2_cache_ttl: float = 5.0
+    ec2_cache_maxsize: int = 1024
+    
+    # Instancias con su JSON pre-serializado en memoria
+    ec2_json_cache_maxsize: int = 200_000
+    
+    # Scheduler de transiciones simuladas: demora en segundos por estado intermedio
+    ec2_transitions_enabled: bool = True
+    ec2_transition_delay_pending: float = 5.0
+    ec2_transition_delay_stopping: float = 5.0
+    ec2_transition_delay_shutting_down: float = 10.0
+    
+    # Long-poll de estados: intervalo de relectura para backends que cambian por fuera del servicio
+    ec2_wait_poll_interval: float = 2.0
+    
+    # Feed SSE de cambios de estado: capacidad de la cola por suscriptor y heartbeat en segundos
+    ec2_events_queue_size: int = 1000
+    ec2_events_heartbeat: float = 15.0
+    
+    # Detenciones: franjas de locks por instancia y memoria de Idempotency-Key (segundos / entradas)
+    ec2_lock_stripes: int = 64
+    ec2_idempotency_ttl: float = 3600.0
+    ec2_idempotency_maxsize: int = 10_000
+    
+    # Admisión de mutaciones: token buckets por cliente y por región (por segundo y ráfaga; tasa
+    # 0 = sin límite), clientes recordados (LRU), header que identifica al cliente (vacío = IP),
+    # modo adaptativo ante throttling del backend y tope de mutaciones en curso (0 = sin tope)
+    ec2_rate_limit_client_rate: float = 0.0
+    ec2_rate_limit_client_burst: int = 20
+    ec2_rate_limit_region_rate: float = 0.0
+    ec2_rate_limit_region_burst: int = 50
+    ec2_rate_limit_clients: int = 10_000
+    ec2_rate_limit_client_header: str = ""
+    ec2_rate_limit_adaptive: bool = False
+    ec2_max_in_flight_mutations: int = 256
+    
+    # Backend sqlite: archivo compartido por los workers y espera máxima por el lock de escritura
+    ec2_sqlite_path: str = "ec2_instances.db"
+    ec2_sqlite_timeout: float = 5.0
+    
+    # Persistencia del backend memory: directorio del snapshot y el journal (None = sin
+    # persistencia), intervalo de fsync del journal y de snapshots, en segundos
+    ec2_data_dir: Optional[str] = None
+    ec2_journal_fsync_interval: float = 0.05
+    ec2_snapshot_interval: float = 300.0
+    
+    # Flota sintética agregada a los datos mock (0 = solo las instancias de ejemplo) y su semilla
+    ec2_mock_fleet_size: int = 0
+    ec2_mock_fleet_seed: int = 42
+    
+    # Logging: nivel, formato ("text" o "json"), cola hacia el thread escritor (0 = escritura
+    # síncrona) y fracción de logs INFO conservados, global y por ruta ("/ruta=tasa")
+    ec2_log_level: str = "INFO"
+    ec2_log_format: str = "text"
+    ec2_log_queue_size: int = 10_000
+    ec2_log_sample_rate: float = 1.0
+    ec2_log_sample_routes: Tuple[str, ...] = ()
+    
+    # Servidor (python -m src.server): perfil "dev" (un proceso con reload) o "prod" (varios
+    # workers, uvloop/httptools); 0 workers = uno por núcleo. Keep-alive y apagado en segundos
+    ec2_server_mode: str = "dev"
+    ec2_server_host: str = "0.0.0.0"
+    ec2_server_port: int = 8000
+    ec2_server_workers: int = 0
+    ec2_server_keep_alive: float = 75.0
+    ec2_server_backlog: int = 2048
+    ec2_server_graceful_timeout: float = 30.0
+    
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Construye la configuración leyendo las variables de entorno ``EC2_*``"""
+        return cls(
+            ec2_backend=_env_str("EC2_BACKEND", cls.ec2_backend),
+            ec2_endpoint_url=_env_str("EC2_ENDPOINT_URL", cls.ec2_endpoint_url),
+            ec2_regions=_env_tuple("EC2_REGIONS", cls.ec2_regions),
+            ec2_max_pool_connections=_env_int("EC2_MAX_POOL_CONNECTIONS", cls.ec2_max_pool_connections),
+            ec2_connect_timeout=_env_float("EC2_CONNECT_TIMEOUT", cls.ec2_connect_timeout),
+            ec2_read_timeout=_env_float("EC2_READ_TIMEOUT", cls.ec2_read_timeout),
+            ec2_max_attempts=_env_int("EC2_MAX_ATTEMPTS", cls.ec2_max_attempts),
+            ec2_max_concurrency=_env_int("EC2_MAX_CONCURRENCY", cls.ec2_max_concurrency),
+            ec2_region_timeout=_env_float("EC2_REGION_TIMEOUT", cls.ec2_region_timeout),
+            ec2_region_slow_threshold=_env_float("EC2_REGION_SLOW_THRESHOLD", cls.ec2_region_slow_threshold),
+            ec2_cache=_env_str("EC2_CACHE", cls.ec2_cache),
+            ec2_cache_ttl=_env_float("EC2_CACHE_TTL", cls.ec2_cache_ttl),
+            ec2_cache_maxsize=_env_int("EC2_CACHE_MAXSIZE", cls.ec2_cache_maxsize),
+            ec2_json_cache_maxsize=_env_int("EC2_JSON_CACHE_MAXSIZE", cls.ec2_json_cache_maxsize),
+            ec2_wait_poll_interval=_env_float("EC2_WAIT_POLL_INTERVAL", cls.ec2_wait_poll_interval),
+            ec2_events_queue_size=_env_int("EC2_EVENTS_QUEUE_SIZE", cls.ec2_events_queue_size),
+            ec2_events_heartbeat=_env_float("EC2_EVENTS_HEARTBEAT", cls.ec2_events_heartbeat),
+            ec2_lock_stripes=_env_int("EC2_LOCK_STRIPES", cls.ec2_lock_stripes),
+            ec2_idempotency_ttl=_env_float("EC2_IDEMPOTENCY_TTL", cls.ec2_idempotency_ttl),
+            ec2_idempotency_maxsize=_env_int("EC2_IDEMPOTENCY_MAXSIZE", cls.ec2_idempotency_maxsize),
+            ec2_rate_limit_client_rate=_env_float("EC2_RATE_LIMIT_CLIENT_RATE", cls.ec2_rate_limit_client_rate),
+            ec2_rate_limit_client_burst=_env_int("EC2_RATE_LIMIT_CLIENT_BURST", cls.ec2_rate_limit_client_burst),
+            ec2_rate_limit_region_rate=_env_float("EC2_RATE_LIMIT_REGION_RATE", cls.ec2_rate_limit_region_rate),
+            ec2_rate_limit_region_burst=_env_int("EC2_RATE_LIMIT_REGION_BURST", cls.ec2_rate_limit_region_burst),
+            ec2_rate_limit_clients=_env_int("EC2_RATE_LIMIT_CLIENTS", cls.ec2_rate_limit_clients),
+            ec2_rate_limit_client_header=_env_str("EC2_RATE_LIMIT_CLIENT_HEADER", cls.ec2_rate_limit_client_header),
+            ec2_rate_limit_adaptive=_env_bool("EC2_RATE_LIMIT_ADAPTIVE", cls.ec2_rate_limit_adaptive),
+            ec2_max_in_flight_mutations=_env_int("EC2_MAX_IN_FLIGHT_MUTATIONS", cls.ec2_max_in_flight_mutations),
+            ec2_sqlite_path=_env_str("EC2_SQLITE_PATH", cls.ec2_sqlite_path),
+            ec2_sqlite_timeout=_env_float("EC2_SQLITE_TIMEOUT", cls.ec2_sqlite_timeout),
+            ec2_data_dir=_env_str("EC2_DATA_DIR", cls.ec2_data_dir),
+            ec2_journal_fsync_interval=_env_float("EC2_JOURNAL_FSYNC_INTERVAL", cls.ec2_journal_fsync_interval),
+            ec2_snapshot_interval=_env_float("EC2_SNAPSHOT_INTERVAL", cls.ec2_snapshot_interval),
+            ec2_mock_fleet_size=_env_int("EC2_MOCK_FLEET_SIZE", cls.ec2_mock_fleet_size),
+            ec2_mock_fleet_seed=_env_int("EC2_MOCK_FLEET_SEED", cls.ec2_mock_fleet_seed),
+            ec2_log_level=_env_str("EC2_LOG_LEVEL", cls.ec2_log_level),
+            ec2_log_format=_env_str("EC2_LOG_FORMAT", cls.ec2_log_format),
+            ec2_log_queue_size=_env_int("EC2_LOG_QUEUE_SIZE", cls.ec2_log_queue_size),
+            ec2_log_sample_rate=_env_float("EC2_LOG_SAMPLE_RATE", cls.ec2_log_sample_rate),
+            ec2_log_sample_routes=_env_tuple("EC2_LOG_SAMPLE_ROUTES", cls.ec2_log_sample_routes),
+            ec2_server_mode=_env_str("EC2_SERVER_MODE", cls.ec2_server_mode),
+            ec2_server_host=_env_str("EC2_SERVER_HOST", cls.ec2_server_host),
+            ec2_server_port=_env_int("EC2_SERVER_PORT", cls.ec2_server_port),
+            ec2_server_workers=_env_int("EC2_SERVER_WORKERS", cls.ec2_server_workers),
+            ec2_server_keep_alive=_env_float("EC2_SERVER_KEEP_ALIVE", cls.ec2_server_keep_alive),
+            ec2_server_backlog=_env_int("EC2_SERVER_BACKLOG", cls.ec2_server_backlog),
+            ec2_server_graceful_timeout=_env_float("EC2_SERVER_GRACEFUL_TIMEOUT", cls.ec2_server_graceful_timeout),
+            ec2_transitions_enabled=_env_bool("EC2_TRANSITIONS_ENABLED", cls.ec2_transitions_enabled),
+            ec2_transition_delay_pending=_env_float(
+                "EC2_TRANSITION_DELAY_PENDING", cls.ec2_transition_delay_pending
+            ),
+            ec2_transition_delay_stopping=_env_float(
+                "EC2_TRANSITION_DELAY_STOPPING", cls.ec2_transition_delay_stopping
+            ),
+            ec2_transition_delay_shutting_down=_env_float(
+                "EC2_TRANSITION_DELAY_SHUTTING_DOWN", cls.ec2_transition_delay_shutting_down
+            ),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Retorna la configuración de la aplicación (cacheada)"""
+    return Settings.from_env()
@@ -0,0 +1,158 @@
+"""Configuración de logging: texto o JSON, con sampling por ruta y escritura fuera del request"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Sequence
+
+from src.config import Settings
+from src.services.metrics import registry
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Scope ASGI del request en curso; lo fija LogContextMiddleware y se propaga
+# a los threads del pool junto con el resto del contexto
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+# Clave del scope donde se guarda la decisión de sampling del request
+SAMPLED_KEY = "ec2.log_sampled"
+
+dropped_records = registry.counter(
+    "log_records_dropped_total", "Registros de log descartados por la cola llena", ("level",)
+)
+
+
+def parse_sample_rates(entries: Sequence[str]) -> Dict[str, float]:
+    """
+    Convierte entradas ``ruta=tasa`` (p. ej. ``/instances/{instance_id}=0.01``) en un dict
+    
+    Raises:
+        ValueError: Si una entrada no tiene ``=`` o la tasa no está entre 0 y 1
+    """
+    rates = {}
+    for entry in entries:
+        route, separator, rate = entry.rpartition("=")
+        if not separator or not route:
+            raise ValueError(f"Invalid log sampling entry: {entry}")
+        value = float(rate)
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"Log sampling rate must be between 0 and 1: {entry}")
+        rates[route.strip()] = value
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Descarta una fracción de los logs de éxito (INFO y DEBUG) según la ruta del request
+    
+    La decisión se toma una vez por request y se guarda en su scope, así que
+    de un request se conservan todas sus líneas o ninguna. WARNING y superiores
+    pasan siempre, igual que los logs emitidos fuera de un request. Además
+    agrega a cada registro la ruta (``record.route``) para el formato JSON.
+    """
+    
+    def __init__(self, default_rate: float = 1.0, route_rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.route_rates = route_rates or {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        scope = request_scope.get()
+        if scope is None:
+            record.route = None
+            return True
+        route = getattr(scope.get("route"), "path", None)
+        record.route = route
+        if record.levelno >= logging.WARNING:
+            return True
+        sampled = scope.get(SAMPLED_KEY)
+        if sampled is None:
+            rate = self.route_rates.get(route, self.default_rate)
+            sampled = scope[SAMPLED_KEY] = rate >= 1.0 or random.random() < rate
+        return sampled
+
+
+class JSONFormatter(logging.Formatter):
+    """Un objeto JSON por línea: time, level, logger, message, route y exception"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        route = getattr(record, "route", None)
+        if route is not None:
+            entry["route"] = route
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    ``QueueHandler`` que encola el registro sin formatearlo
+    
+    El ``QueueHandler`` estándar formatea el mensaje antes de encolarlo, en el
+    thread del request; acá el formateo (``%`` de los argumentos, JSON) queda
+    en el thread del ``QueueListener``. Si la cola está llena el registro se
+    descarta y se cuenta en ``log_records_dropped_total``, sin bloquear.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc((record.levelname,))
+
+
+def _stop_listener(listener: QueueListener):
+    """Detiene el listener si sigue activo (``stop`` no admite dos llamadas)"""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def configure_logging(settings: Settings) -> Optional[QueueListener]:
+    """
+    Configura el logger raíz según ``settings``
+    
+    Con ``ec2_log_queue_size`` mayor a 0 la escritura a stdout se hace en el
+    thread de un ``QueueListener``, que se detiene (vaciando la cola) al salir
+    del proceso, y se retorna ese listener; con 0 se escribe en el momento.
+    """
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.ec2_log_format == "json":
+        stream.setFormatter(JSONFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    sampling = SamplingFilter(
+        settings.ec2_log_sample_rate, parse_sample_rates(settings.ec2_log_sample_routes)
+    )
+    listener = None
+    if settings.ec2_log_queue_size > 0:
+        handler: logging.Handler = DeferredQueueHandler(queue.Queue(settings.ec2_log_queue_size))
+        listener = QueueListener(handler.queue, stream, respect_handler_level=True)
+        listener.start()
+        atexit.register(_stop_listener, listener)
+    else:
+        handler = stream
+    handler.addFilter(sampling)
+    
+    root = logging.getLogger()
+    root.setLevel(settings.ec2_log_level.upper())
+    for existing in list(root.handlers):
+        if getattr(existing, "ec2_handler", False):
+            root.removeHandler(existing)
+    handler.ec2_handler = True
+    root.addHandler(handler)
+    return listener
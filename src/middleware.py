@@ -0,0 +1,142 @@
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.logging_config import request_scope
+from src.services.admission import AdmissionControl, Overloaded, RateLimited
+from src.services.metrics import (
+    http_request_duration,
+    http_requests,
+    http_requests_in_flight,
+    http_response_size,
+)
+
+# Etiqueta de los requests que no coinciden con ninguna ruta (404), para no
+# crear una serie por cada path inventado
+UNMATCHED_ROUTE = "unmatched"
+
+# Métodos que modifican instancias y pasan por el control de admisión
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra latencia, tamaño y estado de cada request
+    
+    Es ASGI puro (no ``BaseHTTPMiddleware``): no crea tasks ni copia el
+    cuerpo, solo envuelve ``send`` para leer el status y sumar los bytes
+    enviados. La ruta se etiqueta con su plantilla (``/instances/{instance_id}``),
+    que el router de FastAPI deja en el scope.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = (scope["method"],)
+        status_code = 500
+        size = 0
+        
+        async def send_wrapper(message: Message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        http_requests_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec(method)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            labels = (scope["method"], route)
+            http_requests.inc((scope["method"], route, str(status_code)))
+            http_request_duration.observe(elapsed, labels)
+            http_response_size.observe(size, labels)
+
+
+class LogContextMiddleware:
+    """
+    Middleware ASGI que deja el scope del request en ``request_scope``
+    
+    Los filtros de logging lo leen para etiquetar cada registro con la ruta y
+    aplicar el sampling de esa ruta. El contextvar viaja con el request a los
+    threads del pool, así que cubre también los logs de ``EC2Service``.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI que aplica el tope de mutaciones en curso y el límite por cliente
+    
+    Solo mira los métodos que modifican (``POST``, ``PUT``, ``PATCH``,
+    ``DELETE``). El rechazo se decide antes de leer el cuerpo o resolver la
+    ruta: 503 si hay demasiadas mutaciones en curso y 429 si el cliente
+    superó su tasa, ambos con ``Retry-After``. El cliente se identifica por
+    el header configurado o, si no hay, por la IP de la conexión.
+    """
+    
+    def __init__(self, app: ASGIApp, admission: AdmissionControl):
+        self.app = app
+        self.admission = admission
+    
+    def client_key(self, scope: Scope) -> str:
+        if self.admission.client_header:
+            name = self.admission.client_header.encode("latin-1")
+            for header, value in scope["headers"]:
+                if header == name:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        
+        try:
+            self.admission.enter()
+        except Overloaded as e:
+            await self._reject(e, status_code=503, scope=scope, receive=receive, send=send)
+            return
+        try:
+            try:
+                self.admission.admit_client(self.client_key(scope))
+            except RateLimited as e:
+                await self._reject(e, status_code=429, scope=scope, receive=receive, send=send)
+                return
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.leave()
+    
+    @staticmethod
+    async def _reject(error: RateLimited, status_code: int, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse(
+            {"detail": str(error)},
+            status_code=status_code,
+            headers={"Retry-After": error.retry_after_header},
+        )
+        await response(scope, receive, send)
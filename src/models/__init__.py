@@ -4,6 +4,17 @@
 from .instance import (
     EC2Instance,
     StopInstanceResponse,
+    StopInstancesRequest,
+    StopInstanceResult,
+    StopInstancesResponse,
+    InstanceStateChange,
+    InstanceWaitResponse,
+    RegionInstances,
+    RegionFailure,
+    FanoutSummary,
+    GroupField,
+    InstanceGroup,
+    InstanceSummary,
     ErrorResponse,
     InstanceState,
     InstanceType,
@@ -16,6 +27,17 @@ __all__ = [
     # Instance domain
     "EC2Instance",
     "StopInstanceResponse",
+    "StopInstancesRequest",
+    "StopInstanceResult",
+    "StopInstancesResponse",
+    "InstanceStateChange",
+    "InstanceWaitResponse",
+    "RegionInstances",
+    "RegionFailure",
+    "FanoutSummary",
+    "GroupField",
+    "InstanceGroup",
+    "InstanceSummary",
     "ErrorResponse",
     "InstanceState",
     "InstanceType",
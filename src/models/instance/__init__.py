@@ -1,12 +1,37 @@
 """Dominio Instance - Todo relacionado con instancias EC2"""
 
 from .models import EC2Instance
-from .schemas import StopInstanceResponse, ErrorResponse
+from .schemas import (
+    StopInstanceResponse,
+    StopInstancesRequest,
+    StopInstanceResult,
+    StopInstancesResponse,
+    InstanceStateChange,
+    InstanceWaitResponse,
+    RegionInstances,
+    RegionFailure,
+    FanoutSummary,
+    GroupField,
+    InstanceGroup,
+    InstanceSummary,
+    ErrorResponse,
+)
 from .types import InstanceState, InstanceType
 
 __all__ = [
     "EC2Instance",
     "StopInstanceResponse", 
+    "StopInstancesRequest",
+    "StopInstanceResult",
+    "StopInstancesResponse",
+    "InstanceStateChange",
+    "InstanceWaitResponse",
+    "RegionInstances",
+    "RegionFailure",
+    "FanoutSummary",
+    "GroupField",
+    "InstanceGroup",
+    "InstanceSummary",
     "ErrorResponse",
     "InstanceState",
     "InstanceType",
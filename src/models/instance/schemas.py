@@ -1,6 +1,13 @@
-from pydantic import BaseModel, ConfigDict
+from typing import Literal, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
 
-from .types import InstanceState
+from .models import EC2Instance
+from .types import InstanceState, InstanceType
+from ..shared.aws import AWSRegion
+
+
+# Campos por los que se puede agrupar un resumen de la flota
+GroupField = Literal["state", "region", "type"]
 
 
 class StopInstanceResponse(BaseModel):
@@ -14,6 +21,99 @@ class StopInstanceResponse(BaseModel):
     current_state: InstanceState
 
 
+class StopInstancesRequest(BaseModel):
+    """Schema de request para detener varias instancias en una sola operación"""
+    instance_ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class StopInstanceResult(BaseModel):
+    """Resultado por instancia de una detención en lote"""
+    model_config = ConfigDict(use_enum_values=True)
+    
+    success: bool
+    message: str
+    instance_id: str
+    previous_state: Optional[InstanceState] = None
+    current_state: Optional[InstanceState] = None
+
+
+class StopInstancesResponse(BaseModel):
+    """Schema de respuesta para la detención en lote, con fallos parciales"""
+    results: List[StopInstanceResult]
+    stopped: int
+    failed: int
+
+
+class InstanceStateChange(BaseModel):
+    """Cambio de estado de una instancia, notificado a los listeners del servicio"""
+    model_config = ConfigDict(use_enum_values=True)
+    
+    instance_id: str
+    region: AWSRegion
+    previous_state: InstanceState
+    current_state: InstanceState
+    changed_at: str
+
+
+class InstanceWaitResponse(BaseModel):
+    """Resultado de esperar a que una instancia alcance un estado"""
+    model_config = ConfigDict(use_enum_values=True)
+    
+    reached: bool
+    target_state: InstanceState
+    instance: EC2Instance
+    waited_ms: float
+
+
+class RegionInstances(BaseModel):
+    """Instancias de una región dentro de un listado multi-región"""
+    model_config = ConfigDict(use_enum_values=True)
+    
+    type: Literal["region"] = "region"
+    region: AWSRegion
+    instances: List[EC2Instance]
+    elapsed_ms: float
+
+
+class RegionFailure(BaseModel):
+    """Región que falló o superó el timeout en un listado multi-región"""
+    model_config = ConfigDict(use_enum_values=True)
+    
+    type: Literal["error"] = "error"
+    region: AWSRegion
+    error: str
+    elapsed_ms: float
+
+
+class FanoutSummary(BaseModel):
+    """Resumen final de un listado multi-región"""
+    model_config = ConfigDict(use_enum_values=True)
+    
+    type: Literal["summary"] = "summary"
+    completed: List[AWSRegion]
+    failed: List[AWSRegion]
+    slow: List[AWSRegion]
+    total_instances: int
+    elapsed_ms: float
+
+
+class InstanceGroup(BaseModel):
+    """Cantidad de instancias de una combinación de los campos agrupados"""
+    model_config = ConfigDict(use_enum_values=True)
+    
+    state: Optional[InstanceState] = None
+    region: Optional[AWSRegion] = None
+    type: Optional[InstanceType] = None
+    count: int
+
+
+class InstanceSummary(BaseModel):
+    """Conteo de instancias agrupado por estado, región y/o tipo"""
+    group_by: List[GroupField]
+    total: int
+    groups: List[InstanceGroup]
+
+
 class ErrorResponse(BaseModel):
     """Schema de respuesta de error estándar"""
     error: str
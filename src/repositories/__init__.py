@@ -0,0 +1,7 @@
+"""Repositorios de almacenamiento de la aplicación"""
+
+from .instance_repository import InstanceRepository
+
+__all__ = [
+    "InstanceRepository",
+]
@@ -0,0 +1,120 @@
+"""Codificación compacta de los campos de una instancia para el almacenamiento columnar"""
+
+import socket
+from calendar import timegm
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Dict, List, Optional, Type
+
+from src.models import InstanceState, InstanceType, AWSRegion
+
+
+class Codes:
+    """Códigos enteros chicos (un byte) para los valores de un enum"""
+    
+    def __init__(self, enum: Type[Enum]):
+        self.values: List[str] = [member.value for member in enum]
+        self.codes: Dict[str, int] = {value: code for code, value in enumerate(self.values)}
+    
+    def encode(self, value) -> int:
+        """Código de un miembro del enum o de su valor"""
+        return self.codes[value.value if isinstance(value, Enum) else value]
+
+
+STATES = Codes(InstanceState)
+REGIONS = Codes(AWSRegion)
+TYPES = Codes(InstanceType)
+
+
+def pack_ipv4(value: Optional[str]) -> Optional[int]:
+    """
+    Empaqueta una IPv4 en un entero de 32 bits
+    
+    Returns:
+        Optional[int]: El entero, o None si el valor no es una IPv4 en forma
+        canónica (p. ej. ``34.567.89.123``) y debe guardarse tal cual
+    """
+    if value is None:
+        return None
+    try:
+        packed = socket.inet_aton(value)
+    except (OSError, TypeError):
+        return None
+    # inet_aton acepta formas abreviadas ("10.1"): solo se empaqueta si vuelve idéntica
+    if socket.inet_ntoa(packed) != value:
+        return None
+    return int.from_bytes(packed, "big")
+
+
+def unpack_ipv4(value: int) -> str:
+    return socket.inet_ntoa(value.to_bytes(4, "big"))
+
+
+_DAY_SECONDS = 86400
+_days: Dict[str, int] = {}
+_day_prefixes: Dict[int, str] = {}
+
+
+def _is_ascii_digits(text: str) -> bool:
+    return text.isascii() and text.isdigit()
+
+
+def pack_timestamp(value: Optional[str]) -> Optional[int]:
+    """
+    Convierte una fecha ``YYYY-MM-DDTHH:MM:SSZ`` a segundos desde epoch
+    
+    Los días se resuelven una única vez y se cachean, por lo que la carga de
+    millones de fechas no paga el costo de parsearlas completas.
+    
+    Returns:
+        Optional[int]: Los segundos, o None si el valor no tiene exactamente
+        ese formato y debe guardarse tal cual
+    """
+    if value is None or len(value) != 20 or value[10] != "T" or value[19] != "Z":
+        return None
+    day = _days.get(value[:10])
+    if day is None:
+        try:
+            parsed = datetime.strptime(value[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+        if parsed.strftime("%Y-%m-%d") != value[:10]:
+            return None
+        day = _days[value[:10]] = timegm(parsed.timetuple())
+        _day_prefixes[day] = value[:11]
+    clock = value[11:19]
+    if clock[2] != ":" or clock[5] != ":" or not _is_ascii_digits(clock[:2] + clock[3:5] + clock[6:]):
+        return None
+    hours, minutes, seconds = int(clock[:2]), int(clock[3:5]), int(clock[6:])
+    if hours > 23 or minutes > 59 or seconds > 59:
+        return None
+    return day + hours * 3600 + minutes * 60 + seconds
+
+
+def unpack_timestamp(value: int) -> str:
+    day = value - value % _DAY_SECONDS
+    prefix = _day_prefixes.get(day)
+    if prefix is None:
+        prefix = _day_prefixes[day] = datetime.fromtimestamp(day, timezone.utc).strftime("%Y-%m-%dT")
+    seconds = value - day
+    return f"{prefix}{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}Z"
+
+
+def timestamp_key(value: Optional[str]) -> Optional[int]:
+    """
+    Segundos desde epoch de cualquier fecha ISO 8601, para ordenar y comparar
+    
+    Acepta también fechas sin hora o con zona horaria; las fechas sin zona
+    se toman como UTC. Retorna None si el valor no es una fecha.
+    """
+    packed = pack_timestamp(value)
+    if packed is not None or value is None:
+        return packed
+    text = value[:-1] + "+00:00" if value.endswith("Z") else value
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() // 1)
@@ -0,0 +1,734 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableMapping
+from itertools import accumulate, chain, compress, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+from .encoding import (
+    REGIONS,
+    STATES,
+    TYPES,
+    pack_ipv4,
+    pack_timestamp,
+    timestamp_key,
+    unpack_ipv4,
+    unpack_timestamp,
+)
+
+
+T = TypeVar("T")
+
+# Combinación (estado, región, tipo) en códigos
+CellKey = Tuple[int, int, int]
+CELL_FIELDS = ("state", "region", "type")
+CELL_CODES = (STATES, REGIONS, TYPES)
+
+# Valor de una columna entera cuando el campo es None o se guardó sin empaquetar
+EMPTY = 0
+EMPTY_TIME = -(1 << 63)
+
+FIELDS = frozenset(EC2Instance.model_fields)
+
+
+def _construct(values: Dict[str, Optional[str]]) -> EC2Instance:
+    """
+    Crea un EC2Instance con todos sus campos ya validados
+    
+    Equivale a ``EC2Instance.model_construct(**values)`` sin resolver
+    defaults ni alias, que acá no hacen falta: es el camino de cada lectura.
+    """
+    instance = EC2Instance.__new__(EC2Instance)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(FIELDS))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _tail(cell: Sequence[str], after: Optional[str]) -> Iterator[str]:
+    """Itera una lista ordenada a partir del primer elemento mayor a ``after``"""
+    start = bisect_right(cell, after) if after is not None else 0
+    for position in range(start, len(cell)):
+        yield cell[position]
+
+
+class InstanceRepository(MutableMapping):
+    """
+    Almacén columnar en memoria de instancias EC2 con índices secundarios
+    
+    Se comporta como un dict ``{instance_id: EC2Instance}``, pero no guarda
+    un modelo por instancia: cada campo vive en su propia columna, indexada
+    por número de fila, y los ``EC2Instance`` se materializan recién cuando
+    se leen.
+    
+    - estado, región y tipo son códigos de un byte (``bytearray``)
+    - las IPv4 se empaquetan en enteros de 32 bits y ``launch_time`` en
+      segundos desde epoch (``array``); los valores sin forma canónica
+      (p. ej. ``34.567.89.123``) se guardan tal cual aparte
+    - los nombres se guardan en UTF-8 en un único buffer compartido
+    
+    Índices, mantenidos de forma incremental:
+    - los IDs ordenados junto a su fila: resuelven las búsquedas por ID y la
+      paginación por cursor, sin un dict ni un objeto extra por instancia
+    - una celda por combinación (estado, región, tipo) con sus IDs ordenados;
+      un filtro recorre en orden solo las celdas que coinciden, por lo que
+      una página cuesta lo mismo sin importar el tamaño de la flota
+    - un índice ordenado por ``launch_time``
+    
+    Las instancias leídas son copias: los cambios de estado deben hacerse
+    con ``set_state`` (o reasignando la instancia).
+    
+    ``version`` es un contador monótono que aumenta con cada mutación; cada
+    instancia recuerda la versión de su último cambio.
+    
+    Si se asigna un ``journal`` (ver ``src.repositories.persistence``), cada
+    mutación se registra en él dentro del lock, en el mismo orden en que se
+    aplica.
+    """
+    
+    def __init__(self, instances: Iterable[EC2Instance] = ()):
+        self._lock = threading.RLock()
+        self.version = 0
+        self.journal = None
+        self._reset()
+        self.update((instance.id, instance) for instance in instances)
+    
+    def _reset(self):
+        # Columnas, por fila; las filas borradas se reutilizan
+        self._ids: List[Optional[str]] = []
+        self._free_rows: List[int] = []
+        self._states = bytearray()
+        self._regions = bytearray()
+        self._types = bytearray()
+        self._names = bytearray()
+        self._name_starts = array("I")
+        self._name_lengths = array("I")
+        self._names_unused = 0
+        self._private_ips = array("I")
+        self._public_ips = array("I")
+        self._launch_times = array("q")
+        self._versions = array("q")
+        # Valores sin forma canónica, por (campo, fila)
+        self._raw: Dict[Tuple[str, int], str] = {}
+        # Índices
+        self._sorted_ids: List[str] = []
+        self._sorted_rows = array("I")
+        self._cells: Dict[CellKey, List[str]] = {}
+        self._launch_keys = array("q")
+        # Filas ordenadas por (launch_time, ID)
+        self._launch_rows = array("I")
+    
+    # --- Interfaz de mapping ---
+    
+    def __getitem__(self, instance_id: str) -> EC2Instance:
+        with self._lock:
+            row = self._row(instance_id)
+            if row is None:
+                raise KeyError(instance_id)
+            return self._materialize(row)
+    
+    def __setitem__(self, instance_id: str, instance: EC2Instance):
+        with self._lock:
+            self.version += 1
+            position = self._position(instance_id)
+            if position is not None:
+                row = self._sorted_rows[position]
+                self._unindex(row)
+                self._write(row, instance_id, instance)
+            else:
+                row = self._allocate(instance_id, instance)
+                position = bisect_left(self._sorted_ids, instance_id)
+                self._sorted_ids.insert(position, instance_id)
+                self._sorted_rows.insert(position, row)
+            self._index(row)
+            if self.journal is not None:
+                self.journal.record_put(instance)
+    
+    def __delitem__(self, instance_id: str):
+        with self._lock:
+            position = self._position(instance_id)
+            if position is None:
+                raise KeyError(instance_id)
+            row = self._sorted_rows[position]
+            self._unindex(row)
+            del self._sorted_ids[position]
+            del self._sorted_rows[position]
+            for field in ("launch_time", "private_ip", "public_ip"):
+                self._raw.pop((field, row), None)
+            self._names_unused += self._name_lengths[row]
+            self._name_lengths[row] = 0
+            self._ids[row] = None
+            self._free_rows.append(row)
+            self.version += 1
+            if self.journal is not None:
+                self.journal.record_delete(instance_id)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sorted_ids)
+    
+    def __len__(self) -> int:
+        return len(self._sorted_ids)
+    
+    def __contains__(self, instance_id) -> bool:
+        return self._row(instance_id) is not None
+    
+    def get(self, instance_id: str, default=None) -> Optional[EC2Instance]:
+        with self._lock:
+            row = self._row(instance_id)
+            return default if row is None else self._materialize(row)
+    
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.version += 1
+            if self.journal is not None:
+                self.journal.record_clear()
+    
+    def update(self, other=(), **kwargs):
+        """Carga masiva: escribe las columnas y ordena los índices una sola vez"""
+        items = other.items() if hasattr(other, "items") else other
+        with self._lock:
+            self.version += 1
+            # Si un ID se repite en el lote, gana la última instancia
+            pending = dict(items)
+            pending.update(kwargs)
+            # Los reemplazos van primero, mientras las celdas siguen ordenadas
+            for instance_id in [instance_id for instance_id in pending if instance_id in self]:
+                self[instance_id] = pending.pop(instance_id)
+            if not pending:
+                return
+            
+            added = []
+            touched = set()
+            launched: List[Tuple[int, str, int]] = []
+            for instance_id, instance in pending.items():
+                row = self._allocate(instance_id, instance)
+                added.append(row)
+                cell = self._cell_key(row)
+                self._cells.setdefault(cell, []).append(instance_id)
+                touched.add(cell)
+                key = self._launch_key(row)
+                if key is not None:
+                    launched.append((key, instance_id, row))
+                if self.journal is not None:
+                    self.journal.record_put(instance)
+            
+            ids = self._ids
+            rows = sorted(list(self._sorted_rows) + added, key=ids.__getitem__)
+            self._sorted_ids, self._sorted_rows = [ids[row] for row in rows], array("I", rows)
+            for cell in touched:
+                self._cells[cell].sort()
+            if launched:
+                indexed = zip(self._launch_keys, map(ids.__getitem__, self._launch_rows), self._launch_rows)
+                merged = sorted(list(indexed) + launched)
+                self._launch_keys = array("q", (key for key, _, _ in merged))
+                self._launch_rows = array("I", (row for _, _, row in merged))
+    
+    def load_columns(self, chunks: Iterable[Dict[str, object]]):
+        """
+        Carga masiva de instancias nuevas a partir de columnas ya codificadas
+        
+        No crea un ``EC2Instance`` por fila: agrega cada columna de una vez y
+        arma los índices al final, con un único ordenamiento por ID. Es el
+        camino de la flota sintética (``src.utils.fleet.load_fleet``).
+        
+        Args:
+            chunks (Iterable[Dict[str, object]]): Bloques de columnas: ``ids``
+                y ``names`` (listas de str), ``states``, ``regions`` y
+                ``types`` (códigos de ``encoding``, en bytes) y ``private_ips``,
+                ``public_ips`` (``array("I")``) y ``launch_times``
+                (``array("q")``) en forma canónica, con ``EMPTY`` para las
+                IPs ausentes
+        
+        Raises:
+            ValueError: Si un ID se repite o ya existe (no se carga nada)
+        """
+        with self._lock:
+            start = len(self._ids)
+            names = bytearray()
+            name_lengths = array("I")
+            try:
+                for columns in chunks:
+                    self._ids.extend(columns["ids"])
+                    self._states += columns["states"]
+                    self._regions += columns["regions"]
+                    self._types += columns["types"]
+                    self._private_ips += columns["private_ips"]
+                    self._public_ips += columns["public_ips"]
+                    self._launch_times += columns["launch_times"]
+                    encoded = list(map(str.encode, columns["names"]))
+                    name_lengths += array("I", map(len, encoded))
+                    names += b"".join(encoded)
+                
+                ids = self._ids
+                rows = sorted(chain(self._sorted_rows, range(start, len(ids))), key=ids.__getitem__)
+                sorted_ids = [ids[row] for row in rows]
+                if any(map(str.__eq__, sorted_ids, islice(sorted_ids, 1, None))):
+                    raise ValueError("Bulk load contains repeated or existing instance IDs")
+            except BaseException:
+                for column in (
+                    self._ids, self._states, self._regions, self._types,
+                    self._private_ips, self._public_ips, self._launch_times,
+                ):
+                    del column[start:]
+                raise
+            
+            self.version += 1
+            added = len(ids) - start
+            self._name_starts += array("I", islice(accumulate(name_lengths, initial=len(self._names)), added))
+            self._name_lengths += name_lengths
+            self._names += names
+            self._versions += array("q", [self.version]) * added
+            self._sorted_ids, self._sorted_rows = sorted_ids, array("I", rows)
+            
+            # Las filas nuevas, en orden de ID, se agrupan por celda con un orden
+            # estable: cada grupo es un tramo ordenado de IDs. El código de la
+            # celda de cada fila se arma intercalando los bytes de las tres columnas
+            codes = bytearray(4 * len(ids))
+            codes[1::4], codes[2::4], codes[3::4] = self._states, self._regions, self._types
+            codes = array("I", codes)
+            by_cell = sorted(compress(rows, map(start.__le__, rows)), key=codes.__getitem__)
+            cell_codes = list(map(codes.__getitem__, by_cell))
+            grouped = list(map(ids.__getitem__, by_cell))
+            position = 0
+            while position < added:
+                end = bisect_right(cell_codes, cell_codes[position], position)
+                cell_ids = self._cells.setdefault(self._cell_key(by_cell[position]), [])
+                cell_ids += grouped[position:end]
+                if len(cell_ids) > end - position:
+                    # La celda ya tenía IDs: quedan dos tramos ordenados que se fusionan
+                    cell_ids.sort()
+                position = end
+            
+            # Orden estable por launch_time sobre las filas ya ordenadas por ID:
+            # queda (launch_time, ID). Las filas previas conservan la clave de su índice
+            keys = self._launch_times.tolist()
+            for row, key in zip(self._launch_rows, self._launch_keys):
+                keys[row] = key
+            launch_rows = list(compress(rows, map(EMPTY_TIME.__ne__, map(keys.__getitem__, rows))))
+            launch_rows.sort(key=keys.__getitem__)
+            self._launch_keys = array("q", list(map(keys.__getitem__, launch_rows)))
+            self._launch_rows = array("I", launch_rows)
+            
+            if self.journal is not None:
+                for row in range(start, len(ids)):
+                    self.journal.record_put(self._materialize(row))
+    
+    # --- Mutaciones ---
+    
+    def set_state(self, instance_id: str, state: InstanceState) -> EC2Instance:
+        """
+        Cambia el estado de una instancia actualizando los índices afectados
+        
+        Args:
+            instance_id (str): ID de la instancia
+            state (InstanceState): Nuevo estado
+        
+        Returns:
+            EC2Instance: La instancia actualizada
+        
+        Raises:
+            KeyError: Si la instancia no existe
+        """
+        return self._materialize(self._set_state(instance_id, state))
+    
+    def _set_state(self, instance_id: str, state: InstanceState) -> int:
+        """``set_state`` sin materializar la instancia; retorna su fila"""
+        with self._lock:
+            row = self._row(instance_id)
+            if row is None:
+                raise KeyError(instance_id)
+            cell = self._cells[self._cell_key(row)]
+            del cell[bisect_left(cell, instance_id)]
+            self._states[row] = STATES.encode(state)
+            insort(self._cells.setdefault(self._cell_key(row), []), instance_id)
+            self.version += 1
+            self._versions[row] = self.version
+            if self.journal is not None:
+                self.journal.record_state(instance_id, state)
+        return row
+    
+    def instance_version(self, instance_id: str) -> Optional[int]:
+        """Versión del último cambio de una instancia, o None si no existe"""
+        with self._lock:
+            row = self._row(instance_id)
+            return None if row is None else self._versions[row]
+    
+    def get_versioned(self, instance_id: str) -> Optional[Tuple[EC2Instance, int]]:
+        """Instancia junto a la versión de su último cambio, leídas en un mismo paso; None si no existe"""
+        with self._lock:
+            row = self._row(instance_id)
+            return None if row is None else (self._materialize(row), self._versions[row])
+    
+    # --- Consultas ---
+    
+    def iter_ids(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        after: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Itera en orden los IDs que cumplen los filtros
+        
+        Sin filtros se recorre la lista ordenada de IDs desde el cursor. Con
+        filtros se mezclan en orden las celdas que coinciden, de modo que el
+        costo es proporcional a los IDs consumidos y no al tamaño de la flota.
+        El prefijo del nombre se compara contra el buffer de nombres, sin
+        materializar las instancias.
+        
+        Args:
+            state (Optional[InstanceState]): Filtra por estado
+            region (Optional[AWSRegion]): Filtra por región
+            instance_type (Optional[InstanceType]): Filtra por tipo
+            after (Optional[str]): Retorna solo IDs mayores a este
+            name_prefix (Optional[str]): Filtra por prefijo del nombre
+        
+        Returns:
+            Iterator[str]: IDs ordenados
+        """
+        cells = None
+        if state is not None or region is not None or instance_type is not None:
+            cells = [cell for _, cell in self._matching_cells(state, region, instance_type)]
+        if cells is None:
+            instance_ids = _tail(self._sorted_ids, after)
+        elif len(cells) == 1:
+            instance_ids = _tail(cells[0], after)
+        else:
+            instance_ids = heapq.merge(*(_tail(cell, after) for cell in cells))
+        
+        if name_prefix is None:
+            yield from instance_ids
+            return
+        prefix = name_prefix.encode()
+        if cells is None:
+            # Recorrido completo: la fila de cada ID está a la par, sin buscarla
+            start = bisect_right(self._sorted_ids, after) if after is not None else 0
+            pairs = self._sorted_pairs(start)
+        else:
+            pairs = ((instance_id, self._row(instance_id)) for instance_id in instance_ids)
+        names, starts, lengths = self._names, self._name_starts, self._name_lengths
+        for instance_id, row in pairs:
+            if row is not None and lengths[row] >= len(prefix) and names.startswith(prefix, starts[row]):
+                yield instance_id
+    
+    def count(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+    ) -> int:
+        """Cantidad de instancias que cumplen los filtros, sin recorrerlas"""
+        return sum(len(cell) for _, cell in self._matching_cells(state, region, instance_type))
+    
+    def count_by(
+        self,
+        group_by: Sequence[str],
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+    ) -> Dict[Tuple[str, ...], int]:
+        """
+        Cuenta las instancias que cumplen los filtros, agrupadas por estado, región y/o tipo
+        
+        Suma el tamaño de las celdas que coinciden sin recorrer instancias: el
+        costo depende de la cantidad de combinaciones (a lo sumo unos cientos)
+        y no del tamaño de la flota.
+        
+        Args:
+            group_by (Sequence[str]): Campos por los que agrupar (``state``, ``region``, ``type``)
+            state (Optional[InstanceState]): Filtra por estado
+            region (Optional[AWSRegion]): Filtra por región
+            instance_type (Optional[InstanceType]): Filtra por tipo
+        
+        Returns:
+            Dict[Tuple[str, ...], int]: Cantidad por combinación de valores de
+            ``group_by``; solo incluye combinaciones con instancias
+        
+        Raises:
+            ValueError: Si algún campo no es agrupable
+        """
+        columns = []
+        for field in group_by:
+            if field not in CELL_FIELDS:
+                raise ValueError(f"Cannot group by {field}")
+            columns.append(CELL_FIELDS.index(field))
+        
+        counts: Dict[Tuple[str, ...], int] = {}
+        for key, cell in self._matching_cells(state, region, instance_type):
+            group = tuple(CELL_CODES[column].values[key[column]] for column in columns)
+            counts[group] = counts.get(group, 0) + len(cell)
+        return counts
+    
+    def launched_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """
+        Retorna los IDs lanzados en el rango ``[start, end)``, ordenados por ``launch_time``
+        
+        Args:
+            start (Optional[str]): Fecha ISO 8601 inicial (inclusive)
+            end (Optional[str]): Fecha ISO 8601 final (exclusive)
+        
+        Raises:
+            ValueError: Si alguno de los extremos no es una fecha
+        """
+        bounds = []
+        for bound in (start, end):
+            key = timestamp_key(bound)
+            if bound is not None and key is None:
+                raise ValueError(f"Invalid date: {bound}")
+            bounds.append(key)
+        low = bisect_left(self._launch_keys, bounds[0]) if bounds[0] is not None else 0
+        high = bisect_left(self._launch_keys, bounds[1]) if bounds[1] is not None else len(self._launch_keys)
+        return list(map(self._ids.__getitem__, self._launch_rows[low:high]))
+    
+    def _matching_cells(
+        self,
+        state: Optional[InstanceState],
+        region: Optional[AWSRegion],
+        instance_type: Optional[InstanceType],
+    ) -> List[Tuple[CellKey, List[str]]]:
+        """Celdas no vacías que cumplen los filtros, junto a su combinación"""
+        filters = [
+            (column, codes.encode(value))
+            for column, codes, value in zip(range(len(CELL_CODES)), CELL_CODES, (state, region, instance_type))
+            if value is not None
+        ]
+        # Un cambio de estado concurrente puede agregar celdas al dict
+        with self._lock:
+            return [
+                (key, cell) for key, cell in self._cells.items()
+                if cell and all(key[column] == code for column, code in filters)
+            ]
+    
+    # --- Snapshots ---
+    
+    def export_columns(self, checkpoint: Optional[Callable[[], T]] = None) -> Tuple[Dict[str, object], Optional[T]]:
+        """
+        Copia consistente de las columnas y los índices, para escribir un snapshot
+        
+        Bajo el lock solo se copian buffers y listas, sin recorrer filas en
+        Python, así que las escrituras se bloquean apenas unos milisegundos.
+        ``checkpoint`` se ejecuta dentro del mismo lock: lee la posición del
+        journal que cubre exactamente la copia. Debe ser barato (sin I/O),
+        porque mientras corre las escrituras esperan.
+        
+        Returns:
+            Tuple[Dict[str, object], Optional[T]]: Las columnas (ver
+            ``from_columns``) y el resultado de ``checkpoint``
+        """
+        with self._lock:
+            columns = {
+                "version": self.version,
+                "ids": list(self._ids),
+                "free_rows": list(self._free_rows),
+                "states": bytes(self._states),
+                "regions": bytes(self._regions),
+                "types": bytes(self._types),
+                "names": bytes(self._names),
+                "name_starts": self._name_starts[:],
+                "name_lengths": self._name_lengths[:],
+                "names_unused": self._names_unused,
+                "private_ips": self._private_ips[:],
+                "public_ips": self._public_ips[:],
+                "launch_times": self._launch_times[:],
+                "versions": self._versions[:],
+                "raw": dict(self._raw),
+                "sorted_ids": list(self._sorted_ids),
+                "sorted_rows": self._sorted_rows[:],
+                "cells": {key: list(cell) for key, cell in self._cells.items() if cell},
+                "launch_keys": self._launch_keys[:],
+                "launch_rows": self._launch_rows[:],
+            }
+            result = checkpoint() if checkpoint is not None else None
+        return columns, result
+    
+    @classmethod
+    def from_columns(cls, columns: Dict[str, object]) -> "InstanceRepository":
+        """Reconstruye un repositorio a partir de las columnas de ``export_columns``, sin copiarlas"""
+        repository = cls()
+        repository.version = columns["version"]
+        repository._ids = columns["ids"]
+        repository._free_rows = columns["free_rows"]
+        repository._states = bytearray(columns["states"])
+        repository._regions = bytearray(columns["regions"])
+        repository._types = bytearray(columns["types"])
+        repository._names = bytearray(columns["names"])
+        repository._name_starts = columns["name_starts"]
+        repository._name_lengths = columns["name_lengths"]
+        repository._names_unused = columns["names_unused"]
+        repository._private_ips = columns["private_ips"]
+        repository._public_ips = columns["public_ips"]
+        repository._launch_times = columns["launch_times"]
+        repository._versions = columns["versions"]
+        repository._raw = columns["raw"]
+        repository._sorted_ids = columns["sorted_ids"]
+        repository._sorted_rows = columns["sorted_rows"]
+        repository._cells = columns["cells"]
+        repository._launch_keys = columns["launch_keys"]
+        repository._launch_rows = columns["launch_rows"]
+        return repository
+    
+    # --- Filas ---
+    
+    def _position(self, instance_id: str) -> Optional[int]:
+        """Posición del ID en el índice ordenado, o None si no existe (con el lock tomado)"""
+        position = bisect_left(self._sorted_ids, instance_id)
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == instance_id:
+            return position
+        return None
+    
+    def _row(self, instance_id: str) -> Optional[int]:
+        """
+        Fila del ID, o None si no existe
+        
+        Toma el lock: las escrituras modifican ``_sorted_ids`` y
+        ``_sorted_rows`` en dos pasos, y sin él una lectura podría combinar
+        una posición de una con la fila de la otra.
+        """
+        with self._lock:
+            position = self._position(instance_id)
+            return None if position is None else self._sorted_rows[position]
+    
+    def _sorted_pairs(self, start: int) -> Iterator[Tuple[str, int]]:
+        """Pares (ID, fila) del índice ordenado desde ``start``, leídos juntos bajo el lock"""
+        position = start
+        while True:
+            with self._lock:
+                if position >= len(self._sorted_ids):
+                    return
+                pair = self._sorted_ids[position], self._sorted_rows[position]
+            yield pair
+            position += 1
+    
+    def _allocate(self, instance_id: str, instance: EC2Instance) -> int:
+        """Reserva una fila (reutilizando las liberadas) y escribe la instancia"""
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._ids)
+            self._ids.append(None)
+            self._states.append(0)
+            self._regions.append(0)
+            self._types.append(0)
+            self._name_starts.append(0)
+            self._name_lengths.append(0)
+            self._private_ips.append(EMPTY)
+            self._public_ips.append(EMPTY)
+            self._launch_times.append(EMPTY_TIME)
+            self._versions.append(0)
+        self._write(row, instance_id, instance)
+        return row
+    
+    def _write(self, row: int, instance_id: str, instance: EC2Instance):
+        self._ids[row] = instance_id
+        self._states[row] = STATES.encode(instance.state)
+        self._regions[row] = REGIONS.encode(instance.region)
+        self._types[row] = TYPES.encode(instance.type)
+        self._write_name(row, instance.name)
+        self._private_ips[row] = self._pack("private_ip", row, instance.private_ip, pack_ipv4, EMPTY)
+        self._public_ips[row] = self._pack("public_ip", row, instance.public_ip, pack_ipv4, EMPTY)
+        self._launch_times[row] = self._pack("launch_time", row, instance.launch_time, pack_timestamp, EMPTY_TIME)
+        self._versions[row] = self.version
+    
+    def _write_name(self, row: int, name: str):
+        """Agrega el nombre al final del buffer, salvo que no haya cambiado"""
+        encoded = name.encode()
+        start, length = self._name_starts[row], self._name_lengths[row]
+        if length == len(encoded) and self._names[start:start + length] == encoded:
+            return
+        self._names_unused += length
+        self._name_lengths[row] = 0
+        # Los nombres reemplazados se descartan cuando ocupan más de la mitad del buffer
+        if self._names_unused > len(self._names) // 2:
+            self._compact_names()
+        self._name_starts[row] = len(self._names)
+        self._name_lengths[row] = len(encoded)
+        self._names += encoded
+    
+    def _compact_names(self):
+        """Reescribe el buffer de nombres solo con los de las filas en uso"""
+        names = bytearray()
+        for row in range(len(self._ids)):
+            start, length = self._name_starts[row], self._name_lengths[row]
+            self._name_starts[row] = len(names)
+            names += self._names[start:start + length]
+        self._names = names
+        self._names_unused = 0
+    
+    def _pack(self, field: str, row: int, value: Optional[str], pack, empty: int) -> int:
+        """Empaqueta un valor; si no tiene forma canónica lo guarda tal cual aparte"""
+        packed = pack(value)
+        if packed is not None and packed != empty:
+            self._raw.pop((field, row), None)
+            return packed
+        if value is None:
+            self._raw.pop((field, row), None)
+        else:
+            self._raw[(field, row)] = value
+        return empty
+    
+    def _materialize(self, row: int) -> EC2Instance:
+        """Arma el EC2Instance de una fila (sin revalidar: las columnas ya son válidas)"""
+        start = self._name_starts[row]
+        launch_time, private_ip, public_ip = self._launch_times[row], self._private_ips[row], self._public_ips[row]
+        raw = self._raw
+        return _construct({
+            "id": self._ids[row],
+            "name": self._names[start:start + self._name_lengths[row]].decode(),
+            "type": TYPES.values[self._types[row]],
+            "state": STATES.values[self._states[row]],
+            "region": REGIONS.values[self._regions[row]],
+            "launch_time": (
+                unpack_timestamp(launch_time) if launch_time != EMPTY_TIME
+                else raw.get(("launch_time", row)) if raw else None
+            ),
+            "private_ip": (
+                unpack_ipv4(private_ip) if private_ip != EMPTY
+                else raw.get(("private_ip", row)) if raw else None
+            ),
+            "public_ip": (
+                unpack_ipv4(public_ip) if public_ip != EMPTY
+                else raw.get(("public_ip", row)) if raw else None
+            ),
+        })
+    
+    # --- Mantenimiento de índices ---
+    
+    def _cell_key(self, row: int) -> CellKey:
+        return self._states[row], self._regions[row], self._types[row]
+    
+    def _launch_key(self, row: int) -> Optional[int]:
+        if self._launch_times[row] != EMPTY_TIME:
+            return self._launch_times[row]
+        return timestamp_key(self._raw.get(("launch_time", row)))
+    
+    def _launch_position(self, key: int, instance_id: str) -> int:
+        """Posición de (key, instance_id) en el índice por launch_time"""
+        low = bisect_left(self._launch_keys, key)
+        high = bisect_right(self._launch_keys, key, low)
+        ids = self._ids
+        return low + bisect_left([ids[row] for row in self._launch_rows[low:high]], instance_id)
+    
+    def _index(self, row: int):
+        instance_id = self._ids[row]
+        insort(self._cells.setdefault(self._cell_key(row), []), instance_id)
+        key = self._launch_key(row)
+        if key is not None:
+            position = self._launch_position(key, instance_id)
+            self._launch_keys.insert(position, key)
+            self._launch_rows.insert(position, row)
+    
+    def _unindex(self, row: int):
+        instance_id = self._ids[row]
+        cell = self._cells[self._cell_key(row)]
+        del cell[bisect_left(cell, instance_id)]
+        key = self._launch_key(row)
+        if key is not None:
+            position = self._launch_position(key, instance_id)
+            del self._launch_keys[position]
+            del self._launch_rows[position]
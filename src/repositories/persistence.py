@@ -0,0 +1,529 @@
+"""
+Persistencia del repositorio en memoria: journal append-only y snapshots binarios
+
+- El journal registra cada mutación del repositorio (cambios de estado,
+  altas, bajas) como un registro binario con CRC. Los registros se acumulan
+  en memoria y un thread los escribe y hace ``fsync`` en lote cada
+  ``fsync_interval`` segundos: una mutación no espera al disco, y ante una
+  caída se pierden a lo sumo los registros de esa ventana.
+- Un snapshot guarda las columnas e índices del repositorio tal como están
+  en memoria (buffers de bytes y ``array``), con el número de secuencia
+  (LSN) del último registro que cubre. Al escribir uno, el journal pasa a un
+  segmento nuevo y los anteriores se borran.
+- La recuperación mapea el snapshot en memoria (``mmap``), reconstruye los
+  índices sin materializar instancias y aplica los registros del journal
+  posteriores a su LSN.
+"""
+
+import itertools
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.config import Settings
+from src.models import EC2Instance, InstanceState
+from src.utils.fleet import gc_paused
+from .encoding import STATES
+from .instance_repository import InstanceRepository
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.bin"
+SNAPSHOT_MAGIC = b"EC2SNAP1"
+SNAPSHOT_FORMAT = 1
+JOURNAL_PREFIX = "journal-"
+JOURNAL_SUFFIX = ".log"
+
+# Registro del journal: CRC32 de (LSN + payload), largo del payload y LSN
+RECORD_HEADER = struct.Struct("<IIQ")
+LSN = struct.Struct("<Q")
+OP_STATE = 1
+OP_PUT = 2
+OP_DELETE = 3
+OP_CLEAR = 4
+
+# Secciones binarias del snapshot y su typecode de array (None = bytes). Las
+# filas se guardan renumeradas en el orden de los IDs: la fila i es el i-ésimo
+# ID de ``ids``
+SECTIONS = (
+    ("ids", None),
+    ("states", None),
+    ("regions", None),
+    ("types", None),
+    ("names", None),
+    ("name_starts", "I"),
+    ("name_lengths", "I"),
+    ("private_ips", "I"),
+    ("public_ips", "I"),
+    ("launch_times", "q"),
+    ("versions", "q"),
+    ("cell_rows", "I"),
+    ("launch_keys", "q"),
+    ("launch_rows", "I"),
+)
+
+ALIGNMENT = 8
+
+
+def _fsync_directory(directory: str):
+    """Persiste las altas, bajas y renombres de archivos del directorio"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+# --- Snapshots ---
+
+
+def _compact(columns: Dict[str, object]) -> Dict[str, object]:
+    """
+    Renumera las filas de ``export_columns`` en el orden de los IDs
+    
+    Descarta las filas libres y los nombres reemplazados. Al recuperar, la
+    columna de IDs por fila es una copia de la lista ordenada y las celdas
+    se arman recorriendo esa lista casi en orden, en vez de saltar por la
+    memoria una vez por instancia.
+    """
+    order = columns["sorted_rows"]
+    new_row = array("I", bytes(4 * len(columns["ids"])))
+    for row_number, row in enumerate(order):
+        new_row[row] = row_number
+    
+    def take(values):
+        return map(values.__getitem__, order)
+    
+    names, starts, lengths = columns["names"], columns["name_starts"], columns["name_lengths"]
+    name_lengths = array("I", take(lengths))
+    name_starts = array("I", itertools.accumulate(name_lengths, initial=0))
+    name_starts.pop()
+    compacted = {
+        "states": bytes(take(columns["states"])),
+        "regions": bytes(take(columns["regions"])),
+        "types": bytes(take(columns["types"])),
+        "names": b"".join(names[starts[row]:starts[row] + lengths[row]] for row in order),
+        "name_starts": name_starts,
+        "name_lengths": name_lengths,
+        "raw": {(field, new_row[row]): value for (field, row), value in columns["raw"].items()},
+        "launch_keys": columns["launch_keys"],
+        "launch_rows": array("I", map(new_row.__getitem__, columns["launch_rows"])),
+    }
+    for name, typecode in (("private_ips", "I"), ("public_ips", "I"), ("launch_times", "q"), ("versions", "q")):
+        compacted[name] = array(typecode, take(columns[name]))
+    
+    row_of = dict(zip(columns["sorted_ids"], range(len(order))))
+    compacted["cells"] = []
+    compacted["cell_rows"] = array("I")
+    for key, cell in columns["cells"].items():
+        compacted["cells"].append([*key, len(cell)])
+        compacted["cell_rows"].extend(map(row_of.__getitem__, cell))
+    return compacted
+
+
+def write_snapshot(path: str, columns: Dict[str, object], lsn: int):
+    """
+    Escribe las columnas de ``InstanceRepository.export_columns`` en un snapshot
+    
+    El archivo se escribe aparte y se renombra al terminar, así que un corte
+    a mitad de camino deja intacto el snapshot anterior.
+    
+    Raises:
+        ValueError: Si algún ID contiene un salto de línea (separador de la sección de IDs)
+    """
+    sorted_ids = columns["sorted_ids"]
+    encoded_ids = "\n".join(sorted_ids).encode()
+    if encoded_ids.count(b"\n") != max(len(sorted_ids) - 1, 0):
+        raise ValueError("Instance IDs cannot contain line breaks")
+    
+    data = dict(_compact(columns), ids=encoded_ids)
+    sections = []
+    offset = 0
+    for name, _ in SECTIONS:
+        payload = memoryview(data[name]).cast("B")
+        sections.append([name, offset, len(payload), zlib.crc32(payload)])
+        offset += len(payload) + _padding(len(payload))
+    header = json.dumps({
+        "format": SNAPSHOT_FORMAT,
+        "byteorder": sys.byteorder,
+        "itemsizes": {typecode: array(typecode).itemsize for typecode in "Iq"},
+        "lsn": lsn,
+        "version": columns["version"],
+        "instances": len(sorted_ids),
+        "raw": [[field, row, value] for (field, row), value in data["raw"].items()],
+        "cells": data["cells"],
+        "sections": sections,
+    }).encode()
+    
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as snapshot:
+        prefix = SNAPSHOT_MAGIC + struct.pack("<I", len(header)) + header
+        snapshot.write(prefix + b"\0" * _padding(len(prefix)))
+        for name, _ in SECTIONS:
+            payload = memoryview(data[name]).cast("B")
+            snapshot.write(payload)
+            snapshot.write(b"\0" * _padding(len(payload)))
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, object], int]:
+    """
+    Lee un snapshot y retorna las columnas para ``InstanceRepository.from_columns`` y su LSN
+    
+    El archivo se mapea en memoria y cada sección se copia una sola vez a su
+    buffer o ``array`` final. Las listas de IDs se arman con ``map`` sobre
+    la lista ordenada, sin recorrer filas en Python.
+    
+    Raises:
+        ValueError: Si el archivo no es un snapshot válido o fue escrito en
+            una plataforma con otro orden de bytes
+    """
+    with open(path, "rb") as snapshot, mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a snapshot file: {path}")
+        start = len(SNAPSHOT_MAGIC) + 4
+        (header_length,) = struct.unpack_from("<I", mapped, len(SNAPSHOT_MAGIC))
+        header = json.loads(mapped[start:start + header_length])
+        itemsizes = {typecode: array(typecode).itemsize for typecode in "Iq"}
+        if header["format"] != SNAPSHOT_FORMAT or header["byteorder"] != sys.byteorder or header["itemsizes"] != itemsizes:
+            raise ValueError(f"Incompatible snapshot: {path}")
+        base = start + header_length + _padding(start + header_length)
+        
+        typecodes = dict(SECTIONS)
+        sections: Dict[str, object] = {}
+        with memoryview(mapped) as view:
+            for name, offset, length, crc in header["sections"]:
+                with view[base + offset:base + offset + length] as payload:
+                    if zlib.crc32(payload) != crc:
+                        raise ValueError(f"Corrupted snapshot section {name}: {path}")
+                    if typecodes[name] is None:
+                        sections[name] = bytearray(payload)
+                    else:
+                        values = array(typecodes[name])
+                        values.frombytes(payload)
+                        sections[name] = values
+    
+    count = header["instances"]
+    sorted_ids = sections.pop("ids").decode().split("\n") if count else []
+    cells = {}
+    cell_rows = sections.pop("cell_rows")
+    offset = 0
+    for state, region, instance_type, size in header["cells"]:
+        cells[(state, region, instance_type)] = list(map(sorted_ids.__getitem__, cell_rows[offset:offset + size]))
+        offset += size
+    columns = dict(
+        sections,
+        version=header["version"],
+        ids=sorted_ids[:],
+        free_rows=[],
+        names_unused=0,
+        raw={(field, row): value for field, row, value in header["raw"]},
+        sorted_ids=sorted_ids,
+        sorted_rows=array("I", range(count)),
+        cells=cells,
+    )
+    return columns, header["lsn"]
+
+
+# --- Journal ---
+
+
+def _segment_name(first_lsn: int) -> str:
+    return f"{JOURNAL_PREFIX}{first_lsn:020d}{JOURNAL_SUFFIX}"
+
+
+def _segment_first_lsn(path: str) -> int:
+    return int(os.path.basename(path)[len(JOURNAL_PREFIX):-len(JOURNAL_SUFFIX)])
+
+
+def journal_segments(directory: str) -> List[str]:
+    """Rutas de los segmentos del journal, en orden"""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(JOURNAL_PREFIX) and name.endswith(JOURNAL_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_journal(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Itera los registros ``(lsn, op, payload)`` válidos de un segmento
+    
+    La lectura se detiene en el primer registro incompleto o con CRC
+    inválido: es la cola de una escritura cortada por una caída. El
+    segmento se trunca en ese punto para que los registros nuevos no queden
+    detrás de basura.
+    """
+    with open(path, "r+b") as segment:
+        data = segment.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            crc, length, lsn = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + length
+            body = data[offset + RECORD_HEADER.size:end]
+            if length == 0 or end > len(data) or zlib.crc32(body, zlib.crc32(LSN.pack(lsn))) != crc:
+                break
+            yield lsn, body[0], body[1:]
+            offset = end
+        if offset < len(data):
+            logger.warning("Discarding %s bytes of incomplete journal records in %s", len(data) - offset, path)
+            segment.truncate(offset)
+
+
+class Journal:
+    """
+    Journal append-only de las mutaciones del repositorio, con fsync agrupado
+    
+    ``record_*`` solo arma el registro y lo agrega a una lista en memoria;
+    el thread del journal los escribe juntos y hace un único ``fsync`` por
+    lote. ``flush`` fuerza la escritura inmediata.
+    """
+    
+    def __init__(self, directory: str, last_lsn: int = 0, fsync_interval: float = 0.05):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self._lsn = last_lsn
+        self._pending: List[bytes] = []
+        # _lock protege la lista y el LSN; _io_lock el archivo (se toma primero)
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._file = self._open_segment(last_lsn + 1)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ec2-journal", daemon=True)
+        self._thread.start()
+    
+    @property
+    def lsn(self) -> int:
+        """LSN del último registro agregado"""
+        return self._lsn
+    
+    def _open_segment(self, first_lsn: int):
+        segment = open(os.path.join(self.directory, _segment_name(first_lsn)), "ab", buffering=0)
+        _fsync_directory(self.directory)
+        return segment
+    
+    def append(self, op: int, payload: bytes) -> int:
+        """Agrega un registro y retorna su LSN"""
+        with self._lock:
+            self._lsn += 1
+            body = bytes((op,)) + payload
+            crc = zlib.crc32(body, zlib.crc32(LSN.pack(self._lsn)))
+            self._pending.append(RECORD_HEADER.pack(crc, len(body), self._lsn) + body)
+            return self._lsn
+    
+    def record_state(self, instance_id: str, state: InstanceState):
+        self.append(OP_STATE, bytes((STATES.encode(state),)) + instance_id.encode())
+    
+    def record_put(self, instance: EC2Instance):
+        self.append(OP_PUT, instance.model_dump_json().encode())
+    
+    def record_delete(self, instance_id: str):
+        self.append(OP_DELETE, instance_id.encode())
+    
+    def record_clear(self):
+        self.append(OP_CLEAR, b"")
+    
+    def _write_pending(self):
+        """Escribe los registros pendientes y hace fsync (con ``_io_lock`` tomado)"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            self._file.write(b"".join(batch))
+            os.fsync(self._file.fileno())
+        except OSError:
+            # Se reintentan en la próxima escritura, antes que los nuevos
+            with self._lock:
+                self._pending[:0] = batch
+            raise
+    
+    def flush(self):
+        """Escribe y sincroniza con el disco los registros pendientes"""
+        with self._io_lock:
+            self._write_pending()
+    
+    def rotate(self) -> int:
+        """
+        Cierra el segmento actual y abre uno nuevo a partir del próximo LSN
+        
+        Returns:
+            int: LSN del último registro del segmento cerrado
+        """
+        with self._io_lock:
+            self._write_pending()
+            last_lsn = self._lsn
+            self._file.close()
+            self._file = self._open_segment(last_lsn + 1)
+            return last_lsn
+    
+    def _run(self):
+        while not self._stopped.wait(self.fsync_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error("Journal flush failed: %s", e)
+    
+    def close(self):
+        """Detiene el thread del journal y escribe los registros pendientes"""
+        self._stopped.set()
+        self._thread.join()
+        with self._io_lock:
+            self._write_pending()
+            self._file.close()
+
+
+def apply_record(repository: InstanceRepository, op: int, payload: bytes):
+    """Aplica un registro del journal al repositorio"""
+    if op == OP_STATE:
+        instance_id = payload[1:].decode()
+        if instance_id in repository:
+            # Sin materializar la instancia: la recuperación aplica miles de estos
+            repository._set_state(instance_id, STATES.values[payload[0]])
+    elif op == OP_PUT:
+        instance = EC2Instance.model_validate_json(payload)
+        repository[instance.id] = instance
+    elif op == OP_DELETE:
+        repository.pop(payload.decode(), None)
+    elif op == OP_CLEAR:
+        repository.clear()
+    else:
+        raise ValueError(f"Unknown journal operation: {op}")
+
+
+class InstanceStore:
+    """
+    Repositorio en memoria persistido en un directorio con snapshot y journal
+    
+    ``open`` recupera el repositorio (snapshot más la cola del journal) o, si
+    el directorio está vacío, lo carga con ``seed`` y escribe el primer
+    snapshot. Desde ahí cada mutación se registra en el journal y un thread
+    escribe un snapshot nuevo cada ``snapshot_interval`` segundos si hubo
+    cambios.
+    """
+    
+    def __init__(self, directory: str, fsync_interval: float = 0.05, snapshot_interval: float = 300.0):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self.repository: Optional[InstanceRepository] = None
+        self.journal: Optional[Journal] = None
+        self.snapshot_lsn = 0
+        self._snapshot_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InstanceStore":
+        return cls(
+            settings.ec2_data_dir,
+            fsync_interval=settings.ec2_journal_fsync_interval,
+            snapshot_interval=settings.ec2_snapshot_interval,
+        )
+    
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+    
+    def open(self, seed: Callable[[], Union[InstanceRepository, Iterable[EC2Instance]]]) -> InstanceRepository:
+        """
+        Recupera el repositorio del directorio, o lo crea con ``seed`` si está vacío
+        
+        ``seed`` devuelve las instancias iniciales o un repositorio ya cargado
+        (por ejemplo con ``load_fleet``), que se usa tal cual.
+        
+        Returns:
+            InstanceRepository: El repositorio, con el journal ya conectado
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        segments = journal_segments(self.directory)
+        with gc_paused():
+            if os.path.exists(self.snapshot_path):
+                columns, self.snapshot_lsn = read_snapshot(self.snapshot_path)
+                repository = InstanceRepository.from_columns(columns)
+                logger.info("Loaded snapshot with %s instances (lsn %s)", len(repository), self.snapshot_lsn)
+            else:
+                seeded = seed()
+                repository = seeded if isinstance(seeded, InstanceRepository) else InstanceRepository(seeded)
+                if not segments:
+                    # Directorio nuevo: el primer snapshot evita volver a generar la flota
+                    columns, _ = repository.export_columns()
+                    write_snapshot(self.snapshot_path, columns, 0)
+            
+            last_lsn = self.snapshot_lsn
+            replayed = 0
+            for path in segments:
+                for lsn, op, payload in read_journal(path):
+                    if lsn > last_lsn:
+                        apply_record(repository, op, payload)
+                        last_lsn = lsn
+                        replayed += 1
+        if replayed:
+            logger.info("Replayed %s journal records (lsn %s)", replayed, last_lsn)
+        
+        self.repository = repository
+        self.journal = Journal(self.directory, last_lsn, self.fsync_interval)
+        repository.journal = self.journal
+        self._thread = threading.Thread(target=self._run, name="ec2-snapshots", daemon=True)
+        self._thread.start()
+        return repository
+    
+    def snapshot(self) -> int:
+        """
+        Escribe un snapshot del repositorio y borra los segmentos que cubre
+        
+        Bajo el lock del repositorio solo se copian las columnas y se lee el
+        LSN que cubren. La rotación del journal (escritura, fsync y segmento
+        nuevo) se hace después, con las escrituras ya liberadas: el segmento
+        cerrado puede incluir registros posteriores a la copia, y en ese caso
+        se conserva hasta el próximo snapshot.
+        
+        Returns:
+            int: LSN cubierto por el snapshot
+        """
+        with self._snapshot_lock:
+            columns, lsn = self.repository.export_columns(lambda: self.journal.lsn)
+            self.journal.rotate()
+            write_snapshot(self.snapshot_path, columns, lsn)
+            self.snapshot_lsn = lsn
+            segments = journal_segments(self.directory)
+            # El último segmento es el abierto; los demás se borran si todos sus registros son <= lsn
+            for path, following in zip(segments, segments[1:]):
+                if _segment_first_lsn(following) - 1 <= lsn:
+                    os.remove(path)
+            logger.info("Wrote snapshot with %s instances (lsn %s)", len(columns["sorted_ids"]), lsn)
+            return lsn
+    
+    def _run(self):
+        while not self._stopped.wait(self.snapshot_interval):
+            if self.journal.lsn > self.snapshot_lsn:
+                try:
+                    self.snapshot()
+                except (OSError, ValueError) as e:
+                    logger.error("Snapshot failed: %s", e)
+    
+    def close(self, snapshot: bool = True):
+        """Detiene los threads, escribe un snapshot final si hubo cambios y cierra el journal"""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        if snapshot and self.journal.lsn > self.snapshot_lsn:
+            self.snapshot()
+        self.repository.journal = None
+        self.journal.close()
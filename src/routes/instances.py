@@ -1,103 +1,611 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from src.models import EC2Instance, StopInstanceResponse, ErrorResponse
-from src.services.ec2_service import ec2_service
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Literal, Optional
+import asyncio
+import time
+from src.config import get_settings
+from src.models import (
+    EC2Instance,
+    StopInstanceResponse,
+    StopInstancesRequest,
+    StopInstancesResponse,
+    ErrorResponse,
+    InstanceState,
+    InstanceType,
+    AWSRegion,
+    FanoutSummary,
+    GroupField,
+    InstanceSummary,
+    InstanceWaitResponse,
+    RegionInstances,
+)
+from src.services.admission import BatchTooLarge, Overloaded, RateLimited
+from src.services.ec2_service import IdempotencyKeyReused, ec2_service
+from src.services.async_ec2_service import async_ec2_service
+from src.services.notifications import Subscription, state_change_hub
+from src.utils.export import to_csv
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/instances", tags=["instances"])
 
+# Instancias por página al recorrer la flota en los exports
+EXPORT_PAGE_SIZE = 1000
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara un header If-None-Match contra un ETag (comparación débil)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == opaque_tag
+        for candidate in candidates
+    )
+
+
+def _not_modified(etag: str) -> Response:
+    """Respuesta 304 sin cuerpo"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def _rejection(error: RateLimited) -> HTTPException:
+    """429 si se superó un límite de tasa, 503 si el servicio o el backend están saturados"""
+    return HTTPException(
+        status_code=(
+            status.HTTP_503_SERVICE_UNAVAILABLE if isinstance(error, Overloaded)
+            else status.HTTP_429_TOO_MANY_REQUESTS
+        ),
+        detail=str(error),
+        headers={"Retry-After": error.retry_after_header},
+    )
+
+
+def _batch_too_large(error: BatchTooLarge) -> HTTPException:
+    """413 sin Retry-After: reintentar el mismo lote nunca se admitiría"""
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(error))
+
+
+async def _sse_events(subscription: Subscription, heartbeat: float) -> AsyncIterator[bytes]:
+    """
+    Convierte una suscripción de cambios de estado en eventos Server-Sent Events
+    
+    Los cambios se envían como eventos ``state-change`` con un ID incremental.
+    Si la cola del suscriptor descartó eventos, se avisa con un evento
+    ``dropped`` antes del siguiente lote. Sin actividad, se envía un comentario
+    cada ``heartbeat`` segundos para mantener viva la conexión.
+    """
+    event_id = 0
+    reported_drops = 0
+    yield b": connected\n\n"
+    while True:
+        changes = await subscription.get(timeout=heartbeat)
+        if not changes:
+            yield b": keep-alive\n\n"
+            continue
+        if subscription.dropped > reported_drops:
+            yield f"event: dropped\ndata: {{\"dropped\": {subscription.dropped - reported_drops}}}\n\n".encode()
+            reported_drops = subscription.dropped
+        chunk = []
+        for change in changes:
+            event_id += 1
+            chunk.append(f"id: {event_id}\nevent: state-change\ndata: {change.model_dump_json()}\n\n")
+        yield "".join(chunk).encode()
+
 
 @router.get(
     "/",
     response_model=List[EC2Instance],
     summary="Obtener todas las instancias EC2",
-    description="Retorna una lista de todas las instancias EC2 simuladas con su información completa"
+    description=(
+        "Retorna una página de instancias EC2 simuladas con su información completa. "
+        "Si hay más resultados, el cursor de la página siguiente se envía en el header X-Next-Token"
+    ),
+    responses={
+        304: {"description": "La flota no cambió desde el ETag enviado en If-None-Match"},
+        400: {"description": "Cursor next_token inválido"}
+    }
 )
-async def get_instances():
+async def get_instances(
+    if_none_match: Optional[str] = Header(None),
+    state: Optional[InstanceState] = Query(None, description="Filtrar por estado"),
+    region: Optional[AWSRegion] = Query(None, description="Filtrar por región"),
+    instance_type: Optional[InstanceType] = Query(None, alias="type", description="Filtrar por tipo de instancia"),
+    name_prefix: Optional[str] = Query(None, description="Filtrar por prefijo del nombre"),
+    limit: int = Query(100, ge=1, le=1000, description="Cantidad máxima de instancias por página"),
+    next_token: Optional[str] = Query(None, description="Cursor retornado en X-Next-Token"),
+):
     """
-    Endpoint para obtener todas las instancias EC2.
+    Endpoint para obtener las instancias EC2, filtradas y paginadas.
+    
+    El cuerpo se arma uniendo el JSON pre-serializado de cada instancia y se
+    retorna como Response, sin pasar de nuevo por la validación de
+    ``response_model``.
     
     Returns:
         List[EC2Instance]: Lista de instancias EC2 con id, name, type, state, region
     """
     try:
         logger.info("GET /instances endpoint called")
-        instances = ec2_service.get_all_instances()
-        logger.info(f"Returning {len(instances)} instances")
-        return instances
+        headers = {}
+        
+        # La versión se lee antes de listar: un cambio concurrente solo puede
+        # producir un ETag más viejo que el cuerpo, nunca uno más nuevo
+        version = await async_ec2_service.get_fleet_version()
+        if version is not None:
+            etag = ec2_service.get_etag(version)
+            if _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+            headers["ETag"] = etag
+            headers["Cache-Control"] = "no-cache"
+        
+        instances = await async_ec2_service.get_all_instances(
+            state=state,
+            region=region,
+            instance_type=instance_type,
+            name_prefix=name_prefix,
+            limit=limit,
+            next_token=next_token,
+        )
+        token = ec2_service.get_next_token(instances, limit)
+        if token:
+            headers["X-Next-Token"] = token
+        logger.info("Returning %s instances", len(instances))
+        return Response(
+            content=await async_ec2_service.serialize_instances(instances),
+            media_type="application/json",
+            headers=headers
+        )
+    except ValueError as e:
+        logger.warning("Invalid request in get_instances: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error in get_instances: {str(e)}")
+        logger.error("Error in get_instances: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving instances: {str(e)}"
         )
 
 
+@router.get(
+    "/summary",
+    response_model=InstanceSummary,
+    response_model_exclude_none=True,
+    summary="Resumen de la flota por estado, región y tipo",
+    description=(
+        "Cuenta las instancias agrupadas por cualquier combinación de state, region y type "
+        "(group_by se repite por cada campo), opcionalmente filtradas"
+    ),
+    responses={
+        304: {"description": "La flota no cambió desde el ETag enviado en If-None-Match"}
+    }
+)
+async def summarize_instances(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    group_by: List[GroupField] = Query(["state"], description="Campos por los que agrupar"),
+    state: Optional[InstanceState] = Query(None, description="Filtrar por estado"),
+    region: Optional[AWSRegion] = Query(None, description="Filtrar por región"),
+    instance_type: Optional[InstanceType] = Query(None, alias="type", description="Filtrar por tipo de instancia"),
+):
+    """
+    Endpoint para obtener conteos agregados de la flota.
+    
+    Returns:
+        InstanceSummary: Total y cantidad por grupo
+    """
+    try:
+        logger.info("GET /instances/summary endpoint called")
+        version = await async_ec2_service.get_fleet_version()
+        if version is not None:
+            etag = ec2_service.get_etag(version)
+            if _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = "no-cache"
+        
+        return await async_ec2_service.summarize_instances(
+            group_by=group_by,
+            state=state,
+            region=region,
+            instance_type=instance_type,
+        )
+    except ValueError as e:
+        logger.warning("Invalid request in summarize_instances: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error in summarize_instances: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error summarizing instances: {str(e)}"
+        )
+
+
+@router.get(
+    "/fanout",
+    summary="Listar instancias consultando varias regiones en paralelo",
+    description=(
+        "Consulta las regiones en paralelo y transmite los resultados como NDJSON a medida que "
+        "cada región responde. Cada línea es un objeto con type=region (instancias de una región) "
+        "o type=error (región fallida o con timeout); la última línea es type=summary con las "
+        "regiones completadas, fallidas y lentas"
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "Stream de resultados por región"}
+    }
+)
+async def get_instances_fanout(
+    regions: Optional[List[AWSRegion]] = Query(None, description="Regiones a consultar (por defecto todas)"),
+    state: Optional[InstanceState] = Query(None, description="Filtrar por estado"),
+    instance_type: Optional[InstanceType] = Query(None, alias="type", description="Filtrar por tipo de instancia"),
+    name_prefix: Optional[str] = Query(None, description="Filtrar por prefijo del nombre"),
+    timeout: Optional[float] = Query(None, gt=0, le=60, description="Timeout por región en segundos"),
+):
+    """
+    Endpoint para listar instancias de varias regiones en paralelo.
+    
+    Returns:
+        StreamingResponse: Resultados por región en formato NDJSON
+    """
+    logger.info("GET /instances/fanout endpoint called")
+    settings = get_settings()
+    selected = regions or list(AWSRegion)
+    region_timeout = timeout or settings.ec2_region_timeout
+    
+    async def stream() -> AsyncIterator[bytes]:
+        started = time.perf_counter()
+        completed, failed, slow = [], [], []
+        total_instances = 0
+        results = async_ec2_service.iter_instances_by_region(
+            selected,
+            region_timeout,
+            state=state,
+            instance_type=instance_type,
+            name_prefix=name_prefix,
+        )
+        async for result in results:
+            if isinstance(result, RegionInstances):
+                completed.append(result.region)
+                total_instances += len(result.instances)
+                if result.elapsed_ms > settings.ec2_region_slow_threshold * 1000:
+                    slow.append(result.region)
+            else:
+                failed.append(result.region)
+            yield result.model_dump_json().encode() + b"\n"
+        
+        summary = FanoutSummary(
+            completed=completed,
+            failed=failed,
+            slow=slow,
+            total_instances=total_instances,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+        logger.info("Fan-out listing finished: %s regions ok, %s failed, %s slow", len(completed), len(failed), len(slow))
+        yield summary.model_dump_json().encode() + b"\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/export",
+    summary="Exportar la flota completa",
+    description=(
+        "Transmite todas las instancias que cumplen los filtros como NDJSON (una instancia por línea) "
+        "o CSV, con chunked encoding. La flota se recorre página por página, por lo que el uso de "
+        "memoria es constante sin importar su tamaño"
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+            "description": "Stream con las instancias exportadas"
+        }
+    }
+)
+async def export_instances(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Formato del export"),
+    state: Optional[InstanceState] = Query(None, description="Filtrar por estado"),
+    region: Optional[AWSRegion] = Query(None, description="Filtrar por región"),
+    instance_type: Optional[InstanceType] = Query(None, alias="type", description="Filtrar por tipo de instancia"),
+    name_prefix: Optional[str] = Query(None, description="Filtrar por prefijo del nombre"),
+):
+    """
+    Endpoint para exportar la flota en streaming.
+    
+    Returns:
+        StreamingResponse: Instancias en formato NDJSON o CSV
+    """
+    logger.info("GET /instances/export endpoint called (format=%s)", format)
+    
+    async def stream() -> AsyncIterator[bytes]:
+        exported = 0
+        if format == "csv":
+            yield to_csv([], include_header=True)
+        pages = async_ec2_service.iter_pages(
+            EXPORT_PAGE_SIZE,
+            state=state,
+            region=region,
+            instance_type=instance_type,
+            name_prefix=name_prefix,
+        )
+        async for page in pages:
+            exported += len(page)
+            if format == "csv":
+                yield to_csv(page)
+            else:
+                yield await async_ec2_service.serialize_instances(page, separator=b"\n", prefix=b"", suffix=b"\n")
+        logger.info("Exported %s instances", exported)
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="instances.{format}"'}
+    )
+
+
+@router.get(
+    "/events",
+    summary="Suscribirse a los cambios de estado",
+    description=(
+        "Feed Server-Sent Events con un evento state-change por cada cambio de estado de una "
+        "instancia (stop o transición automática). Se puede filtrar por región y por estado destino. "
+        "Si el cliente no consume a tiempo se descartan los eventos más viejos y se avisa con un "
+        "evento dropped"
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Stream de cambios de estado"}
+    }
+)
+async def stream_instance_events(
+    region: Optional[List[AWSRegion]] = Query(None, description="Solo cambios de estas regiones"),
+    state: Optional[List[InstanceState]] = Query(None, description="Solo cambios hacia estos estados"),
+):
+    """
+    Endpoint para recibir los cambios de estado en tiempo real.
+    
+    Returns:
+        StreamingResponse: Eventos en formato text/event-stream
+    """
+    logger.info("GET /instances/events endpoint called")
+    settings = get_settings()
+    
+    async def stream() -> AsyncIterator[bytes]:
+        with state_change_hub.subscribe(region, state, settings.ec2_events_queue_size) as subscription:
+            async for event in _sse_events(subscription, settings.ec2_events_heartbeat):
+                yield event
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post(
+    "/stop",
+    response_model=StopInstancesResponse,
+    summary="Detener varias instancias EC2",
+    description=(
+        "Simula detener un lote de instancias EC2 en una sola operación. "
+        "Retorna un resultado por instancia; los fallos individuales no afectan al resto del lote. "
+        "Con el header Idempotency-Key los reintentos del mismo lote retornan el resultado original"
+    ),
+    responses={
+        200: {"description": "Lote procesado (puede incluir fallos parciales)"},
+        413: {"description": "El lote detiene en una región más instancias que su ráfaga; hay que dividirlo"},
+        422: {"description": "Request inválido o Idempotency-Key usado con otro lote"},
+        429: {"description": "Límite de detenciones del cliente o de alguna región superado (ver Retry-After)"},
+        500: {"description": "Error interno del servidor"},
+        503: {"description": "Demasiadas mutaciones en curso o throttling del backend (ver Retry-After)"}
+    }
+)
+async def stop_instances(
+    request: StopInstancesRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
+    """
+    Endpoint para detener varias instancias EC2.
+    
+    Args:
+        request (StopInstancesRequest): IDs de las instancias a detener
+        idempotency_key (Optional[str]): Clave para deduplicar reintentos
+    
+    Returns:
+        StopInstancesResponse: Resultado por instancia y totales del lote
+    """
+    try:
+        logger.info("POST /instances/stop endpoint called with %s ids", len(request.instance_ids))
+        results = await async_ec2_service.stop_instances(request.instance_ids, idempotency_key)
+        stopped = sum(1 for result in results if result.success)
+        return StopInstancesResponse(
+            results=results,
+            stopped=stopped,
+            failed=len(results) - stopped
+        )
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except BatchTooLarge as e:
+        logger.warning("Batch stop rejected: %s", e)
+        raise _batch_too_large(e)
+    except RateLimited as e:
+        logger.warning("Batch stop rejected: %s", e)
+        raise _rejection(e)
+    except Exception as e:
+        logger.error("Error in stop_instances: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error stopping instances: {str(e)}"
+        )
+
+
 @router.post(
     "/{instance_id}/stop",
     response_model=StopInstanceResponse,
     summary="Detener una instancia EC2",
-    description="Simula detener una instancia EC2 específica y retorna el resultado de la operación",
+    description=(
+        "Simula detener una instancia EC2 específica y retorna el resultado de la operación. "
+        "Con el header Idempotency-Key los reintentos retornan la respuesta original sin volver a aplicarse"
+    ),
     responses={
         200: {"description": "Instancia detenida exitosamente"},
         404: {"description": "Instancia no encontrada"},
         400: {"description": "No se puede detener la instancia (estado inválido)"},
-        500: {"description": "Error interno del servidor"}
+        422: {"description": "Idempotency-Key usado con otra instancia"},
+        429: {"description": "Límite de detenciones del cliente o de la región superado (ver Retry-After)"},
+        500: {"description": "Error interno del servidor"},
+        503: {"description": "Demasiadas mutaciones en curso o throttling del backend (ver Retry-After)"}
     }
 )
-async def stop_instance(instance_id: str):
+async def stop_instance(instance_id: str, idempotency_key: Optional[str] = Header(None, max_length=255)):
     """
     Endpoint para detener una instancia EC2.
     
     Args:
         instance_id (str): ID de la instancia a detener
+        idempotency_key (Optional[str]): Clave para deduplicar reintentos
     
     Returns:
         StopInstanceResponse: Resultado de la operación con mensaje de éxito/fallo
     """
     try:
-        logger.info(f"POST /instances/{instance_id}/stop endpoint called")
+        logger.info("POST /instances/%s/stop endpoint called", instance_id)
         
         # Verificar que la instancia existe
-        instance = ec2_service.get_instance_by_id(instance_id)
+        instance = await async_ec2_service.get_instance_by_id(instance_id)
         if not instance:
-            logger.warning(f"Instance {instance_id} not found")
+            logger.warning("Instance %s not found", instance_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Instance {instance_id} not found"
             )
         
         # Intentar detener la instancia
-        result = ec2_service.stop_instance(instance_id)
+        result = await async_ec2_service.stop_instance(instance_id, idempotency_key)
         
         if result.success:
-            logger.info(f"Instance {instance_id} stop operation successful")
+            logger.info("Instance %s stop operation successful", instance_id)
             return result
         else:
-            logger.warning(f"Instance {instance_id} stop operation failed: {result.message}")
+            logger.warning("Instance %s stop operation failed: %s", instance_id, result.message)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=result.message
             )
-            
+    
     except HTTPException:
         raise
+    except IdempotencyKeyReused as e:
+        logger.warning("Idempotency key conflict in stop_instance: %s", e)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except BatchTooLarge as e:
+        logger.warning("Stop of instance %s rejected: %s", instance_id, e)
+        raise _batch_too_large(e)
+    except RateLimited as e:
+        logger.warning("Stop of instance %s rejected: %s", instance_id, e)
+        raise _rejection(e)
     except ValueError as e:
-        logger.error(f"ValueError in stop_instance: {str(e)}")
+        logger.error("ValueError in stop_instance: %s", e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
     except Exception as e:
-        logger.error(f"Error in stop_instance: {str(e)}")
+        logger.error("Error in stop_instance: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error stopping instance: {str(e)}"
         )
 
 
+@router.get(
+    "/{instance_id}/wait",
+    response_model=InstanceWaitResponse,
+    summary="Esperar a que una instancia alcance un estado",
+    description=(
+        "Mantiene el request abierto hasta que la instancia alcanza el estado indicado o vence el "
+        "timeout (long-poll). Reemplaza el polling de GET /instances/{id} desde el cliente"
+    ),
+    responses={
+        200: {"description": "Estado alcanzado (reached=true) o timeout vencido (reached=false)"},
+        404: {"description": "Instancia no encontrada"}
+    }
+)
+async def wait_for_instance_state(
+    instance_id: str,
+    state: InstanceState = Query(..., description="Estado esperado"),
+    timeout: float = Query(30, gt=0, le=60, description="Tiempo máximo de espera en segundos"),
+):
+    """
+    Endpoint de long-poll sobre el estado de una instancia.
+    
+    Args:
+        instance_id (str): ID de la instancia
+        state (InstanceState): Estado esperado
+        timeout (float): Tiempo máximo de espera en segundos
+    
+    Returns:
+        InstanceWaitResponse: Si se alcanzó el estado y la instancia actualizada
+    """
+    try:
+        logger.info("GET /instances/%s/wait endpoint called (state=%s, timeout=%s)", instance_id, state.value, timeout)
+        started = time.perf_counter()
+        deadline = started + timeout
+        # Con backends que cambian por fuera del servicio (u otros workers) no hay notificaciones: se relee periódicamente
+        backend = ec2_service.backend
+        poll_interval = None if backend.simulated and not backend.shared else get_settings().ec2_wait_poll_interval
+        
+        with state_change_hub.watch(instance_id, state) as reached:
+            instance = await async_ec2_service.get_instance_by_id(instance_id)
+            if not instance:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Instance {instance_id} not found"
+                )
+            
+            # Una instancia terminada ya no cambia de estado
+            reached_state = instance.state == state
+            while not reached_state and instance.state != InstanceState.TERMINATED:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(asyncio.shield(reached), min(remaining, poll_interval or remaining))
+                    reached_state = True
+                except asyncio.TimeoutError:
+                    pass
+                instance = await async_ec2_service.get_instance_by_id(instance_id) or instance
+                reached_state = reached_state or instance.state == state
+        
+        result = InstanceWaitResponse(
+            reached=reached_state,
+            target_state=state,
+            instance=instance,
+            waited_ms=(time.perf_counter() - started) * 1000
+        )
+        logger.info("Wait on instance %s finished (reached=%s)", instance_id, result.reached)
+        return result
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error in wait_for_instance_state: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error waiting for instance: {str(e)}"
+        )
+
+
 @router.get(
     "/{instance_id}",
     response_model=EC2Instance,
@@ -105,10 +613,11 @@ async def stop_instance(instance_id: str):
     description="Retorna la información de una instancia EC2 específica",
     responses={
         200: {"description": "Instancia encontrada"},
+        304: {"description": "La instancia no cambió desde el ETag enviado en If-None-Match"},
         404: {"description": "Instancia no encontrada"}
     }
 )
-async def get_instance(instance_id: str):
+async def get_instance(instance_id: str, response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Endpoint para obtener una instancia específica por ID.
     
@@ -119,23 +628,31 @@ async def get_instance(instance_id: str):
         EC2Instance: Información de la instancia
     """
     try:
-        logger.info(f"GET /instances/{instance_id} endpoint called")
+        logger.info("GET /instances/%s endpoint called", instance_id)
+        
+        version = await async_ec2_service.get_instance_version(instance_id)
+        if version is not None:
+            etag = ec2_service.get_etag(version)
+            if _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = "no-cache"
         
-        instance = ec2_service.get_instance_by_id(instance_id)
+        instance = await async_ec2_service.get_instance_by_id(instance_id)
         if not instance:
-            logger.warning(f"Instance {instance_id} not found")
+            logger.warning("Instance %s not found", instance_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Instance {instance_id} not found"
             )
         
-        logger.info(f"Returning instance {instance_id}")
+        logger.info("Returning instance %s", instance_id)
         return instance
-        
+    
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in get_instance: {str(e)}")
+        logger.error("Error in get_instance: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving instance: {str(e)}"
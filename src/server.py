@@ -0,0 +1,112 @@
+"""
+Arranque del servidor uvicorn con un perfil de desarrollo o de producción
+
+- ``dev``: un proceso con reload (observa los archivos y reinicia al cambiar)
+- ``prod``: sin reload, un worker por núcleo, uvloop y httptools si están
+  instalados, keep-alive y backlog ajustados, apagado ordenado y sin access
+  log (las métricas de ``/metrics`` ya cuentan cada request)
+
+Uso:
+    python -m src.server --mode prod
+    EC2_SERVER_MODE=prod EC2_SERVER_WORKERS=4 python -m src.server
+"""
+
+import argparse
+import dataclasses
+import importlib.util
+import logging
+import os
+from typing import Any, Dict, Optional, Sequence
+
+from src.config import Settings, get_settings
+from src.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+APP = "src.app:app"
+
+MODES = ("dev", "prod")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_count(configured: int) -> int:
+    """Workers a lanzar: los configurados, o uno por núcleo disponible si es 0"""
+    if configured > 0:
+        return configured
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def server_options(settings: Settings) -> Dict[str, Any]:
+    """
+    Argumentos de ``uvicorn.run`` para el perfil ``settings.ec2_server_mode``
+    
+    Raises:
+        ValueError: Si el perfil no existe
+    """
+    if settings.ec2_server_mode not in MODES:
+        raise ValueError(f"Unknown server mode: {settings.ec2_server_mode}")
+    
+    options: Dict[str, Any] = {
+        "host": settings.ec2_server_host,
+        "port": settings.ec2_server_port,
+    }
+    if settings.ec2_server_mode == "dev":
+        options.update(reload=True, log_level="info")
+        return options
+    
+    options.update(
+        workers=worker_count(settings.ec2_server_workers),
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        timeout_keep_alive=settings.ec2_server_keep_alive,
+        backlog=settings.ec2_server_backlog,
+        timeout_graceful_shutdown=settings.ec2_server_graceful_timeout,
+        access_log=False,
+        # Los logs de uvicorn pasan por la configuración de la app (cola, JSON)
+        log_config=None,
+        log_level=settings.ec2_log_level.lower(),
+    )
+    return options
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=MODES, default=None, help="Perfil del servidor (EC2_SERVER_MODE)")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="0 = uno por núcleo (solo prod)")
+    args = parser.parse_args(argv)
+    
+    overrides = {
+        "ec2_server_mode": args.mode,
+        "ec2_server_host": args.host,
+        "ec2_server_port": args.port,
+        "ec2_server_workers": args.workers,
+    }
+    settings = dataclasses.replace(
+        get_settings(), **{name: value for name, value in overrides.items() if value is not None}
+    )
+    options = server_options(settings)
+    
+    configure_logging(settings)
+    if options.get("workers", 1) > 1 and settings.ec2_backend == "memory":
+        logger.warning(
+            "Running %s workers with the memory backend: each worker keeps its own fleet "
+            "(use EC2_BACKEND=sqlite to share it)",
+            options["workers"],
+        )
+    logger.info("Starting EC2 Manager API (%s): %s", settings.ec2_server_mode, options)
+    
+    import uvicorn
+    uvicorn.run(APP, **options)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,340 @@
+"""
+Control de admisión de las mutaciones: token buckets y tope de concurrencia
+
+- Un token bucket por cliente limita las mutaciones por segundo de cada uno.
+- Un token bucket por región limita las instancias detenidas por segundo en
+  esa región, como los límites de la API de EC2 que responden
+  ``RequestLimitExceeded``. En modo adaptativo la tasa de una región se
+  reduce a la mitad cuando el backend responde con throttling y se recupera
+  de a poco con cada llamada exitosa (AIMD).
+- Un tope global de mutaciones en curso rechaza de inmediato el exceso, en
+  vez de encolarlo.
+
+Los buckets se recargan al consultarlos, según el tiempo transcurrido: cada
+decisión es O(1), sin timers ni threads. Cada rechazo indica cuántos
+segundos esperar (``Retry-After``).
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Mapping, Optional
+
+from src.config import Settings
+from src.services.metrics import admission_rejections
+
+# Códigos de error de AWS que indican throttling
+THROTTLING_CODES = frozenset({
+    "RequestLimitExceeded",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+})
+
+# Modo adaptativo: factor aplicado a la tasa ante un throttling, factor mínimo y
+# recuperación por llamada exitosa
+BACKOFF_FACTOR = 0.5
+MIN_RATE_FACTOR = 0.05
+RECOVERY_STEP = 0.02
+# Un lote con varias llamadas throttled reduce la tasa una sola vez por período
+BACKOFF_COOLDOWN = 1.0
+
+# Espera sugerida cuando se alcanza el tope de mutaciones en curso
+BUSY_RETRY_AFTER = 1.0
+
+
+class RateLimited(Exception):
+    """La operación supera un límite de tasa; ``retry_after`` son los segundos a esperar"""
+    
+    def __init__(self, message: str, retry_after: float, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+    
+    @property
+    def retry_after_header(self) -> str:
+        """Valor del header ``Retry-After``: segundos enteros, al menos 1"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class Overloaded(RateLimited):
+    """El servicio o el backend están saturados (tope de concurrencia o throttling)"""
+
+
+class BatchTooLarge(Exception):
+    """
+    El lote detiene en una región más instancias que su ráfaga
+    
+    No es un límite de tasa: ni esperando se admitiría, por lo que no lleva
+    ``retry_after``. Hay que dividir el lote.
+    """
+    
+    def __init__(self, message: str, region: str, limit: float):
+        super().__init__(message)
+        self.region = region
+        self.limit = limit
+
+
+def is_throttling(error: BaseException) -> bool:
+    """Indica si el error, o alguno de los que lo causaron, es un throttling de AWS"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        if isinstance(response, dict) and response.get("Error", {}).get("Code") in THROTTLING_CODES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class TokenBucket:
+    """Tokens disponibles y momento de la última recarga; la tasa la aplica ``RateLimiter``"""
+    
+    __slots__ = ("tokens", "updated")
+    
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+    
+    def refill(self, rate: float, burst: float, now: float):
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    Token buckets por clave (cliente o región) con desalojo LRU
+    
+    Cada bucket admite ráfagas de hasta ``burst`` operaciones y se recarga a
+    ``rate`` por segundo. Al superar ``maxsize`` claves se desaloja la menos
+    usada: un cliente olvidado vuelve con el bucket lleno. Con ``rate`` 0 no
+    hay límite. Es thread-safe.
+    """
+    
+    def __init__(self, rate: float, burst: int, maxsize: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        # Factor de la tasa por clave (modo adaptativo); las claves sin entrada usan 1
+        self._factors: Dict[Hashable, float] = {}
+        self._backoffs: Dict[Hashable, float] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+    
+    def __len__(self) -> int:
+        return len(self._buckets)
+    
+    def rate_for(self, key: Hashable) -> float:
+        """Tasa vigente de una clave, con el factor adaptativo aplicado"""
+        return self.rate * self._factors.get(key, 1.0)
+    
+    def _bucket(self, key: Hashable, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+    
+    def acquire(self, costs: Mapping[Hashable, float]) -> Optional[Hashable]:
+        """
+        Consume tokens de varias claves a la vez, todo o nada
+        
+        Un costo mayor a ``burst`` nunca se admite (ver ``exceeds_burst``).
+        
+        Returns:
+            Optional[Hashable]: None si se admitió; si no, la clave que más
+            espera (ver ``retry_after``)
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            now = self._clock()
+            waits = []
+            for key, cost in costs.items():
+                bucket = self._bucket(key, now)
+                rate = self.rate_for(key)
+                bucket.refill(rate, self.burst, now)
+                if bucket.tokens < cost:
+                    waits.append(((cost - bucket.tokens) / rate, key))
+            if waits:
+                return max(waits, key=lambda wait: wait[0])[1]
+            for key, cost in costs.items():
+                self._buckets[key].tokens -= cost
+            return None
+    
+    def exceeds_burst(self, cost: float) -> bool:
+        """Indica si ``cost`` supera la ráfaga: ni con el bucket lleno se admitiría"""
+        return self.enabled and cost > self.burst
+    
+    def retry_after(self, key: Hashable, cost: float = 1.0) -> float:
+        """Segundos hasta que el bucket de ``key`` tenga ``cost`` tokens"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0.0
+            rate = self.rate_for(key)
+            bucket.refill(rate, self.burst, self._clock())
+            return max(0.0, (min(cost, self.burst) - bucket.tokens) / rate)
+    
+    def backoff(self, key: Hashable):
+        """Reduce la tasa de ``key`` (a lo sumo una vez por ``BACKOFF_COOLDOWN``)"""
+        with self._lock:
+            now = self._clock()
+            if now - self._backoffs.get(key, -math.inf) < BACKOFF_COOLDOWN:
+                return
+            self._backoffs[key] = now
+            self._factors[key] = max(MIN_RATE_FACTOR, self._factors.get(key, 1.0) * BACKOFF_FACTOR)
+            # Los tokens acumulados a la tasa anterior ya no valen
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.tokens = min(bucket.tokens, 0.0)
+    
+    def recover(self, key: Hashable):
+        """Recupera parte de la tasa de ``key`` tras una llamada exitosa"""
+        if key not in self._factors:
+            return
+        with self._lock:
+            factor = self._factors.get(key, 1.0) + RECOVERY_STEP
+            if factor >= 1.0:
+                self._factors.pop(key, None)
+            else:
+                self._factors[key] = factor
+
+
+class AdmissionControl:
+    """
+    Límites de admisión de las mutaciones
+    
+    El middleware aplica el tope de mutaciones en curso y el límite por
+    cliente antes de leer el request. ``EC2Service`` aplica el límite por
+    región justo antes de llamar al backend, cuando ya conoce la región de
+    cada instancia, y le informa el resultado para el modo adaptativo.
+    """
+    
+    def __init__(
+        self,
+        clients: RateLimiter,
+        regions: RateLimiter,
+        max_in_flight: int = 0,
+        adaptive: bool = False,
+        client_header: str = "",
+    ):
+        self.clients = clients
+        self.regions = regions
+        self.max_in_flight = max_in_flight
+        self.adaptive = adaptive
+        self.client_header = client_header.lower()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionControl":
+        """
+        Raises:
+            ValueError: Si se pidió el modo adaptativo sin límite por región
+        """
+        if settings.ec2_rate_limit_adaptive and settings.ec2_rate_limit_region_rate <= 0:
+            # El modo adaptativo ajusta la tasa por región: sin ella no tendría efecto
+            raise ValueError("EC2_RATE_LIMIT_ADAPTIVE requires EC2_RATE_LIMIT_REGION_RATE > 0")
+        return cls(
+            clients=RateLimiter(
+                settings.ec2_rate_limit_client_rate,
+                settings.ec2_rate_limit_client_burst,
+                maxsize=settings.ec2_rate_limit_clients,
+            ),
+            regions=RateLimiter(settings.ec2_rate_limit_region_rate, settings.ec2_rate_limit_region_burst),
+            max_in_flight=settings.ec2_max_in_flight_mutations,
+            adaptive=settings.ec2_rate_limit_adaptive,
+            client_header=settings.ec2_rate_limit_client_header,
+        )
+    
+    def enter(self):
+        """
+        Reserva un lugar entre las mutaciones en curso (liberarlo con ``leave``)
+        
+        Raises:
+            Overloaded: Si ya hay ``max_in_flight`` mutaciones en curso
+        """
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                admission_rejections.inc(("busy",))
+                raise Overloaded(
+                    f"Too many mutations in progress (limit {self.max_in_flight})", BUSY_RETRY_AFTER, "busy"
+                )
+            self.in_flight += 1
+    
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+    
+    def admit_client(self, client: str):
+        """
+        Consume un token del bucket del cliente
+        
+        Raises:
+            RateLimited: Si el cliente superó su tasa
+        """
+        if self.clients.acquire({client: 1}) is not None:
+            admission_rejections.inc(("client",))
+            raise RateLimited(f"Rate limit exceeded for client {client}", self.clients.retry_after(client), "client")
+    
+    def admit_regions(self, counts: Mapping[str, int]):
+        """
+        Consume un token por instancia del bucket de cada región, todo o nada
+        
+        Un lote con más instancias en una región que la ráfaga de la región
+        no se admitiría nunca: se rechaza sin consumir tokens.
+        
+        Raises:
+            BatchTooLarge: Si el lote supera la ráfaga de alguna región
+            RateLimited: Si alguna región superó su tasa
+        """
+        for region, count in counts.items():
+            if self.regions.exceeds_burst(count):
+                admission_rejections.inc(("batch",))
+                raise BatchTooLarge(
+                    f"Batch stops {count} instances in region {region}, more than the limit of "
+                    f"{self.regions.burst} per request; split the batch",
+                    region,
+                    self.regions.burst,
+                )
+        region = self.regions.acquire(counts)
+        if region is not None:
+            admission_rejections.inc(("region",))
+            raise RateLimited(
+                f"Rate limit exceeded for region {region}",
+                self.regions.retry_after(region, counts[region]),
+                "region",
+            )
+    
+    def backend_succeeded(self, regions: Mapping[str, int]):
+        if self.adaptive:
+            for region in regions:
+                self.regions.recover(region)
+    
+    def backend_failed(self, regions: Mapping[str, int], error: BaseException):
+        """
+        Registra un error del backend; si es un throttling lo convierte en ``Overloaded``
+        
+        Raises:
+            Overloaded: Si el backend respondió con throttling
+        """
+        if not is_throttling(error):
+            return
+        if self.adaptive:
+            for region in regions:
+                self.regions.backoff(region)
+        admission_rejections.inc(("backend",))
+        retry_after = max(
+            [self.regions.retry_after(region, count) for region, count in regions.items()] + [BACKOFF_COOLDOWN]
+        )
+        raise Overloaded(f"EC2 API is throttling requests: {error}", retry_after, "backend") from error
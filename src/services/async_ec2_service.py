@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, List, Optional, TypeVar, Union
+
+from src.config import get_settings
+from src.models import (
+    AWSRegion,
+    EC2Instance,
+    InstanceState,
+    InstanceSummary,
+    RegionFailure,
+    RegionInstances,
+    StopInstanceResponse,
+    StopInstanceResult,
+)
+from src.services.ec2_service import EC2Service, ec2_service
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncEC2Service:
+    """
+    Fachada asíncrona de EC2Service
+    
+    Las operaciones sobre backends bloqueantes (boto3) se ejecutan en un
+    thread pool acotado, de modo que el event loop sigue atendiendo otros
+    requests mientras esperan I/O. El tamaño del pool es el límite de
+    llamadas concurrentes al backend; el resto espera en la cola del pool
+    sin bloquear el loop. Los backends no bloqueantes se invocan directamente.
+    """
+    
+    def __init__(self, service: EC2Service, max_concurrency: int = 32):
+        self.service = service
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool del servicio, creado en el primer uso"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="ec2-backend",
+            )
+        return self._executor
+    
+    async def _call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        if not self.service.backend.blocking:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        # Se propaga el contexto (contextvars) del request al thread del pool
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(context.run, func, *args, **kwargs),
+        )
+    
+    async def get_all_instances(self, **filters) -> List[EC2Instance]:
+        """Versión asíncrona de ``EC2Service.get_all_instances``"""
+        return await self._call(self.service.get_all_instances, **filters)
+    
+    async def summarize_instances(self, **options) -> InstanceSummary:
+        """Versión asíncrona de ``EC2Service.summarize_instances``"""
+        return await self._call(self.service.summarize_instances, **options)
+    
+    async def iter_pages(self, page_size: int, **filters) -> AsyncIterator[List[EC2Instance]]:
+        """
+        Recorre todas las instancias que cumplen los filtros, página por página
+        
+        Cada página se pide al servicio con el cursor de la anterior, por lo
+        que en memoria hay como máximo una página a la vez sin importar el
+        tamaño de la flota.
+        
+        Args:
+            page_size (int): Instancias por página
+            **filters: Filtros de ``get_all_instances``
+        
+        Yields:
+            List[EC2Instance]: Páginas no vacías de instancias
+        """
+        next_token = None
+        while True:
+            page = await self.get_all_instances(limit=page_size, next_token=next_token, **filters)
+            if page:
+                yield page
+            next_token = self.service.get_next_token(page, page_size)
+            if next_token is None:
+                return
+    
+    async def iter_instances_by_region(
+        self,
+        regions: Iterable[AWSRegion],
+        timeout: float,
+        **filters,
+    ) -> AsyncIterator[Union[RegionInstances, RegionFailure]]:
+        """
+        Lista varias regiones en paralelo y produce cada una apenas termina
+        
+        Cada región se consulta con ``get_all_instances(region=...)`` en su
+        propia tarea, con un timeout individual. Los resultados se entregan en
+        orden de llegada, por lo que una región lenta no retrasa a las demás.
+        Una región que falla o vence su timeout se reporta como RegionFailure
+        sin interrumpir el resto.
+        
+        Args:
+            regions (Iterable[AWSRegion]): Regiones a consultar
+            timeout (float): Timeout por región, en segundos
+            **filters: Filtros adicionales de ``get_all_instances``
+        
+        Yields:
+            Union[RegionInstances, RegionFailure]: Resultado de cada región
+        """
+        async def fetch(region: AWSRegion) -> Union[RegionInstances, RegionFailure]:
+            started = time.perf_counter()
+            try:
+                instances = await asyncio.wait_for(
+                    self._call(self.service.get_all_instances, region=region, **filters),
+                    timeout,
+                )
+                return RegionInstances(
+                    region=region,
+                    instances=instances,
+                    elapsed_ms=(time.perf_counter() - started) * 1000,
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Listing region %s timed out after %ss", region, timeout)
+                error = f"Timed out after {timeout}s"
+            except Exception as e:
+                logger.warning("Listing region %s failed: %s", region, e)
+                error = str(e)
+            return RegionFailure(
+                region=region,
+                error=error,
+                elapsed_ms=(time.perf_counter() - started) * 1000,
+            )
+        
+        tasks = [asyncio.ensure_future(fetch(region)) for region in dict.fromkeys(regions)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # Si el cliente se desconecta se cancelan las regiones pendientes
+            for task in tasks:
+                task.cancel()
+    
+    async def serialize_instances(self, instances: List[EC2Instance], **options) -> bytes:
+        """Versión asíncrona de ``EC2Service.serialize_instances``"""
+        return await self._call(self.service.serialize_instances, instances, **options)
+    
+    async def get_fleet_version(self) -> Optional[int]:
+        """Versión asíncrona de ``EC2Service.get_fleet_version``"""
+        return await self._call(self.service.get_fleet_version)
+    
+    async def get_instance_version(self, instance_id: str) -> Optional[int]:
+        """Versión asíncrona de ``EC2Service.get_instance_version``"""
+        return await self._call(self.service.get_instance_version, instance_id)
+    
+    async def get_instance_by_id(self, instance_id: str) -> Optional[EC2Instance]:
+        """Versión asíncrona de ``EC2Service.get_instance_by_id``"""
+        return await self._call(self.service.get_instance_by_id, instance_id)
+    
+    async def stop_instance(self, instance_id: str, idempotency_key: Optional[str] = None) -> StopInstanceResponse:
+        """Versión asíncrona de ``EC2Service.stop_instance``"""
+        return await self._call(self.service.stop_instance, instance_id, idempotency_key)
+    
+    async def stop_instances(self, instance_ids: List[str], idempotency_key: Optional[str] = None) -> List[StopInstanceResult]:
+        """Versión asíncrona de ``EC2Service.stop_instances``"""
+        return await self._call(self.service.stop_instances, instance_ids, idempotency_key)
+    
+    async def simulate_state_transition(
+        self,
+        instance_id: str,
+        from_state: Optional[InstanceState] = None,
+    ) -> Optional[InstanceState]:
+        """Versión asíncrona de ``EC2Service.simulate_state_transition``"""
+        return await self._call(self.service.simulate_state_transition, instance_id, from_state)
+    
+    def shutdown(self):
+        """Libera el thread pool (al apagar la aplicación)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            logger.info("EC2 backend executor shut down")
+
+
+# Instancia global del servicio asíncrono
+async_ec2_service = AsyncEC2Service(ec2_service, max_concurrency=get_settings().ec2_max_concurrency)
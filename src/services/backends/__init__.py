@@ -0,0 +1,83 @@
+"""
+Backends de acceso a instancias EC2
+
+``Boto3Backend`` se importa recién cuando se usa: boto3 (y moto, en modo
+``moto``) agregan cientos de milisegundos al arranque de cada worker que
+usa los backends ``memory`` o ``sqlite``.
+"""
+
+from typing import TYPE_CHECKING
+
+from src.config import Settings
+from .base import EC2Backend
+from .memory import InMemoryBackend
+from .sqlite import SQLiteBackend
+
+if TYPE_CHECKING:
+    from .boto import Boto3Backend
+
+
+def __getattr__(name: str):
+    if name == "Boto3Backend":
+        from .boto import Boto3Backend
+        return Boto3Backend
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_backend(settings: Settings) -> EC2Backend:
+    """
+    Construye el backend configurado en ``settings.ec2_backend``
+    
+    - ``memory``: repositorio en memoria con los datos mock; con ``EC2_DATA_DIR``
+      se persiste en ese directorio y se recupera al reiniciar
+    - ``sqlite``: base SQLite compartida entre workers, inicializada con los datos mock si está vacía
+    - ``boto3``: API de EC2 real, o un moto server si se define ``EC2_ENDPOINT_URL``
+    - ``moto``: API de EC2 simulada por moto dentro del proceso, sin red
+    
+    Raises:
+        ValueError: Si el backend configurado no existe, o es ``moto`` y moto no está instalado
+    """
+    if settings.ec2_backend == "memory":
+        if settings.ec2_data_dir:
+            from src.repositories.persistence import InstanceStore
+            from src.utils.mock_data import load_mock_fleet
+            store = InstanceStore.from_settings(settings)
+            # La flota solo se genera si el directorio no tiene datos
+            repository = store.open(lambda: load_mock_fleet(settings))
+            return InMemoryBackend(repository, store=store)
+        from src.utils.mock_data import MOCK_INSTANCES_DB
+        return InMemoryBackend(MOCK_INSTANCES_DB)
+    
+    if settings.ec2_backend == "sqlite":
+        from src.utils.mock_data import iter_mock_fleet
+        backend = SQLiteBackend.from_settings(settings)
+        # La flota solo se genera si la base está vacía
+        backend.seed(iter_mock_fleet(settings))
+        return backend
+    
+    if settings.ec2_backend == "boto3":
+        from .boto import Boto3Backend
+        return Boto3Backend.from_settings(settings)
+    
+    if settings.ec2_backend == "moto":
+        try:
+            from moto import mock_ec2
+        except ImportError as e:
+            raise ValueError("EC2_BACKEND=moto requires moto (pip install moto)") from e
+        from .boto import Boto3Backend
+        mock = mock_ec2()
+        mock.start()
+        backend = Boto3Backend.from_settings(settings)
+        backend.mock = mock
+        return backend
+    
+    raise ValueError(f"Unknown EC2 backend: {settings.ec2_backend}")
+
+
+__all__ = [
+    "EC2Backend",
+    "InMemoryBackend",
+    "SQLiteBackend",
+    "Boto3Backend",
+    "create_backend",
+]
@@ -0,0 +1,186 @@
+import secrets
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+
+# Identifica este arranque del proceso: las versiones en memoria vuelven a empezar en cada uno
+BOOT_EPOCH = secrets.token_hex(4)
+
+class EC2Backend(ABC):
+    """
+    Interfaz de acceso a las instancias EC2
+    
+    ``EC2Service`` aplica las reglas de negocio (validaciones, paginación,
+    mensajes) y delega en el backend únicamente la lectura y las mutaciones.
+    
+    ``blocking`` indica si las operaciones hacen I/O; en ese caso la capa
+    asíncrona las ejecuta fuera del event loop. ``simulated`` indica que los
+    estados intermedios no avanzan solos y deben simularse con ``set_state``.
+    ``shared`` indica que otros procesos modifican el mismo almacenamiento,
+    por lo que no alcanza con las notificaciones ni los caches locales.
+    """
+    
+    blocking: bool = True
+    simulated: bool = False
+    shared: bool = False
+    
+    @abstractmethod
+    def iter_instances(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[EC2Instance]:
+        """
+        Itera las instancias que cumplen los filtros en un orden estable
+        
+        Args:
+            state (Optional[InstanceState]): Filtra por estado
+            region (Optional[AWSRegion]): Filtra por región
+            instance_type (Optional[InstanceType]): Filtra por tipo
+            name_prefix (Optional[str]): Filtra por prefijo del nombre
+            after (Optional[str]): Reanuda la iteración después de esta
+                posición (un cursor de ``iter_with_cursors``)
+        
+        Returns:
+            Iterator[EC2Instance]: Instancias, producidas a medida que se leen
+        
+        Raises:
+            ValueError: Si ``after`` no es un cursor válido para el backend
+        """
+    
+    def iter_with_cursors(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[Tuple[EC2Instance, str, Optional[int]]]:
+        """
+        Como ``iter_instances``, junto con el cursor para reanudar después de
+        cada instancia y la versión de la instancia leída
+        
+        Por defecto el cursor es el ID: sirve a los backends que recorren la
+        flota ordenada por ID. Los backends con otro orden lo reemplazan por
+        la posición que necesitan para reanudar sin volver a leer lo anterior.
+        
+        La versión debe leerse junto con la instancia (en la misma consulta o
+        bajo el mismo lock): leída después, un cambio concurrente la
+        asociaría a datos viejos. Por defecto es None, que no se cachea.
+        """
+        instances = self.iter_instances(
+            state=state,
+            region=region,
+            instance_type=instance_type,
+            name_prefix=name_prefix,
+            after=after,
+        )
+        for instance in instances:
+            yield instance, instance.id, None
+    
+    @abstractmethod
+    def get_instance(self, instance_id: str) -> Optional[EC2Instance]:
+        """Retorna una instancia por ID, o None si no existe"""
+    
+    @abstractmethod
+    def get_instances(self, instance_ids: Iterable[str]) -> Dict[str, EC2Instance]:
+        """Retorna las instancias existentes entre ``instance_ids``, indexadas por ID"""
+    
+    @abstractmethod
+    def stop_instances(self, transitions: List[Tuple[EC2Instance, InstanceState]]) -> Dict[str, InstanceState]:
+        """
+        Detiene un lote de instancias en una sola operación
+        
+        Args:
+            transitions (List[Tuple[EC2Instance, InstanceState]]): Instancias a
+                detener junto al estado esperado según las reglas del servicio
+        
+        Returns:
+            Dict[str, InstanceState]: Estado resultante de cada instancia. Un
+            backend con compare-and-set omite las instancias que cambiaron de
+            estado entre la lectura y la escritura
+        """
+    
+    def count_instances(
+        self,
+        group_by: Sequence[str],
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+    ) -> Dict[Tuple[str, ...], int]:
+        """
+        Cuenta las instancias que cumplen los filtros, agrupadas por campo
+        
+        La implementación por defecto recorre todas las instancias; los
+        backends con índices o contadores la resuelven sin leerlas.
+        
+        Args:
+            group_by (Sequence[str]): Campos por los que agrupar (``state``, ``region``, ``type``)
+            state (Optional[InstanceState]): Filtra por estado
+            region (Optional[AWSRegion]): Filtra por región
+            instance_type (Optional[InstanceType]): Filtra por tipo
+        
+        Returns:
+            Dict[Tuple[str, ...], int]: Cantidad por combinación de valores de
+            ``group_by``; solo incluye combinaciones con instancias
+        """
+        counts: Dict[Tuple[str, ...], int] = {}
+        for instance in self.iter_instances(state=state, region=region, instance_type=instance_type):
+            values = (getattr(instance, field) for field in group_by)
+            group = tuple(getattr(value, "value", value) for value in values)
+            counts[group] = counts.get(group, 0) + 1
+        return counts
+    
+    def get_version(self) -> Optional[int]:
+        """
+        Versión monótona de la flota, o None si el backend no la conoce
+        
+        Cualquier mutación debe producir una versión mayor.
+        """
+        return None
+    
+    def get_instance_version(self, instance_id: str) -> Optional[int]:
+        """Versión del último cambio de una instancia, o None si no se conoce"""
+        return None
+    
+    def get_epoch(self) -> str:
+        """
+        Identidad del contador de versiones (sin I/O)
+        
+        Dos versiones solo son comparables si tienen la misma época. Por
+        defecto es el arranque del proceso: un contador en memoria empieza de
+        nuevo al reiniciar y es distinto en cada worker. Un almacenamiento
+        compartido y persistente retorna una identidad propia.
+        """
+        return BOOT_EPOCH
+    
+    def set_state(
+        self,
+        instance_id: str,
+        state: InstanceState,
+        expected_state: Optional[InstanceState] = None,
+    ) -> Optional[EC2Instance]:
+        """
+        Fuerza el estado de una instancia (usado para simular transiciones)
+        
+        Args:
+            instance_id (str): ID de la instancia
+            state (InstanceState): Nuevo estado
+            expected_state (Optional[InstanceState]): Si se indica, el cambio
+                solo se aplica si la instancia sigue en ese estado
+        
+        Returns:
+            Optional[EC2Instance]: La instancia actualizada, o None si no
+            estaba en ``expected_state``
+        
+        Raises:
+            NotImplementedError: Si el backend no admite cambios de estado directos
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support direct state changes")
+    
+    def close(self):
+        """Libera los recursos del backend (conexiones, archivos, threads)"""
@@ -0,0 +1,279 @@
+import json
+import logging
+import threading
+from datetime import timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import boto3
+from botocore.config import Config
+from pydantic import ValidationError
+
+from src.config import Settings
+from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+from .base import EC2Backend
+
+logger = logging.getLogger(__name__)
+
+# Máximo de valores por filtro aceptado por DescribeInstances
+FILTER_VALUES_LIMIT = 200
+
+
+def _value(item) -> str:
+    return item.value if isinstance(item, (InstanceState, InstanceType, AWSRegion)) else item
+
+
+def _escape_wildcards(value: str) -> str:
+    """Escapa los comodines de los filtros de EC2 (``*`` y ``?``)"""
+    return value.replace("\\", "\\\\").replace("*", "\\*").replace("?", "\\?")
+
+
+def _encode_cursor(region: str, page_token: Optional[str], index: int) -> str:
+    # El servicio lo entrega codificado en base64 como next_token
+    return json.dumps([region, page_token, index], separators=(",", ":"))
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, Optional[str], int]:
+    """Decodifica un cursor de ``iter_with_cursors``: región, token de la página y posición"""
+    try:
+        region, page_token, index = json.loads(cursor)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(region, str) or not isinstance(index, int) or index < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return region, page_token, index
+
+
+class Boto3Backend(EC2Backend):
+    """
+    Backend que consulta la API de EC2 mediante boto3
+    
+    Puede apuntar a AWS o a un stand-in local (moto server) con ``endpoint_url``.
+    Se crea un único cliente por región, reutilizado entre requests, con un
+    pool de conexiones de botocore dimensionado para uso concurrente.
+    
+    Las instancias se recorren en el orden que retorna ``DescribeInstances``,
+    página por página. El cursor guarda la región, el ``NextToken`` de la
+    página y la posición dentro de ella, de modo que cada página del listado
+    cuesta una llamada sin importar cuántas se leyeron antes.
+    """
+    
+    def __init__(
+        self,
+        regions: Sequence[str] = ("us-east-1",),
+        endpoint_url: Optional[str] = None,
+        max_pool_connections: int = 50,
+        connect_timeout: float = 2.0,
+        read_timeout: float = 10.0,
+        max_attempts: int = 3,
+        page_size: int = 1000,
+        session: Optional[boto3.session.Session] = None,
+    ):
+        self.regions = tuple(_value(region) for region in regions)
+        self.endpoint_url = endpoint_url
+        self.page_size = page_size
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries={"max_attempts": max_attempts, "mode": "standard"},
+            tcp_keepalive=True,
+        )
+        self._session = session or boto3.session.Session()
+        self._clients: Dict[str, object] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Boto3Backend":
+        return cls(
+            regions=settings.ec2_regions,
+            endpoint_url=settings.ec2_endpoint_url,
+            max_pool_connections=settings.ec2_max_pool_connections,
+            connect_timeout=settings.ec2_connect_timeout,
+            read_timeout=settings.ec2_read_timeout,
+            max_attempts=settings.ec2_max_attempts,
+        )
+    
+    def client(self, region: str):
+        """Retorna el cliente EC2 de la región, creándolo una única vez"""
+        region = _value(region)
+        client = self._clients.get(region)
+        if client is None:
+            # La creación de clientes en una misma sesión no es thread-safe
+            with self._lock:
+                client = self._clients.get(region)
+                if client is None:
+                    client = self._session.client(
+                        "ec2",
+                        region_name=region,
+                        endpoint_url=self.endpoint_url,
+                        config=self.config,
+                    )
+                    self._clients[region] = client
+        return client
+    
+    def iter_instances(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[EC2Instance]:
+        matches = self.iter_with_cursors(
+            state=state,
+            region=region,
+            instance_type=instance_type,
+            name_prefix=name_prefix,
+            after=after,
+        )
+        for instance, _, _ in matches:
+            yield instance
+    
+    def iter_with_cursors(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[Tuple[EC2Instance, str, Optional[int]]]:
+        """
+        Recorre las regiones página por página; el cursor es la región, el
+        ``NextToken`` de la página y la posición dentro de ella
+        
+        Reanudar cuesta a lo sumo volver a pedir una página, sin importar
+        cuántas se leyeron antes. EC2 no expone versiones: son None.
+        """
+        filters = []
+        if state is not None:
+            filters.append({"Name": "instance-state-name", "Values": [_value(state)]})
+        if instance_type is not None:
+            filters.append({"Name": "instance-type", "Values": [_value(instance_type)]})
+        if name_prefix is not None:
+            filters.append({"Name": "tag:Name", "Values": [f"{_escape_wildcards(name_prefix)}*"]})
+        
+        regions = [_value(region)] if region is not None else list(self.regions)
+        page_token, skip = None, 0
+        if after is not None:
+            region_name, page_token, skip = _decode_cursor(after)
+            if region_name not in regions:
+                raise ValueError(f"Invalid cursor: {after}")
+            regions = regions[regions.index(region_name):]
+        
+        for region_name in regions:
+            for token, instances, next_token in self._describe_pages(region_name, filters, page_token):
+                for index in range(skip, len(instances)):
+                    instance = instances[index]
+                    if instance is None:
+                        continue
+                    # Al final de la página se reanuda desde la siguiente, sin volver a pedir esta
+                    if index + 1 == len(instances) and next_token:
+                        cursor = _encode_cursor(region_name, next_token, 0)
+                    else:
+                        cursor = _encode_cursor(region_name, token, index + 1)
+                    yield instance, cursor, None
+                skip = 0
+            page_token = None
+    
+    def get_instance(self, instance_id: str) -> Optional[EC2Instance]:
+        return self.get_instances([instance_id]).get(instance_id)
+    
+    def get_instances(self, instance_ids: Iterable[str]) -> Dict[str, EC2Instance]:
+        pending = list(dict.fromkeys(instance_ids))
+        found: Dict[str, EC2Instance] = {}
+        for region_name in self.regions:
+            if not pending:
+                break
+            for start in range(0, len(pending), FILTER_VALUES_LIMIT):
+                chunk = pending[start:start + FILTER_VALUES_LIMIT]
+                filters = [{"Name": "instance-id", "Values": chunk}]
+                for instance in self._describe(region_name, filters):
+                    found[instance.id] = instance
+            pending = [instance_id for instance_id in pending if instance_id not in found]
+        return found
+    
+    def stop_instances(self, transitions: List[Tuple[EC2Instance, InstanceState]]) -> Dict[str, InstanceState]:
+        """Emite una única llamada ``StopInstances`` por región involucrada"""
+        by_region: Dict[str, List[str]] = {}
+        for instance, _ in transitions:
+            by_region.setdefault(_value(instance.region), []).append(instance.id)
+        
+        current_states = {}
+        for region_name, instance_ids in by_region.items():
+            response = self.client(region_name).stop_instances(InstanceIds=instance_ids)
+            for change in response.get("StoppingInstances", []):
+                current_states[change["InstanceId"]] = InstanceState(change["CurrentState"]["Name"])
+        return current_states
+    
+    def _describe(self, region: str, filters: List[dict]) -> Iterator[EC2Instance]:
+        """Recorre todas las páginas de DescribeInstances de la región"""
+        for _, instances, _ in self._describe_pages(region, filters):
+            for instance in instances:
+                if instance is not None:
+                    yield instance
+    
+    def _describe_pages(
+        self,
+        region: str,
+        filters: List[dict],
+        next_token: Optional[str] = None,
+    ) -> Iterator[Tuple[Optional[str], List[Optional[EC2Instance]], Optional[str]]]:
+        """
+        Pide las páginas de DescribeInstances desde ``next_token``
+        
+        Yields:
+            Tuple: Token con el que se pidió la página, sus instancias (None
+            para las que no se pudieron convertir, así las posiciones no
+            cambian) y el token de la página siguiente
+        """
+        client = self.client(region)
+        kwargs = {"MaxResults": self.page_size}
+        if filters:
+            kwargs["Filters"] = filters
+        while True:
+            if next_token:
+                kwargs["NextToken"] = next_token
+            response = client.describe_instances(**kwargs)
+            instances = [
+                self._to_instance(raw, region)
+                for reservation in response.get("Reservations", [])
+                for raw in reservation.get("Instances", [])
+            ]
+            token, next_token = next_token, response.get("NextToken")
+            yield token, instances, next_token
+            if not next_token:
+                return
+    
+    @staticmethod
+    def _to_instance(raw: dict, region: str) -> Optional[EC2Instance]:
+        """
+        Convierte una instancia de la respuesta de DescribeInstances al modelo de la API
+        
+        Las instancias de un tipo o estado que el modelo no conoce se omiten
+        (con un warning) en vez de hacer fallar todo el listado.
+        """
+        tags = {tag["Key"]: tag["Value"] for tag in raw.get("Tags", [])}
+        launch_time = raw.get("LaunchTime")
+        try:
+            return EC2Instance(
+                id=raw["InstanceId"],
+                name=tags.get("Name", ""),
+                type=raw["InstanceType"],
+                state=raw["State"]["Name"],
+                region=region,
+                launch_time=(
+                    launch_time.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                    if launch_time is not None else None
+                ),
+                private_ip=raw.get("PrivateIpAddress"),
+                public_ip=raw.get("PublicIpAddress"),
+            )
+        except ValidationError as e:
+            logger.warning(
+                "Skipping instance %s (%s, %s): %s",
+                raw.get("InstanceId"),
+                raw.get("InstanceType"),
+                raw.get("State", {}).get("Name"),
+                e.errors()[0]["msg"],
+            )
+            return None
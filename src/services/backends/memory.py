@@ -0,0 +1,122 @@
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+from src.repositories import InstanceRepository
+from .base import EC2Backend
+
+if TYPE_CHECKING:
+    from src.repositories.persistence import InstanceStore
+
+
+def _value(item) -> str:
+    return getattr(item, "value", item)
+
+
+class InMemoryBackend(EC2Backend):
+    """
+    Backend sobre el repositorio columnar en memoria (datos mock)
+    
+    Con un ``store`` el repositorio se persiste en disco (snapshot y
+    journal) y sobrevive a los reinicios.
+    """
+    
+    # Operaciones de microsegundos: no justifican un salto a otro thread
+    blocking = False
+    # Nadie más avanza los estados intermedios: los simula el scheduler
+    simulated = True
+    
+    def __init__(self, repository: InstanceRepository, store: Optional["InstanceStore"] = None):
+        self.repository = repository
+        self.store = store
+    
+    def iter_instances(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[EC2Instance]:
+        """Itera las instancias ordenadas por ID usando los índices del repositorio"""
+        matches = self.iter_with_cursors(
+            state=state,
+            region=region,
+            instance_type=instance_type,
+            name_prefix=name_prefix,
+            after=after,
+        )
+        for instance, _, _ in matches:
+            yield instance
+    
+    def iter_with_cursors(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[Tuple[EC2Instance, str, Optional[int]]]:
+        """El cursor es el ID; cada instancia se lee junto con su versión"""
+        instance_ids = self.repository.iter_ids(
+            state=state,
+            region=region,
+            instance_type=instance_type,
+            after=after,
+            name_prefix=name_prefix,
+        )
+        # Solo se materializan las instancias que pasan todos los filtros
+        for instance_id in instance_ids:
+            versioned = self.repository.get_versioned(instance_id)
+            if versioned is not None:
+                instance, version = versioned
+                yield instance, instance_id, version
+    
+    def get_instance(self, instance_id: str) -> Optional[EC2Instance]:
+        return self.repository.get(instance_id)
+    
+    def get_instances(self, instance_ids: Iterable[str]) -> Dict[str, EC2Instance]:
+        found = {}
+        for instance_id in instance_ids:
+            instance = self.repository.get(instance_id)
+            if instance is not None:
+                found[instance_id] = instance
+        return found
+    
+    def stop_instances(self, transitions: List[Tuple[EC2Instance, InstanceState]]) -> Dict[str, InstanceState]:
+        return {
+            instance.id: self.repository.set_state(instance.id, state).state
+            for instance, state in transitions
+        }
+    
+    def count_instances(
+        self,
+        group_by: Sequence[str],
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+    ) -> Dict[Tuple[str, ...], int]:
+        """Suma el tamaño de las celdas del repositorio, sin recorrer instancias"""
+        return self.repository.count_by(group_by, state=state, region=region, instance_type=instance_type)
+    
+    def get_version(self) -> Optional[int]:
+        return self.repository.version
+    
+    def get_instance_version(self, instance_id: str) -> Optional[int]:
+        return self.repository.instance_version(instance_id)
+    
+    def set_state(
+        self,
+        instance_id: str,
+        state: InstanceState,
+        expected_state: Optional[InstanceState] = None,
+    ) -> Optional[EC2Instance]:
+        if expected_state is not None:
+            instance = self.repository.get(instance_id)
+            if instance is None or instance.state != _value(expected_state):
+                return None
+        return self.repository.set_state(instance_id, state)
+    
+    def close(self):
+        """Escribe el journal pendiente y un snapshot final, si el repositorio se persiste"""
+        if self.store is not None:
+            self.store.close()
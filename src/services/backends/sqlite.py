@@ -0,0 +1,372 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from src.config import Settings
+from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+from .base import EC2Backend
+
+
+# Máximo de parámetros por consulta (SQLITE_MAX_VARIABLE_NUMBER en builds viejos)
+MAX_VARIABLES = 900
+
+COLUMNS = ("id", "name", "type", "state", "region", "launch_time", "private_ip", "public_ip")
+
+# Columnas por las que se puede agrupar: las de instance_counts
+GROUP_COLUMNS = ("state", "region", "type")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    state TEXT NOT NULL,
+    region TEXT NOT NULL,
+    launch_time TEXT,
+    private_ip TEXT,
+    public_ip TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_instances_state ON instances (state, id);
+CREATE INDEX IF NOT EXISTS idx_instances_region ON instances (region, id);
+CREATE INDEX IF NOT EXISTS idx_instances_type ON instances (type, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', abs(random() % 4294967296));
+CREATE TABLE IF NOT EXISTS instance_counts (
+    state TEXT NOT NULL,
+    region TEXT NOT NULL,
+    type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (state, region, type)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS instance_counts_delete AFTER DELETE ON instances BEGIN
+    UPDATE instance_counts SET count = count - 1
+    WHERE state = OLD.state AND region = OLD.region AND type = OLD.type;
+END;
+CREATE TRIGGER IF NOT EXISTS instance_counts_update AFTER UPDATE OF state, region, type ON instances
+WHEN OLD.state IS NOT NEW.state OR OLD.region IS NOT NEW.region OR OLD.type IS NOT NEW.type BEGIN
+    UPDATE instance_counts SET count = count - 1
+    WHERE state = OLD.state AND region = OLD.region AND type = OLD.type;
+    INSERT INTO instance_counts (state, region, type, count) VALUES (NEW.state, NEW.region, NEW.type, 1)
+    ON CONFLICT (state, region, type) DO UPDATE SET count = count + 1;
+END;
+INSERT OR IGNORE INTO meta (key, value) VALUES ('counts', 0);
+"""
+
+# Recalcula los contadores: tras cada carga y en bases creadas antes de instance_counts
+REBUILD_COUNTS = (
+    "DELETE FROM instance_counts",
+    "INSERT INTO instance_counts (state, region, type, count) "
+    "SELECT state, region, type, COUNT(*) FROM instances GROUP BY state, region, type",
+    "UPDATE meta SET value = 1 WHERE key = 'counts'",
+)
+
+SELECT_COLUMNS = ", ".join(COLUMNS)
+# Las lecturas de filas traen la versión en la misma consulta: leída aparte
+# podría corresponder a un cambio posterior de otro worker
+SELECT_ROW = f"{SELECT_COLUMNS}, version"
+SELECT_INSTANCE = f"SELECT {SELECT_COLUMNS} FROM instances WHERE id = ?"
+SELECT_INSTANCE_VERSION = "SELECT version FROM instances WHERE id = ?"
+SELECT_VERSION = "SELECT value FROM meta WHERE key = 'version'"
+SELECT_EPOCH = "SELECT value FROM meta WHERE key = 'epoch'"
+UPDATE_VERSION = "UPDATE meta SET value = ? WHERE key = 'version'"
+INSERT_INSTANCE = (
+    f"INSERT OR IGNORE INTO instances ({SELECT_COLUMNS}, version) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+UPDATE_STATE = "UPDATE instances SET state = ?, version = ? WHERE id = ?"
+UPDATE_STATE_IF = "UPDATE instances SET state = ?, version = ? WHERE id = ? AND state = ?"
+
+
+def _value(item) -> Optional[str]:
+    return getattr(item, "value", item)
+
+
+def _to_instance(row: Tuple) -> EC2Instance:
+    # Las filas se escribieron desde modelos ya validados: se evita revalidarlas.
+    # Una columna ``version`` al final queda fuera de ``COLUMNS`` y se ignora
+    return EC2Instance.model_construct(**dict(zip(COLUMNS, row)))
+
+
+class SQLiteBackend(EC2Backend):
+    """
+    Backend sobre una base SQLite compartida entre procesos
+    
+    Permite correr uvicorn con ``--workers N``: todos los workers leen y
+    escriben el mismo archivo, de modo que un stop en un worker es visible
+    de inmediato en los demás. La base usa WAL, con lo que las lecturas no
+    bloquean a la escritura ni entre sí y escalan con los cores.
+    
+    - Cada thread usa su propia conexión; las consultas son SQL fijo con
+      parámetros, que el cache de statements de ``sqlite3`` reutiliza ya
+      compilado.
+    - Los índices (estado, id), (región, id) y (tipo, id) resuelven los
+      filtros recorriendo los IDs en orden, que es el orden de paginación.
+    - Las mutaciones son compare-and-set sobre el estado leído: si otro
+      proceso cambió la instancia en el medio, la transición no se aplica.
+    - ``meta.version`` es la versión de la flota; cada mutación la aumenta
+      y la guarda en la fila afectada, lo que mantiene los ETags coherentes
+      entre workers. ``meta.epoch`` identifica la base: una base nueva en la
+      misma ruta no reutiliza los ETags de la anterior.
+    - ``instance_counts`` lleva la cantidad de instancias por (estado,
+      región, tipo): se recalcula al cargar y los triggers la mantienen en
+      la misma transacción de cada cambio, de modo que los resúmenes leen
+      unos cientos de filas y no la flota.
+    """
+    
+    # Cada consulta toca disco: se ejecuta en el thread pool
+    blocking = True
+    # Nadie más avanza los estados intermedios: los simula el scheduler
+    simulated = True
+    # Otros workers escriben la misma base
+    shared = True
+    
+    def __init__(self, path: str, timeout: float = 5.0, page_size: int = 500):
+        """
+        Args:
+            path (str): Archivo de la base (se crea si no existe)
+            timeout (float): Espera máxima por el lock de escritura, en segundos
+            page_size (int): Filas leídas por consulta al iterar
+        """
+        self.path = path
+        self.timeout = timeout
+        self.page_size = page_size
+        self._local = threading.local()
+        # Conexiones abiertas de todos los threads, para cerrarlas en ``close``
+        self._connections: Set[sqlite3.Connection] = set()
+        self._connections_lock = threading.Lock()
+        self.connection.executescript(SCHEMA)
+        self._epoch = f"{self.connection.execute(SELECT_EPOCH).fetchone()[0]:08x}"
+        with self._transaction() as connection:
+            if not connection.execute("SELECT value FROM meta WHERE key = 'counts'").fetchone()[0]:
+                self._rebuild_counts(connection)
+    
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SQLiteBackend":
+        return cls(settings.ec2_sqlite_path, timeout=settings.ec2_sqlite_timeout)
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Conexión del thread actual, creada en el primer uso
+        
+        Cada conexión la usa un solo thread; ``check_same_thread`` se desactiva
+        solo para que ``close`` pueda cerrarlas todas desde el thread que apaga.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or connection not in self._connections:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                cached_statements=256,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            with self._connections_lock:
+                self._connections.add(connection)
+            self._local.connection = connection
+        return connection
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transacción de escritura; el lock se toma al comenzar para evitar deadlocks"""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    
+    def _next_version(self, connection: sqlite3.Connection) -> int:
+        """Versión a asignar en la transacción actual; se confirma con ``_save_version``"""
+        return connection.execute(SELECT_VERSION).fetchone()[0] + 1
+    
+    def _save_version(self, connection: sqlite3.Connection, version: int):
+        connection.execute(UPDATE_VERSION, (version,))
+    
+    def _rebuild_counts(self, connection: sqlite3.Connection):
+        # Una sola agregación es más barata que un trigger por fila insertada
+        for statement in REBUILD_COUNTS:
+            connection.execute(statement)
+    
+    def seed(self, instances: Iterable[EC2Instance], only_if_empty: bool = True) -> int:
+        """
+        Carga instancias en la base
+        
+        Con ``only_if_empty`` solo se cargan si la tabla está vacía, de modo
+        que varios workers arrancando a la vez no dupliquen ni pisen datos.
+        
+        Returns:
+            int: Cantidad de instancias insertadas
+        """
+        with self._transaction() as connection:
+            if only_if_empty and connection.execute("SELECT 1 FROM instances LIMIT 1").fetchone():
+                return 0
+            version = self._next_version(connection)
+            rows = [
+                tuple(_value(getattr(instance, column)) for column in COLUMNS) + (version,)
+                for instance in instances
+            ]
+            connection.executemany(INSERT_INSTANCE, rows)
+            self._rebuild_counts(connection)
+            self._save_version(connection, version)
+            return len(rows)
+    
+    def iter_instances(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[EC2Instance]:
+        """Itera las instancias ordenadas por ID, leyendo de a ``page_size`` filas"""
+        matches = self.iter_with_cursors(
+            state=state,
+            region=region,
+            instance_type=instance_type,
+            name_prefix=name_prefix,
+            after=after,
+        )
+        for instance, _, _ in matches:
+            yield instance
+    
+    def iter_with_cursors(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[Tuple[EC2Instance, str, Optional[int]]]:
+        """El cursor es el ID; la versión sale de la misma consulta que la fila"""
+        conditions = ["id > ?"]
+        filters: List = []
+        for column, value in (("state", state), ("region", region), ("type", instance_type)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                filters.append(_value(value))
+        if name_prefix is not None:
+            conditions.append("substr(name, 1, ?) = ?")
+            filters.extend([len(name_prefix), name_prefix])
+        query = f"SELECT {SELECT_ROW} FROM instances WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?"
+        
+        # Cada página es una consulta completa: no quedan cursores abiertos entre yields
+        last_id = after or ""
+        while True:
+            rows = self.connection.execute(query, [last_id, *filters, self.page_size]).fetchall()
+            for row in rows:
+                yield _to_instance(row), row[0], row[-1]
+            if len(rows) < self.page_size:
+                return
+            last_id = rows[-1][0]
+    
+    def get_instance(self, instance_id: str) -> Optional[EC2Instance]:
+        row = self.connection.execute(SELECT_INSTANCE, (instance_id,)).fetchone()
+        return _to_instance(row) if row else None
+    
+    def get_instances(self, instance_ids: Iterable[str]) -> Dict[str, EC2Instance]:
+        instance_ids = list(instance_ids)
+        found = {}
+        for start in range(0, len(instance_ids), MAX_VARIABLES):
+            chunk = instance_ids[start:start + MAX_VARIABLES]
+            query = f"SELECT {SELECT_ROW} FROM instances WHERE id IN ({', '.join('?' * len(chunk))})"
+            for row in self.connection.execute(query, chunk):
+                found[row[0]] = _to_instance(row)
+        return found
+    
+    def stop_instances(self, transitions: List[Tuple[EC2Instance, InstanceState]]) -> Dict[str, InstanceState]:
+        """Aplica el lote en una transacción; omite las instancias que cambiaron desde la lectura"""
+        applied = {}
+        with self._transaction() as connection:
+            version = self._next_version(connection)
+            for instance, state in transitions:
+                cursor = connection.execute(
+                    UPDATE_STATE_IF, (_value(state), version, instance.id, _value(instance.state))
+                )
+                if cursor.rowcount:
+                    applied[instance.id] = InstanceState(state)
+            # La versión solo avanza si algo cambió: los ETags siguen siendo válidos
+            if applied:
+                self._save_version(connection, version)
+        return applied
+    
+    def count_instances(
+        self,
+        group_by: Sequence[str],
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+    ) -> Dict[Tuple[str, ...], int]:
+        """Agrupa los contadores de ``instance_counts``, sin leer la tabla de instancias"""
+        for column in group_by:
+            if column not in GROUP_COLUMNS:
+                raise ValueError(f"Cannot group by {column}")
+        conditions = ["count > 0"]
+        filters: List = []
+        for column, value in (("state", state), ("region", region), ("type", instance_type)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                filters.append(_value(value))
+        columns = ", ".join(group_by)
+        query = f"SELECT {columns + ', ' if group_by else ''}SUM(count) FROM instance_counts WHERE {' AND '.join(conditions)}"
+        if group_by:
+            query += f" GROUP BY {columns}"
+        return {
+            tuple(row[:-1]): row[-1]
+            for row in self.connection.execute(query, filters)
+            if row[-1]
+        }
+    
+    def get_version(self) -> Optional[int]:
+        return self.connection.execute(SELECT_VERSION).fetchone()[0]
+    
+    def get_epoch(self) -> str:
+        return self._epoch
+    
+    def get_instance_version(self, instance_id: str) -> Optional[int]:
+        row = self.connection.execute(SELECT_INSTANCE_VERSION, (instance_id,)).fetchone()
+        return row[0] if row else None
+    
+    def set_state(
+        self,
+        instance_id: str,
+        state: InstanceState,
+        expected_state: Optional[InstanceState] = None,
+    ) -> Optional[EC2Instance]:
+        with self._transaction() as connection:
+            version = self._next_version(connection)
+            if expected_state is None:
+                cursor = connection.execute(UPDATE_STATE, (_value(state), version, instance_id))
+            else:
+                cursor = connection.execute(
+                    UPDATE_STATE_IF, (_value(state), version, instance_id, _value(expected_state))
+                )
+            if not cursor.rowcount:
+                if expected_state is None:
+                    raise KeyError(instance_id)
+                return None
+            self._save_version(connection, version)
+            row = connection.execute(SELECT_INSTANCE, (instance_id,)).fetchone()
+        return _to_instance(row)
+    
+    def close(self):
+        """
+        Cierra las conexiones de todos los threads (incluidos los del executor)
+        
+        Un thread que vuelva a usar el backend abre una conexión nueva.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            connection.close()
+        self._local.connection = None
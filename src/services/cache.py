@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class _Flight:
+    """Carga en curso de una clave; los demás threads esperan su resultado"""
+    
+    __slots__ = ("done", "value", "error")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Cache read-through con TTL y desalojo LRU
+    
+    - Cada entrada vence ``ttl`` segundos después de cargarse.
+    - Al superar ``maxsize`` entradas se desaloja la menos usada.
+    - Ante misses concurrentes de una misma clave solo un thread ejecuta el
+      loader; el resto espera y reutiliza su resultado (protección contra
+      estampidas).
+    - Las entradas se asocian a tags para invalidarlas de forma selectiva.
+    
+    Es thread-safe: el lock protege solo las estructuras internas, nunca
+    la ejecución del loader.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Tuple[Hashable, ...]]]" = OrderedDict()
+        self._by_tag: Dict[Hashable, Set[Hashable]] = {}
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], tags: Iterable[Hashable] = ()) -> Any:
+        """
+        Retorna el valor cacheado de ``key`` o lo carga con ``loader``
+        
+        Args:
+            key (Hashable): Clave de la entrada
+            loader (Callable[[], Any]): Función que obtiene el valor ante un miss
+            tags (Iterable[Hashable]): Tags para invalidar la entrada luego
+            
+        Returns:
+            Any: El valor cacheado o recién cargado
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+                epoch = self._epoch
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                # Si hubo una invalidación durante la carga el valor puede estar desactualizado
+                if flight.error is None and epoch == self._epoch:
+                    self._store(key, flight.value, tuple(tags))
+            flight.done.set()
+        return flight.value
+    
+    def invalidate_tags(self, *tags: Hashable) -> int:
+        """
+        Elimina las entradas asociadas a cualquiera de los tags
+        
+        Returns:
+            int: Cantidad de entradas eliminadas
+        """
+        with self._lock:
+            self._epoch += 1
+            keys = set()
+            for tag in tags:
+                keys.update(self._by_tag.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+    
+    def clear(self):
+        """Elimina todas las entradas"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._by_tag.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Contadores para monitoreo"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _store(self, key: Hashable, value: Any, tags: Tuple[Hashable, ...]):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self._clock() + self.ttl, value, tags)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def _remove(self, key: Hashable):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
@@ -1,169 +1,636 @@
-import boto3
-from typing import List, Optional
-from moto import mock_ec2
+import base64
+import binascii
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from src.config import Settings, get_settings
 from src.models import (
     EC2Instance, 
     InstanceState, 
     InstanceType, 
     AWSRegion,
-    StopInstanceResponse
+    StopInstanceResponse,
+    StopInstanceResult,
+    InstanceStateChange,
+    InstanceGroup,
+    InstanceSummary,
 )
-from src.utils.mock_data import MOCK_INSTANCES_DB
+from src.services.admission import AdmissionControl, BatchTooLarge, RateLimited
+from src.services.backends import EC2Backend, create_backend
+from src.services.cache import TTLCache
+from src.services.locking import StripedLock
+from src.services.metrics import instrument_methods
+from src.services.serialization import InstanceJSONCache
+from src.services.state_machine import InstanceAction, next_state, resolve_stop
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Marca para usar el cache configurado (None lo desactiva)
+DEFAULT_CACHE = object()
+
+
+class IdempotencyKeyReused(ValueError):
+    """Se reutilizó un Idempotency-Key con parámetros distintos a los originales"""
+
+
+def _value(item):
+    """Normaliza enums a su valor para usarlos en claves de cache"""
+    return getattr(item, "value", item)
+
+
+class InstancePage(list):
+    """
+    Página de instancias junto con el cursor del backend para continuar
+    después de la última y la versión con la que se leyó cada instancia
+    """
+    
+    def __init__(self, instances=(), cursor: Optional[str] = None, versions: Optional[Dict[str, int]] = None):
+        super().__init__(instances)
+        self.cursor = cursor
+        self.versions = versions if versions is not None else {}
+
+
+@instrument_methods
 class EC2Service:
-    """Servicio para operaciones EC2 usando boto3 con mocks"""
+    """
+    Servicio para operaciones EC2
+    
+    Aplica las reglas de negocio sobre un backend intercambiable: el
+    repositorio en memoria con datos mock o la API de EC2 vía boto3.
+    Las lecturas pueden pasar por un cache TTL que se invalida de forma
+    selectiva cuando el servicio modifica una instancia. Cada cambio de
+    estado se notifica a los listeners registrados con ``add_listener``.
+    
+    Los cambios de estado siguen la tabla de ``state_machine`` y cada
+    lectura-validación-escritura se hace con el lock de la instancia tomado,
+    de modo que dos detenciones concurrentes no producen dos transiciones.
+    Las detenciones con ``idempotency_key`` se recuerdan durante un tiempo
+    y sus reintentos retornan la respuesta original sin volver a aplicarse.
+    Antes de llamar al backend se aplica el límite de detenciones por región
+    de ``admission``; un throttling del backend se reporta como ``Overloaded``.
+    
+    La duración de cada método público se registra en la métrica
+    ``ec2_service_duration_seconds``.
+    """
+    
+    def __init__(self, backend: Optional[EC2Backend] = None, cache: Optional[TTLCache] = DEFAULT_CACHE):
+        """
+        Args:
+            backend (Optional[EC2Backend]): Backend a usar; por defecto el configurado
+            cache (Optional[TTLCache]): Cache de lecturas; por defecto el
+                configurado, None para desactivarlo
+        """
+        settings = get_settings()
+        self._settings = settings
+        self._backend = backend
+        self._cache = cache
+        self._backend_lock = threading.Lock()
+        self.json_cache = InstanceJSONCache(maxsize=settings.ec2_json_cache_maxsize)
+        self.idempotency = TTLCache(maxsize=settings.ec2_idempotency_maxsize, ttl=settings.ec2_idempotency_ttl)
+        self._locks = StripedLock(settings.ec2_lock_stripes)
+        self.admission = AdmissionControl.from_settings(settings)
+        self._listeners: List[Callable[[InstanceStateChange], None]] = []
+        if backend is not None:
+            logger.info("EC2 service configured with %s", type(backend).__name__)
+    
+    @property
+    def backend(self) -> EC2Backend:
+        """
+        Backend del servicio; el configurado se construye en el primer uso
+        
+        Así importar el módulo no carga la flota ni abre conexiones: la app lo
+        inicializa en su lifespan, antes de atender requests.
+        """
+        backend = self._backend
+        if backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = create_backend(self._settings)
+                    logger.info("EC2 service configured with %s", type(self._backend).__name__)
+                backend = self._backend
+        return backend
     
-    def __init__(self):
-        self.ec2_client = None
-        self._setup_mock_environment()
+    @property
+    def cache(self) -> Optional[TTLCache]:
+        """Cache de lecturas; el configurado depende del backend y se crea junto con él"""
+        cache = self._cache
+        if cache is DEFAULT_CACHE:
+            backend = self.backend
+            with self._backend_lock:
+                if self._cache is DEFAULT_CACHE:
+                    self._cache = self._default_cache(self._settings, backend)
+                cache = self._cache
+        return cache
     
-    @mock_ec2
-    def _setup_mock_environment(self):
-        """Configura el entorno mock de EC2"""
-        self.ec2_client = boto3.client('ec2', region_name='us-east-1')
-        logger.info("Mock EC2 environment configured")
+    @staticmethod
+    def _default_cache(settings: Settings, backend: EC2Backend) -> Optional[TTLCache]:
+        """
+        Crea el cache según la configuración
+        
+        En modo ``auto`` solo se cachean backends remotos: leer el repositorio
+        en memoria cuesta lo mismo que leer el cache, y un almacenamiento
+        compartido entre workers se modifica sin pasar por este cache.
+        """
+        if settings.ec2_cache == "off" or (
+            settings.ec2_cache == "auto" and (not backend.blocking or backend.shared)
+        ):
+            return None
+        return TTLCache(maxsize=settings.ec2_cache_maxsize, ttl=settings.ec2_cache_ttl)
     
-    def get_all_instances(self) -> List[EC2Instance]:
+    def get_all_instances(
+        self,
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+        name_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        next_token: Optional[str] = None,
+    ) -> List[EC2Instance]:
         """
-        Retorna todas las instancias EC2 simuladas
+        Retorna las instancias EC2 simuladas, filtradas y paginadas
+        
+        Las instancias se recorren en el orden estable del backend (por ID en
+        memoria), de modo que el cursor ``next_token`` apunta a la última
+        instancia entregada. Solo se construye la página solicitada.
+        
+        Args:
+            state (Optional[InstanceState]): Filtra por estado
+            region (Optional[AWSRegion]): Filtra por región
+            instance_type (Optional[InstanceType]): Filtra por tipo de instancia
+            name_prefix (Optional[str]): Filtra por prefijo del nombre
+            limit (Optional[int]): Cantidad máxima de instancias a retornar
+            next_token (Optional[str]): Cursor opaco retornado por una página anterior
+        
+        Returns:
+            List[EC2Instance]: La página de instancias solicitada (una
+            ``InstancePage`` con el cursor del backend para continuar)
+        
+        Raises:
+            ValueError: Si ``next_token`` no es un cursor válido
         """
         try:
             logger.info("Fetching all EC2 instances")
-            instances = list(MOCK_INSTANCES_DB.values())
-            return instances
+            after = self._decode_next_token(next_token) if next_token is not None else None
+            
+            def load() -> InstancePage:
+                matches = self.backend.iter_with_cursors(
+                    state=state,
+                    region=region,
+                    instance_type=instance_type,
+                    name_prefix=name_prefix,
+                    after=after,
+                )
+                instances = InstancePage()
+                for instance, cursor, version in matches:
+                    instances.append(instance)
+                    instances.cursor = cursor
+                    if version is not None:
+                        instances.versions[instance.id] = version
+                    if limit is not None and len(instances) >= limit:
+                        break
+                return instances
+            
+            if self.cache is None:
+                return load()
+            key = ("list", _value(state), _value(region), _value(instance_type), name_prefix, limit, after)
+            return self.cache.get_or_load(key, load, tags=[("region", _value(region) or "*")])
+        except ValueError:
+            raise
         except Exception as e:
-            logger.error(f"Error fetching instances: {str(e)}")
+            logger.error("Error fetching instances: %s", e)
             raise
     
+    def summarize_instances(
+        self,
+        group_by: Sequence[str] = ("state",),
+        state: Optional[InstanceState] = None,
+        region: Optional[AWSRegion] = None,
+        instance_type: Optional[InstanceType] = None,
+    ) -> InstanceSummary:
+        """
+        Cuenta las instancias agrupadas por cualquier combinación de estado, región y tipo
+        
+        El conteo lo resuelve el backend: el repositorio en memoria suma el
+        tamaño de sus celdas y SQLite lee contadores mantenidos por triggers,
+        por lo que el costo no depende del tamaño de la flota.
+        
+        Args:
+            group_by (Sequence[str]): Campos por los que agrupar (``state``,
+                ``region``, ``type``); vacío retorna solo el total
+            state (Optional[InstanceState]): Filtra por estado
+            region (Optional[AWSRegion]): Filtra por región
+            instance_type (Optional[InstanceType]): Filtra por tipo de instancia
+        
+        Returns:
+            InstanceSummary: Un grupo por combinación con instancias, ordenados por sus valores
+        
+        Raises:
+            ValueError: Si algún campo no es agrupable
+        """
+        # Un campo repetido no cambia los grupos
+        group_by = list(dict.fromkeys(group_by))
+        
+        def load() -> InstanceSummary:
+            counts = self.backend.count_instances(
+                group_by,
+                state=state,
+                region=region,
+                instance_type=instance_type,
+            )
+            groups = [
+                InstanceGroup(count=count, **dict(zip(group_by, values)))
+                for values, count in sorted(counts.items())
+            ]
+            return InstanceSummary(group_by=group_by, total=sum(counts.values()), groups=groups)
+        
+        logger.info("Summarizing EC2 instances")
+        if self.cache is None:
+            return load()
+        key = ("summary", tuple(group_by), _value(state), _value(region), _value(instance_type))
+        return self.cache.get_or_load(key, load, tags=[("region", _value(region) or "*")])
+    
+    def get_next_token(self, instances: List[EC2Instance], limit: Optional[int]) -> Optional[str]:
+        """
+        Calcula el cursor de la página siguiente
+        
+        Si la página vino completa se retorna un cursor apuntando a su último
+        elemento (la posición que dio el backend, o su ID); la página
+        siguiente puede resultar vacía.
+        
+        Args:
+            instances (List[EC2Instance]): Página retornada por get_all_instances
+            limit (Optional[int]): Límite usado para obtener la página
+        
+        Returns:
+            Optional[str]: Cursor opaco, o None si no hay más páginas
+        """
+        if limit is None or not instances or len(instances) < limit:
+            return None
+        cursor = getattr(instances, "cursor", None) or instances[-1].id
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+    
+    @staticmethod
+    def _decode_next_token(next_token: str) -> str:
+        """Decodifica un cursor opaco a la posición de la última instancia entregada"""
+        try:
+            return base64.urlsafe_b64decode(next_token.encode()).decode()
+        except (binascii.Error, UnicodeError):
+            raise ValueError(f"Invalid next_token: {next_token}")
+    
+    def serialize_instances(self, instances: List[EC2Instance], separator: bytes = b",", prefix: bytes = b"[", suffix: bytes = b"]") -> bytes:
+        """
+        Serializa una lista de instancias reutilizando el JSON cacheado de cada una
+        
+        Por defecto produce un array JSON; con ``separator=b"\\n"`` y sin
+        prefijo/sufijo produce NDJSON. El JSON de cada instancia se cachea con
+        la versión con la que el backend la leyó (la de ``InstancePage``);
+        una lista sin versiones se serializa sin cachear.
+        
+        Args:
+            instances (List[EC2Instance]): Instancias a serializar
+        
+        Returns:
+            bytes: El cuerpo serializado
+        """
+        versions = getattr(instances, "versions", {})
+        fragments = [
+            self.json_cache.dumps(instance, versions.get(instance.id))
+            for instance in instances
+        ]
+        return self.json_cache.join(fragments, separator=separator, prefix=prefix, suffix=suffix)
+    
+    def get_fleet_version(self) -> Optional[int]:
+        """
+        Versión actual de la flota, usada como ETag de los listados
+        
+        Returns:
+            Optional[int]: Versión monótona, o None si el backend no la soporta
+        """
+        return self.backend.get_version()
+    
+    def get_instance_version(self, instance_id: str) -> Optional[int]:
+        """
+        Versión del último cambio de una instancia, usada como ETag del detalle
+        
+        Returns:
+            Optional[int]: Versión, o None si la instancia no existe o el
+            backend no la soporta
+        """
+        return self.backend.get_instance_version(instance_id)
+    
+    def get_etag(self, version: int) -> str:
+        """
+        ETag débil de una versión de la flota o de una instancia
+        
+        Incluye la época del backend: tras un reinicio, o en otro worker con
+        su propia flota en memoria, la misma versión numérica no produce el
+        mismo ETag y un cliente con un ETag viejo no recibe un 304 falso.
+        """
+        return f'W/"{self.backend.get_epoch()}-{version}"'
+    
     def get_instance_by_id(self, instance_id: str) -> Optional[EC2Instance]:
         """
         Busca una instancia por su ID
         
         Args:
             instance_id (str): ID de la instancia
-            
+        
         Returns:
             Optional[EC2Instance]: La instancia si existe, None en caso contrario
         """
         try:
-            logger.info(f"Fetching instance with ID: {instance_id}")
-            instance = MOCK_INSTANCES_DB.get(instance_id)
+            logger.info("Fetching instance with ID: %s", instance_id)
+            if self.cache is None:
+                instance = self.backend.get_instance(instance_id)
+            else:
+                instance = self.cache.get_or_load(
+                    ("instance", instance_id),
+                    lambda: self.backend.get_instance(instance_id),
+                    tags=[("instance", instance_id)],
+                )
             if instance:
-                logger.info(f"Instance found: {instance.name}")
+                logger.info("Instance found: %s", instance.name)
             else:
-                logger.warning(f"Instance not found: {instance_id}")
+                logger.warning("Instance not found: %s", instance_id)
             return instance
         except Exception as e:
-            logger.error(f"Error fetching instance {instance_id}: {str(e)}")
+            logger.error("Error fetching instance %s: %s", instance_id, e)
             raise
     
-    def stop_instance(self, instance_id: str) -> StopInstanceResponse:
+    def stop_instance(self, instance_id: str, idempotency_key: Optional[str] = None) -> StopInstanceResponse:
         """
         Simula detener una instancia EC2
         
         Args:
             instance_id (str): ID de la instancia a detener
-            
+            idempotency_key (Optional[str]): Clave para deduplicar reintentos;
+                un reintento con la misma clave retorna la respuesta original
+        
         Returns:
             StopInstanceResponse: Respuesta con el resultado de la operación
-            
+        
         Raises:
             ValueError: Si la instancia no existe o no se puede detener
+            IdempotencyKeyReused: Si la clave ya se usó para otra instancia
         """
         try:
-            logger.info(f"Attempting to stop instance: {instance_id}")
+            logger.info("Attempting to stop instance: %s", instance_id)
+            
+            if idempotency_key is None:
+                return self._stop_instance(instance_id)
             
+            response = self.idempotency.get_or_load(
+                ("stop", idempotency_key),
+                lambda: self._stop_instance(instance_id),
+            )
+            if response.instance_id != instance_id:
+                raise IdempotencyKeyReused(
+                    f"Idempotency key {idempotency_key} was already used for instance {response.instance_id}"
+                )
+            return response
+        
+        except (ValueError, RateLimited, BatchTooLarge):
+            raise
+        except Exception as e:
+            logger.error("Error stopping instance %s: %s", instance_id, e)
+            raise RuntimeError(f"Failed to stop instance {instance_id}: {str(e)}")
+    
+    def _stop_instance(self, instance_id: str) -> StopInstanceResponse:
+        """Aplica la detención de una instancia con su lock tomado"""
+        with self._locks.hold(instance_id):
             # Verificar si la instancia existe
-            instance = MOCK_INSTANCES_DB.get(instance_id)
+            instance = self.backend.get_instance(instance_id)
             if not instance:
                 raise ValueError(f"Instance {instance_id} not found")
             
             previous_state = instance.state
             
             # Verificar si la instancia se puede detener
-            if instance.state == InstanceState.STOPPED:
+            target_state, message = resolve_stop(instance_id, previous_state)
+            if target_state is None:
                 return StopInstanceResponse(
                     success=False,
-                    message=f"Instance {instance_id} is already stopped",
+                    message=message,
                     instance_id=instance_id,
                     previous_state=previous_state,
                     current_state=instance.state
                 )
             
-            if instance.state in [InstanceState.STOPPING, InstanceState.SHUTTING_DOWN]:
+            # Simular el proceso de detener la instancia
+            applied = self._apply_stops([(instance, target_state)])
+            if not applied and self.backend.shared:
+                # Otro proceso cambió la instancia entre la lectura y la escritura: se informa su estado actual
+                instance = self.backend.get_instance(instance_id) or instance
+                _, message = resolve_stop(instance_id, instance.state)
                 return StopInstanceResponse(
                     success=False,
-                    message=f"Instance {instance_id} is already stopping",
+                    message=message,
                     instance_id=instance_id,
-                    previous_state=previous_state,
+                    previous_state=instance.state,
                     current_state=instance.state
                 )
+            current_state = applied.get(instance_id, target_state)
+        
+        self._record_changes([(instance, previous_state, current_state)])
+        logger.info("Instance %s state changed from %s to %s", instance_id, previous_state, current_state)
+        
+        return StopInstanceResponse(
+            success=True,
+            message=message,
+            instance_id=instance_id,
+            previous_state=previous_state,
+            current_state=current_state
+        )
+    
+    def stop_instances(self, instance_ids: List[str], idempotency_key: Optional[str] = None) -> List[StopInstanceResult]:
+        """
+        Detiene varias instancias EC2 en una sola pasada
+        
+        El lote se lee con una única consulta al backend y las transiciones
+        válidas se aplican juntas (una llamada ``StopInstances`` con boto3).
+        Las instancias inexistentes o en un estado que no permite detenerlas
+        se reportan como fallos individuales sin afectar al resto del lote.
+        Los IDs repetidos se procesan una única vez.
+        
+        Args:
+            instance_ids (List[str]): IDs de las instancias a detener
+            idempotency_key (Optional[str]): Clave para deduplicar reintentos
+                del mismo lote
+        
+        Returns:
+            List[StopInstanceResult]: Un resultado por ID, en el orden recibido
+        
+        Raises:
+            IdempotencyKeyReused: Si la clave ya se usó para otro lote
+            BatchTooLarge: Si el lote supera la ráfaga de alguna región
+        """
+        unique_ids = list(dict.fromkeys(instance_ids))
+        if idempotency_key is None:
+            return self._stop_instances(unique_ids)
+        
+        batch_ids, results = self.idempotency.get_or_load(
+            ("stop-batch", idempotency_key),
+            lambda: (unique_ids, self._stop_instances(unique_ids)),
+        )
+        if batch_ids != unique_ids:
+            raise IdempotencyKeyReused(f"Idempotency key {idempotency_key} was already used for another batch")
+        return results
+    
+    def _stop_instances(self, unique_ids: List[str]) -> List[StopInstanceResult]:
+        """Aplica la detención de un lote con los locks de sus instancias tomados"""
+        try:
+            logger.info("Attempting to stop %s instances", len(unique_ids))
             
-            if instance.state == InstanceState.TERMINATED:
-                return StopInstanceResponse(
-                    success=False,
-                    message=f"Instance {instance_id} is terminated and cannot be stopped",
-                    instance_id=instance_id,
-                    previous_state=previous_state,
-                    current_state=instance.state
-                )
+            # Validar todo el lote y luego aplicar las transiciones en una sola llamada
+            with self._locks.hold(*unique_ids):
+                found = self.backend.get_instances(unique_ids)
+                decisions = {}
+                transitions = []
+                for instance_id, instance in found.items():
+                    target_state, message = resolve_stop(instance_id, instance.state)
+                    decisions[instance_id] = (instance.state, target_state, message)
+                    if target_state is not None:
+                        transitions.append((instance, target_state))
+                current_states = self._apply_stops(transitions) if transitions else {}
+            if self.backend.shared:
+                # Las instancias que otro proceso cambió en el medio no se aplicaron
+                for instance, _ in transitions:
+                    if instance.id not in current_states:
+                        previous_state = decisions[instance.id][0]
+                        decisions[instance.id] = (
+                            previous_state, None, f"Instance {instance.id} changed state concurrently"
+                        )
+                transitions = [transition for transition in transitions if transition[0].id in current_states]
+            self._record_changes([
+                (instance, decisions[instance.id][0], current_states.get(instance.id, target_state))
+                for instance, target_state in transitions
+            ])
             
-            # Simular el proceso de detener la instancia
-            if instance.state == InstanceState.RUNNING:
-                # Cambiar estado a "stopping"
-                instance.state = InstanceState.STOPPING
-                MOCK_INSTANCES_DB[instance_id] = instance
-                
-                logger.info(f"Instance {instance_id} state changed from {previous_state} to {instance.state}")
+            results = []
+            for instance_id in unique_ids:
+                if instance_id not in decisions:
+                    results.append(StopInstanceResult(
+                        success=False,
+                        message=f"Instance {instance_id} not found",
+                        instance_id=instance_id
+                    ))
+                    continue
                 
-                return StopInstanceResponse(
-                    success=True,
-                    message=f"Instance {instance_id} is now stopping",
+                previous_state, target_state, message = decisions[instance_id]
+                results.append(StopInstanceResult(
+                    success=target_state is not None,
+                    message=message,
                     instance_id=instance_id,
                     previous_state=previous_state,
-                    current_state=instance.state
-                )
+                    current_state=current_states.get(instance_id, target_state or previous_state)
+                ))
             
-            # Para otros estados, intentar detener directamente
-            instance.state = InstanceState.STOPPED
-            MOCK_INSTANCES_DB[instance_id] = instance
-            
-            logger.info(f"Instance {instance_id} stopped successfully")
-            
-            return StopInstanceResponse(
-                success=True,
-                message=f"Instance {instance_id} stopped successfully",
-                instance_id=instance_id,
-                previous_state=previous_state,
-                current_state=instance.state
-            )
-            
-        except ValueError:
+            stopped = sum(1 for result in results if result.success)
+            logger.info("Batch stop finished: %s stopped, %s failed", stopped, len(results) - stopped)
+            return results
+        except (RateLimited, BatchTooLarge):
             raise
         except Exception as e:
-            logger.error(f"Error stopping instance {instance_id}: {str(e)}")
-            raise RuntimeError(f"Failed to stop instance {instance_id}: {str(e)}")
+            logger.error("Error stopping instances: %s", e)
+            raise RuntimeError(f"Failed to stop instances: {str(e)}")
+    
+    def _apply_stops(self, transitions: List[Tuple[EC2Instance, InstanceState]]) -> Dict[str, InstanceState]:
+        """
+        Aplica las detenciones en el backend respetando el límite por región
+        
+        Raises:
+            BatchTooLarge: Si el lote supera la ráfaga de alguna región
+            RateLimited: Si alguna región superó su tasa (no se aplica ninguna)
+            Overloaded: Si el backend respondió con throttling
+        """
+        regions = Counter(_value(instance.region) for instance, _ in transitions)
+        self.admission.admit_regions(regions)
+        try:
+            applied = self.backend.stop_instances(transitions)
+        except Exception as e:
+            self.admission.backend_failed(regions, e)
+            raise
+        self.admission.backend_succeeded(regions)
+        return applied
     
-    def simulate_state_transition(self, instance_id: str):
+    def add_listener(self, listener: Callable[[InstanceStateChange], None]):
+        """
+        Registra una función a invocar con cada cambio de estado
+        
+        Los listeners se ejecutan en el thread que hizo el cambio (el event
+        loop o un thread del pool), por lo que deben ser rápidos y thread-safe.
         """
-        Simula la transición de estado de stopping a stopped
-        Esta función podría ser llamada por un job en segundo plano
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[InstanceStateChange], None]):
+        """Elimina un listener registrado con ``add_listener``"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _record_changes(self, changes: List[Tuple[EC2Instance, InstanceState, InstanceState]]):
+        """Invalida el cache afectado y notifica los cambios de estado a los listeners"""
+        if not changes:
+            return
+        
+        if self.cache is not None:
+            tags = {("region", "*")}
+            for instance, _, _ in changes:
+                tags.add(("instance", instance.id))
+                tags.add(("region", _value(instance.region)))
+            self.cache.invalidate_tags(*tags)
+        
+        if not self._listeners:
+            return
+        changed_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        for instance, previous_state, current_state in changes:
+            change = InstanceStateChange(
+                instance_id=instance.id,
+                region=instance.region,
+                previous_state=previous_state,
+                current_state=current_state,
+                changed_at=changed_at,
+            )
+            for listener in list(self._listeners):
+                try:
+                    listener(change)
+                except Exception as e:
+                    logger.error("State change listener failed for %s: %s", instance.id, e)
+    
+    def simulate_state_transition(self, instance_id: str, from_state: Optional[InstanceState] = None) -> Optional[InstanceState]:
+        """
+        Simula la transición automática desde un estado intermedio
+        (stopping→stopped, pending→running, shutting-down→terminated)
+        Es invocada por el scheduler de transiciones en segundo plano
         
         Args:
             instance_id (str): ID de la instancia
+            from_state (Optional[InstanceState]): Si se indica, la transición
+                solo se aplica si la instancia sigue en ese estado
+        
+        Returns:
+            Optional[InstanceState]: El nuevo estado, o None si no hubo transición
         """
         try:
-            instance = MOCK_INSTANCES_DB.get(instance_id)
-            if instance and instance.state == InstanceState.STOPPING:
-                instance.state = InstanceState.STOPPED
-                MOCK_INSTANCES_DB[instance_id] = instance
-                logger.info(f"Instance {instance_id} transitioned from stopping to stopped")
+            with self._locks.hold(instance_id):
+                instance = self.backend.get_instance(instance_id)
+                if not instance:
+                    return None
+                previous_state = InstanceState(instance.state)
+                target_state = next_state(InstanceAction.COMPLETE, previous_state)
+                if target_state is None or (from_state is not None and previous_state != from_state):
+                    return None
+                
+                if self.backend.set_state(instance_id, target_state, expected_state=previous_state) is None:
+                    return None
+            self._record_changes([(instance, previous_state, target_state)])
+            logger.info("Instance %s transitioned from %s to %s", instance_id, previous_state.value, target_state.value)
+            return target_state
         except Exception as e:
-            logger.error(f"Error during state transition for {instance_id}: {str(e)}")
+            logger.error("Error during state transition for %s: %s", instance_id, e)
+            return None
 
 
 # Instancia global del servicio
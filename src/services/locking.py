@@ -0,0 +1,38 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterator
+
+
+class StripedLock:
+    """
+    Locks por clave repartidos en un número fijo de franjas
+    
+    Cada clave (ID de instancia) se asigna a una franja por hash, de modo que
+    operaciones sobre instancias distintas casi nunca compiten y la memoria
+    no crece con el tamaño de la flota. Para varias claves las franjas se
+    toman siempre en orden ascendente, lo que evita deadlocks entre lotes.
+    """
+    
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
+    
+    def __len__(self) -> int:
+        return len(self._locks)
+    
+    def stripe(self, key: Hashable) -> int:
+        """Índice de la franja que protege ``key``"""
+        return hash(key) % len(self._locks)
+    
+    @contextmanager
+    def hold(self, *keys: Hashable) -> Iterator[None]:
+        """Mantiene tomados los locks de todas las claves mientras dure el bloque"""
+        indexes = sorted({self.stripe(key) for key in keys})
+        acquired = []
+        try:
+            for index in indexes:
+                self._locks[index].acquire()
+                acquired.append(index)
+            yield
+        finally:
+            for index in reversed(acquired):
+                self._locks[index].release()
@@ -0,0 +1,239 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Labels = Tuple[str, ...]
+
+# Latencias en segundos: de 0.5 ms a 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Tamaños de respuesta en bytes: de 100 B a 10 MB
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Métrica con sus valores repartidos en un shard por thread
+    
+    Cada thread escribe solo en su propio dict, sin locks: sumar un valor
+    cuesta un lookup y una suma. El lock se toma únicamente la primera vez
+    que un thread usa la métrica, para registrar su shard, y al leerla se
+    suman los shards de todos los threads.
+    """
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, object]] = []
+        self._lock = threading.Lock()
+    
+    def _shard(self) -> Dict[Labels, object]:
+        """Shard del thread actual, creado en su primer uso"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append(values)
+            return values
+    
+    def _snapshots(self) -> Iterator[List[Tuple[Labels, object]]]:
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # Copiar un dict de claves y valores builtin no suelta el GIL: es atómico
+            yield list(shard.items())
+    
+    def _label_pairs(self, labels: Labels, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        """Métrica en formato de texto de Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Contador monótono"""
+    
+    kind = "counter"
+    
+    def inc(self, labels: Labels = (), amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+    
+    def value(self, labels: Labels = ()) -> float:
+        return sum(dict(snapshot).get(labels, 0) for snapshot in self._snapshots())
+    
+    def _totals(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for snapshot in self._snapshots():
+            for labels, value in snapshot:
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+    
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self._totals().items()):
+            yield f"{self.name}{self._label_pairs(labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Valor que sube y baja; cada shard guarda su aporte neto"""
+    
+    kind = "gauge"
+    
+    def dec(self, labels: Labels = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    """Histograma con buckets fijos"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, labels: Labels = ()):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # Un contador por bucket (más el de +Inf) y la suma al final
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+    
+    def _totals(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for snapshot in self._snapshots():
+            for labels, counts in snapshot:
+                merged = totals.setdefault(labels, [0] * len(counts))
+                for index, count in enumerate(list(counts)):
+                    merged[index] += count
+        return totals
+    
+    def count(self, labels: Labels = ()) -> int:
+        counts = self._totals().get(labels)
+        return int(sum(counts[:-1])) if counts else 0
+    
+    def samples(self) -> Iterator[str]:
+        bounds = [_format_value(float(bucket)) for bucket in self.buckets] + ["+Inf"]
+        for labels, counts in sorted(self._totals().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{self._label_pairs(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{self._label_pairs(labels)} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{self._label_pairs(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Conjunto de métricas expuestas juntas en ``/metrics``"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "Requests HTTP atendidos", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Latencia de los requests HTTP", ("method", "route")
+)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "Tamaño del cuerpo de las respuestas HTTP", ("method", "route"), SIZE_BUCKETS
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests HTTP en curso", ("method",)
+)
+service_duration = registry.histogram(
+    "ec2_service_duration_seconds", "Duración de los métodos de EC2Service", ("method",)
+)
+service_errors = registry.counter(
+    "ec2_service_errors_total", "Excepciones lanzadas por los métodos de EC2Service", ("method", "exception")
+)
+admission_rejections = registry.counter(
+    "ec2_admission_rejections_total", "Mutaciones rechazadas por el control de admisión", ("reason",)
+)
+
+
+def timed(name: str, histogram: Optional[Histogram] = None, errors: Optional[Counter] = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorador que registra la duración y las excepciones de una función"""
+    histogram = histogram or service_duration
+    errors = errors or service_errors
+    labels = (name,)
+    
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> T:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                errors.inc((name, type(e).__name__))
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, labels)
+        return wrapper
+    return decorator
+
+
+def instrument_methods(cls: type) -> type:
+    """
+    Decorador de clase: mide cada método público definido en la clase
+    
+    Los métodos privados (``_``), estáticos y de clase no se miden; los
+    públicos llaman a los privados, que quedan incluidos en su duración.
+    """
+    for attribute, value in list(vars(cls).items()):
+        if not attribute.startswith("_") and inspect.isfunction(value):
+            setattr(cls, attribute, timed(attribute)(value))
+    return cls
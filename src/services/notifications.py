@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.models import AWSRegion, InstanceState, InstanceStateChange
+from src.services.ec2_service import EC2Service, ec2_service
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve(future: asyncio.Future, change: InstanceStateChange):
+    if not future.done():
+        future.set_result(change)
+
+
+class Subscription:
+    """
+    Suscripción a cambios de estado con una cola acotada
+    
+    Si el consumidor no lee a tiempo y la cola se llena, se descartan los
+    eventos más viejos (``dropped`` cuenta cuántos), de modo que un cliente
+    lento no hace crecer la memoria del servidor.
+    """
+    
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        regions: Optional[Set[str]] = None,
+        states: Optional[Set[str]] = None,
+        maxsize: int = 1000,
+    ):
+        self.loop = loop
+        self.regions = regions
+        self.states = states
+        self.dropped = 0
+        self._queue: Deque[InstanceStateChange] = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+    
+    def matches(self, change: InstanceStateChange) -> bool:
+        return (
+            (self.regions is None or change.region in self.regions)
+            and (self.states is None or change.current_state in self.states)
+        )
+    
+    def push(self, change: InstanceStateChange):
+        """Encola un cambio; se ejecuta siempre en el event loop de la suscripción"""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(change)
+        self._ready.set()
+    
+    async def get(self, timeout: Optional[float] = None) -> List[InstanceStateChange]:
+        """
+        Espera y retorna los cambios encolados (vacío si vence el timeout)
+        """
+        if not self._queue:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        changes = list(self._queue)
+        self._queue.clear()
+        return changes
+
+
+def _values(items: Optional[Iterable]) -> Optional[Set[str]]:
+    return {getattr(item, "value", item) for item in items} if items else None
+
+
+class StateChangeHub:
+    """
+    Distribuye los cambios de estado de EC2Service a los requests en espera
+    
+    Cada request que espera un estado registra un future bajo el ID de la
+    instancia. Un cambio de estado solo revisa los futures de esa instancia,
+    de modo que miles de requests estacionados no consumen CPU mientras
+    esperan. Además mantiene suscripciones a todos los cambios (feed SSE),
+    filtradas por región y estado. Los cambios pueden originarse en
+    cualquier thread; futures y colas se actualizan siempre en su propio
+    event loop.
+    """
+    
+    def __init__(self, service: EC2Service):
+        self._waiters: Dict[str, List[Tuple[asyncio.Future, str]]] = {}
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        service.add_listener(self.publish)
+    
+    @property
+    def waiting(self) -> int:
+        """Cantidad de requests en espera"""
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+    
+    @property
+    def subscribers(self) -> int:
+        """Cantidad de suscripciones activas"""
+        return len(self._subscriptions)
+    
+    def publish(self, change: InstanceStateChange):
+        """Listener de EC2Service: despierta a quienes esperaban este estado y a los suscriptores"""
+        with self._lock:
+            waiters = self._waiters.get(change.instance_id)
+            matched = [future for future, state in waiters if state == change.current_state] if waiters else []
+            subscriptions = [subscription for subscription in self._subscriptions if subscription.matches(change)]
+        for future in matched:
+            future.get_loop().call_soon_threadsafe(_resolve, future, change)
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.push, change)
+    
+    @contextmanager
+    def subscribe(
+        self,
+        regions: Optional[Iterable[AWSRegion]] = None,
+        states: Optional[Iterable[InstanceState]] = None,
+        maxsize: int = 1000,
+    ) -> Iterator[Subscription]:
+        """
+        Suscribe al feed de cambios de estado mientras dure el bloque
+        
+        Args:
+            regions (Optional[Iterable[AWSRegion]]): Solo cambios de estas regiones
+            states (Optional[Iterable[InstanceState]]): Solo cambios hacia estos estados
+            maxsize (int): Capacidad de la cola; al llenarse se descartan los más viejos
+        """
+        subscription = Subscription(asyncio.get_running_loop(), _values(regions), _values(states), maxsize)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions.remove(subscription)
+    
+    @contextmanager
+    def watch(self, instance_id: str, state: InstanceState) -> Iterator[asyncio.Future]:
+        """
+        Registra una espera de ``state`` para la instancia mientras dure el bloque
+        
+        El registro se hace antes de leer el estado actual, por lo que un
+        cambio ocurrido entre la lectura y la espera no se pierde.
+        
+        Yields:
+            asyncio.Future: Se resuelve con el InstanceStateChange al alcanzar el estado
+        """
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, InstanceState(state).value)
+        with self._lock:
+            self._waiters.setdefault(instance_id, []).append(entry)
+        try:
+            yield future
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(instance_id)
+                if waiters is not None:
+                    waiters.remove(entry)
+                    if not waiters:
+                        del self._waiters[instance_id]
+            future.cancel()
+
+
+# Instancia global del hub de notificaciones
+state_change_hub = StateChangeHub(ec2_service)
@@ -0,0 +1,167 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import suppress
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.config import Settings, get_settings
+from src.models import InstanceState, InstanceStateChange
+from src.services.async_ec2_service import AsyncEC2Service, async_ec2_service
+
+logger = logging.getLogger(__name__)
+
+# Transiciones aplicadas antes de ceder el event loop a otros requests
+BATCH_SIZE = 500
+
+
+class StateTransitionScheduler:
+    """
+    Scheduler de las transiciones automáticas de estado
+    
+    Reemplaza la invocación manual de ``simulate_state_transition``: cuando
+    una instancia entra en un estado intermedio (stopping, pending,
+    shutting-down) se agenda su transición al estado final luego de la
+    demora configurada para ese estado.
+    
+    Todas las transiciones pendientes viven en un heap ordenado por
+    vencimiento y las procesa una única tarea asyncio, que duerme hasta el
+    próximo vencimiento; no hay una tarea ni un thread por instancia.
+    """
+    
+    def __init__(
+        self,
+        service: AsyncEC2Service,
+        delays: Dict[InstanceState, float],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.service = service
+        self.delays = {InstanceState(state): delay for state, delay in delays.items()}
+        self._clock = clock
+        self._heap: List[Tuple[float, int, str, InstanceState]] = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.applied = 0
+    
+    @classmethod
+    def from_settings(cls, service: AsyncEC2Service, settings: Settings) -> "StateTransitionScheduler":
+        return cls(service, delays={
+            InstanceState.PENDING: settings.ec2_transition_delay_pending,
+            InstanceState.STOPPING: settings.ec2_transition_delay_stopping,
+            InstanceState.SHUTTING_DOWN: settings.ec2_transition_delay_shutting_down,
+        })
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    @property
+    def pending(self) -> int:
+        """Cantidad de transiciones agendadas"""
+        return len(self._heap)
+    
+    async def start(self):
+        """Inicia la tarea del scheduler y agenda las instancias ya en estados intermedios"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.service.service.add_listener(self.on_state_change)
+        await self._schedule_existing()
+        self._task = asyncio.create_task(self._run(), name="state-transition-scheduler")
+        logger.info("State transition scheduler started with %s pending transitions", self.pending)
+    
+    async def stop(self):
+        """Detiene la tarea y descarta las transiciones pendientes"""
+        self.service.service.remove_listener(self.on_state_change)
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        self._loop = None
+        with self._lock:
+            self._heap.clear()
+        logger.info("State transition scheduler stopped")
+    
+    def schedule(self, instance_id: str, from_state: InstanceState, delay: Optional[float] = None):
+        """
+        Agenda la transición automática de una instancia
+        
+        Es thread-safe: puede invocarse desde el event loop o desde el pool
+        de threads del backend.
+        
+        Args:
+            instance_id (str): ID de la instancia
+            from_state (InstanceState): Estado intermedio desde el que transiciona
+            delay (Optional[float]): Demora en segundos; por defecto la
+                configurada para ``from_state``
+        """
+        from_state = InstanceState(from_state)
+        if delay is None:
+            delay = self.delays.get(from_state)
+            if delay is None:
+                return
+        due = self._clock() + delay
+        with self._lock:
+            earliest = not self._heap or due < self._heap[0][0]
+            heapq.heappush(self._heap, (due, next(self._counter), instance_id, from_state))
+        # Solo hace falta despertar la tarea si cambió el próximo vencimiento
+        loop = self._loop
+        if earliest and loop is not None:
+            loop.call_soon_threadsafe(self._wakeup.set)
+    
+    def on_state_change(self, change: InstanceStateChange):
+        """Listener de EC2Service: agenda las instancias que entran en un estado intermedio"""
+        if self._loop is None:
+            return
+        state = InstanceState(change.current_state)
+        if state in self.delays:
+            self.schedule(change.instance_id, state)
+    
+    async def _schedule_existing(self):
+        for state in self.delays:
+            async for page in self.service.iter_pages(1000, state=state):
+                for instance in page:
+                    self.schedule(instance.id, state)
+    
+    def _pop_due(self) -> List[Tuple[str, InstanceState]]:
+        now = self._clock()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, instance_id, from_state = heapq.heappop(self._heap)
+                due.append((instance_id, from_state))
+        return due
+    
+    def _next_timeout(self) -> Optional[float]:
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self._clock())
+    
+    async def _run(self):
+        while True:
+            for position, (instance_id, from_state) in enumerate(self._pop_due(), start=1):
+                try:
+                    await self.service.simulate_state_transition(instance_id, from_state)
+                    self.applied += 1
+                except Exception as e:
+                    logger.error("Scheduled transition failed for %s: %s", instance_id, e)
+                if position % BATCH_SIZE == 0:
+                    await asyncio.sleep(0)
+            
+            # Se limpia el evento antes de calcular el timeout para no perder avisos
+            self._wakeup.clear()
+            timeout = self._next_timeout()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+
+# Instancia global del scheduler
+transition_scheduler = StateTransitionScheduler.from_settings(async_ec2_service, get_settings())
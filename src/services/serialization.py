@@ -0,0 +1,63 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.models import EC2Instance
+
+
+class InstanceJSONCache:
+    """
+    Cache de la serialización JSON de cada instancia
+    
+    Guarda los bytes de cada instancia junto a la versión de su último
+    cambio; si la versión actual difiere, la entrada se considera inválida y
+    se vuelve a serializar. Las respuestas de listados se arman uniendo estos
+    fragmentos, sin volver a validar ni serializar los modelos.
+    
+    Al superar ``maxsize`` entradas se descartan las más antiguas.
+    
+    Con backends bloqueantes se usa desde los threads del pool: la lectura,
+    la inserción y el descarte se hacen con un lock tomado, y la
+    serialización fuera de él.
+    """
+    
+    def __init__(self, maxsize: int = 200_000):
+        self.maxsize = maxsize
+        self._entries: Dict[str, Tuple[int, bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def dumps(self, instance: EC2Instance, version: Optional[int]) -> bytes:
+        """
+        Retorna el JSON de la instancia, reutilizando el cacheado si sigue vigente
+        
+        Args:
+            instance (EC2Instance): Instancia a serializar
+            version (Optional[int]): Versión actual de la instancia; sin versión
+                no se cachea
+        """
+        with self._lock:
+            entry = self._entries.get(instance.id)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        data = instance.model_dump_json().encode()
+        if version is not None:
+            with self._lock:
+                if instance.id not in self._entries and len(self._entries) >= self.maxsize:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[instance.id] = (version, data)
+        return data
+    
+    def join(self, fragments: Iterable[bytes], separator: bytes = b",", prefix: bytes = b"[", suffix: bytes = b"]") -> bytes:
+        """Une fragmentos ya serializados en un único cuerpo de respuesta"""
+        return prefix + separator.join(fragments) + suffix
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,60 @@
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+from src.models import InstanceState
+
+
+class InstanceAction(str, Enum):
+    """Acciones que provocan un cambio de estado"""
+    STOP = "stop"          # Solicitada por un cliente
+    COMPLETE = "complete"  # EC2 completa por sí solo un estado intermedio
+
+
+# Tabla de transiciones válidas: acción -> estado actual -> nuevo estado
+TRANSITIONS: Dict[InstanceAction, Dict[InstanceState, InstanceState]] = {
+    InstanceAction.STOP: {
+        InstanceState.RUNNING: InstanceState.STOPPING,
+        InstanceState.PENDING: InstanceState.STOPPED,
+    },
+    InstanceAction.COMPLETE: {
+        InstanceState.PENDING: InstanceState.RUNNING,
+        InstanceState.STOPPING: InstanceState.STOPPED,
+        InstanceState.SHUTTING_DOWN: InstanceState.TERMINATED,
+    },
+}
+
+# Mensajes de una detención según el estado actual
+STOP_MESSAGES: Dict[InstanceState, str] = {
+    InstanceState.RUNNING: "Instance {instance_id} is now stopping",
+    InstanceState.PENDING: "Instance {instance_id} stopped successfully",
+    InstanceState.STOPPING: "Instance {instance_id} is already stopping",
+    InstanceState.SHUTTING_DOWN: "Instance {instance_id} is already stopping",
+    InstanceState.STOPPED: "Instance {instance_id} is already stopped",
+    InstanceState.TERMINATED: "Instance {instance_id} is terminated and cannot be stopped",
+}
+
+
+def next_state(action: InstanceAction, state: InstanceState) -> Optional[InstanceState]:
+    """
+    Busca en la tabla el estado al que lleva una acción
+    
+    Args:
+        action (InstanceAction): Acción a aplicar
+        state (InstanceState): Estado actual (enum o su valor)
+        
+    Returns:
+        Optional[InstanceState]: El nuevo estado, o None si la transición no es válida
+    """
+    return TRANSITIONS[action].get(InstanceState(state))
+
+
+def resolve_stop(instance_id: str, state: InstanceState) -> Tuple[Optional[InstanceState], str]:
+    """
+    Decide la transición de una detención a partir del estado actual
+    
+    Returns:
+        Tuple[Optional[InstanceState], str]: El nuevo estado (None si la
+        instancia no se puede detener) y el mensaje para el cliente
+    """
+    state = InstanceState(state)
+    return next_state(InstanceAction.STOP, state), STOP_MESSAGES[state].format(instance_id=instance_id)
@@ -0,0 +1,21 @@
+import csv
+import io
+from typing import Iterable
+
+from src.models import EC2Instance
+
+
+# Columnas del export CSV, en el orden del modelo
+CSV_FIELDS = list(EC2Instance.model_fields)
+
+
+def to_csv(instances: Iterable[EC2Instance], include_header: bool = False) -> bytes:
+    """Serializa instancias como filas CSV, opcionalmente precedidas por el encabezado"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if include_header:
+        writer.writerow(CSV_FIELDS)
+    for instance in instances:
+        data = instance.model_dump(mode="json")
+        writer.writerow("" if data[field] is None else data[field] for field in CSV_FIELDS)
+    return buffer.getvalue().encode()
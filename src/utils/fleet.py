@@ -0,0 +1,315 @@
+import gc
+import math
+import random
+import sys
+from array import array
+from calendar import timegm
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+from src.repositories import InstanceRepository
+from src.repositories.encoding import REGIONS, STATES, TYPES, Codes, unpack_ipv4, unpack_timestamp
+from src.repositories.instance_repository import EMPTY
+
+T = TypeVar("T")
+
+# Distribuciones aproximadas de una flota real: pesos relativos por valor
+STATE_WEIGHTS: Dict[InstanceState, float] = {
+    InstanceState.RUNNING: 70,
+    InstanceState.STOPPED: 17,
+    InstanceState.TERMINATED: 6,
+    InstanceState.PENDING: 3,
+    InstanceState.STOPPING: 3,
+    InstanceState.SHUTTING_DOWN: 1,
+}
+
+REGION_WEIGHTS: Dict[AWSRegion, float] = {
+    AWSRegion.US_EAST_1: 35,
+    AWSRegion.US_WEST_2: 15,
+    AWSRegion.EU_WEST_1: 12,
+    AWSRegion.EU_CENTRAL_1: 8,
+    AWSRegion.AP_SOUTHEAST_1: 8,
+    AWSRegion.AP_NORTHEAST_1: 8,
+    AWSRegion.US_WEST_1: 7,
+    AWSRegion.SA_EAST_1: 7,
+}
+
+TYPE_WEIGHTS: Dict[InstanceType, float] = {
+    InstanceType.T3_MICRO: 20,
+    InstanceType.T3_SMALL: 15,
+    InstanceType.T3_MEDIUM: 15,
+    InstanceType.M5_LARGE: 12,
+    InstanceType.T2_MICRO: 10,
+    InstanceType.C5_LARGE: 8,
+    InstanceType.M5_XLARGE: 6,
+    InstanceType.T2_SMALL: 5,
+    InstanceType.T2_MEDIUM: 5,
+    InstanceType.C5_XLARGE: 4,
+}
+
+ROLES = ("web", "api", "worker", "database", "cache", "batch", "monitoring", "bastion")
+ENVIRONMENTS = ("prod", "prod", "prod", "staging", "dev", "test")
+# Todas las combinaciones rol-entorno, con los entornos repetidos según su peso
+NAME_PREFIXES = [f"{role}-{environment}-" for role in ROLES for environment in ENVIRONMENTS]
+
+# Primer octeto de las IPs públicas de cada región
+PUBLIC_IP_PREFIXES: Dict[AWSRegion, Tuple[int, ...]] = {
+    AWSRegion.US_EAST_1: (3, 18, 34, 44, 54),
+    AWSRegion.US_WEST_1: (13, 52, 54),
+    AWSRegion.US_WEST_2: (34, 35, 44, 52, 54),
+    AWSRegion.EU_WEST_1: (3, 34, 52, 54),
+    AWSRegion.EU_CENTRAL_1: (3, 18, 35, 52),
+    AWSRegion.AP_SOUTHEAST_1: (13, 18, 52, 54),
+    AWSRegion.AP_NORTHEAST_1: (3, 13, 35, 54),
+    AWSRegion.SA_EAST_1: (15, 18, 52, 54),
+}
+
+# Estados en los que una instancia conserva su IP pública
+PUBLIC_IP_STATES = {InstanceState.RUNNING.value, InstanceState.PENDING.value, InstanceState.STOPPING.value}
+PUBLIC_IP_RATIO = 0.6
+
+# Fecha de referencia fija para que la flota no dependa del reloj
+REFERENCE_TIME = timegm((2024, 6, 1, 0, 0, 0))
+
+# Multiplicador impar: recorre los 2**68 IDs posibles sin repetir
+ID_SPACE = 1 << 68
+ID_MASK = ID_SPACE - 1
+ID_MULTIPLIER = 0x9E3779B97F4A7C15
+
+MAX_AGE_DAYS = 3 * 365
+MEAN_AGE_DAYS = 120
+
+
+@lru_cache(maxsize=None)
+def _launch_time_tables() -> Tuple[List[int], List[float]]:
+    """
+    Días (segundos desde epoch a las 00:00 UTC) con sus pesos acumulados
+    
+    Se arman en el primer uso y no al importar el módulo.
+    """
+    days = [REFERENCE_TIME - age * 86400 for age in range(1, MAX_AGE_DAYS + 1)]
+    day_cum_weights = list(accumulate(math.exp(-age / MEAN_AGE_DAYS) for age in range(1, MAX_AGE_DAYS + 1)))
+    return days, day_cum_weights
+
+
+# Instancias por bloque de generación
+CHUNK_SIZE = 10_000
+
+SECONDS_OF_DAY = range(86400)
+# El último octeto de un host no es 0 ni 255
+HOST_OCTETS = range(1, 255)
+# Múltiplo de la cantidad de prefijos públicos de cada región
+PREFIX_SLOTS = math.lcm(*(len(prefixes) for prefixes in PUBLIC_IP_PREFIXES.values()))
+
+# Tablas de ``bytes.translate``, indexadas por byte (aleatorio o código)
+SUBNET_TABLE = bytes(value % 16 for value in range(256))
+REGION_BLOCK_TABLE = bytes(code * 16 % 256 for code in range(256))
+PUBLIC_STATE_TABLE = bytes(
+    0xFF if code < len(STATES.values) and STATES.values[code] in PUBLIC_IP_STATES else 0 for code in range(256)
+)
+PUBLIC_IP_TABLE = bytes(0xFF if value < round(PUBLIC_IP_RATIO * 256) else 0 for value in range(256))
+# Primer octeto público de cada (región, slot); cada región repite sus prefijos
+PUBLIC_FIRST_OCTETS = [
+    prefixes[slot % len(prefixes)]
+    for prefixes in (PUBLIC_IP_PREFIXES[AWSRegion(region)] for region in REGIONS.values)
+    for slot in range(PREFIX_SLOTS)
+]
+
+
+def _sample(rng: random.Random, weights: Dict[T, float], codes: Codes, size: int) -> bytes:
+    """Muestra ``size`` valores según sus pesos, ya codificados para el repositorio"""
+    return bytes(rng.choices([codes.encode(item) for item in weights], weights=list(weights.values()), k=size))
+
+
+def _launch_times(rng: random.Random, size: int) -> array:
+    """Fechas de lanzamiento con más instancias recientes que viejas (edad exponencial, en días)"""
+    days, day_cum_weights = _launch_time_tables()
+    days = rng.choices(days, cum_weights=day_cum_weights, k=size)
+    return array("q", list(map(int.__add__, days, rng.choices(SECONDS_OF_DAY, k=size))))
+
+
+def _mask(data: bytes, mask: bytes) -> bytes:
+    """AND byte a byte de dos buffers del mismo largo, sin recorrerlos en Python"""
+    return (int.from_bytes(data, "big") & int.from_bytes(mask, "big")).to_bytes(len(data), "big")
+
+
+def _ipv4s(first: bytes, second: bytes, third: bytes, fourth: bytes, keep: Optional[bytes] = None) -> array:
+    """
+    Empaqueta las IPs a partir de sus cuatro octetos, una columna por octeto
+    
+    Las filas con ``keep`` en 0 quedan en ``EMPTY`` (sin IP).
+    """
+    packed = bytearray(4 * len(first))
+    packed[0::4], packed[1::4], packed[2::4], packed[3::4] = first, second, third, fourth
+    if keep is not None:
+        mask = bytearray(len(packed))
+        mask[0::4] = mask[1::4] = mask[2::4] = mask[3::4] = keep
+        packed = _mask(packed, mask)
+    ips = array("I", packed)
+    if sys.byteorder == "little":
+        ips.byteswap()
+    return ips
+
+
+def _private_ips(rng: random.Random, regions: bytes) -> array:
+    """IPs privadas: cada región usa su propio bloque 10.x.0.0/12"""
+    size = len(regions)
+    subnets = rng.randbytes(size).translate(SUBNET_TABLE)
+    second = bytes(map(int.__or__, regions.translate(REGION_BLOCK_TABLE), subnets))
+    return _ipv4s(b"\x0a" * size, second, rng.randbytes(size), bytes(rng.choices(HOST_OCTETS, k=size)))
+
+
+def _public_ips(rng: random.Random, states: bytes, regions: bytes) -> array:
+    """IPs públicas del rango de cada región, solo para una parte de las instancias encendidas"""
+    size = len(states)
+    slots = map(int.__add__, map(PREFIX_SLOTS.__mul__, regions), rng.choices(range(PREFIX_SLOTS), k=size))
+    first = bytes(map(PUBLIC_FIRST_OCTETS.__getitem__, slots))
+    keep = _mask(rng.randbytes(size).translate(PUBLIC_IP_TABLE), states.translate(PUBLIC_STATE_TABLE))
+    return _ipv4s(first, rng.randbytes(size), rng.randbytes(size), bytes(rng.choices(HOST_OCTETS, k=size)), keep)
+
+
+def _chunk_columns(seed: int, chunk: int) -> Dict[str, object]:
+    """
+    Genera las columnas del bloque ``chunk`` con su propio generador aleatorio
+    
+    El bloque se genera siempre completo, de modo que sus instancias no
+    dependen del tamaño de la flota. Las columnas tienen el formato de
+    ``InstanceRepository.load_columns``: estado, región y tipo en códigos,
+    IPs y fechas ya empaquetadas.
+    """
+    size = CHUNK_SIZE
+    rng = random.Random(f"{seed}-{chunk}")
+    numbers = range(chunk * size, (chunk + 1) * size)
+    states = _sample(rng, STATE_WEIGHTS, STATES, size)
+    regions = _sample(rng, REGION_WEIGHTS, REGIONS, size)
+    types = _sample(rng, TYPE_WEIGHTS, TYPES, size)
+    first = chunk * size * ID_MULTIPLIER + seed
+    keys = map(ID_MASK.__and__, range(first, first + size * ID_MULTIPLIER, ID_MULTIPLIER))
+    return {
+        "ids": list(map("i-%017x".__mod__, keys)),
+        "names": list(map("%s%07d".__mod__, zip(rng.choices(NAME_PREFIXES, k=size), numbers))),
+        "states": states,
+        "regions": regions,
+        "types": types,
+        "launch_times": _launch_times(rng, size),
+        "private_ips": _private_ips(rng, regions),
+        "public_ips": _public_ips(rng, states, regions),
+    }
+
+
+def iter_fleet_columns(size: int, seed: int = 42) -> Iterator[Dict[str, object]]:
+    """
+    Genera una flota sintética por columnas, un bloque de ``CHUNK_SIZE`` a la vez
+    
+    Es el camino de carga masiva: cada bloque se pasa directamente a
+    ``InstanceRepository.load_columns``, sin crear un modelo por instancia.
+    
+    Args:
+        size (int): Cantidad de instancias
+        seed (int): Semilla del generador
+    
+    Returns:
+        Iterator[Dict[str, object]]: Las columnas de cada bloque, recortadas a ``size``
+    """
+    for chunk, chunk_start in enumerate(range(0, size, CHUNK_SIZE)):
+        columns = _chunk_columns(seed, chunk)
+        count = size - chunk_start
+        if count < CHUNK_SIZE:
+            columns = {field: values[:count] for field, values in columns.items()}
+        yield columns
+
+
+def iter_fleet(size: int, seed: int = 42) -> Iterator[EC2Instance]:
+    """
+    Genera una flota sintética de forma determinista
+    
+    La misma ``seed`` produce siempre las mismas instancias, y una flota más
+    grande extiende a una más chica sin cambiar sus primeras instancias. Se
+    genera por bloques de ``CHUNK_SIZE``: cada columna del bloque (estado,
+    región, tipo, fecha, IPs) se arma de una vez con ``random.choices`` y
+    ``random.randbytes`` (ver ``iter_fleet_columns``) y las instancias se crean con
+    ``model_construct``, sin validación. Para cargar la flota en un
+    repositorio conviene ``load_fleet``, que no crea las instancias.
+    
+    Args:
+        size (int): Cantidad de instancias (pensado para 10k a 5M)
+        seed (int): Semilla del generador
+    
+    Returns:
+        Iterator[EC2Instance]: Las instancias, en orden de generación
+    """
+    construct = EC2Instance.model_construct
+    states, regions, types = STATES.values, REGIONS.values, TYPES.values
+    for columns in iter_fleet_columns(size, seed=seed):
+        rows = zip(
+            columns["ids"],
+            columns["names"],
+            columns["types"],
+            columns["states"],
+            columns["regions"],
+            columns["launch_times"],
+            columns["private_ips"],
+            columns["public_ips"],
+        )
+        for instance_id, name, instance_type, state, region, launch_time, private_ip, public_ip in rows:
+            yield construct(
+                id=instance_id,
+                name=name,
+                type=types[instance_type],
+                state=states[state],
+                region=regions[region],
+                launch_time=unpack_timestamp(launch_time),
+                private_ip=unpack_ipv4(private_ip),
+                public_ip=unpack_ipv4(public_ip) if public_ip != EMPTY else None,
+            )
+
+
+def load_fleet(repository: InstanceRepository, size: int, seed: int = 42) -> InstanceRepository:
+    """
+    Agrega una flota sintética a un repositorio por columnas (ver ``iter_fleet_columns``)
+    
+    Produce las mismas instancias que ``iter_fleet`` sin crear ningún
+    ``EC2Instance``: un millón de instancias se genera y se indexa en pocos
+    segundos.
+    
+    Returns:
+        InstanceRepository: El mismo ``repository``
+    """
+    repository.load_columns(iter_fleet_columns(size, seed=seed))
+    return repository
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Pausa el garbage collector cíclico mientras dure el bloque
+    
+    Crear millones de objetos dispara colecciones completas repetidas que
+    no liberan nada; pausarlo reduce a la mitad el tiempo de carga.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def generate_fleet(size: int, seed: int = 42) -> List[EC2Instance]:
+    """
+    Genera una flota sintética completa en memoria (ver ``iter_fleet``)
+    
+    Args:
+        size (int): Cantidad de instancias
+        seed (int): Semilla del generador
+    
+    Returns:
+        List[EC2Instance]: Las instancias generadas
+    """
+    with gc_paused():
+        return list(iter_fleet(size, seed=seed))
+
@@ -1,6 +1,10 @@
 from datetime import datetime, timezone
-from typing import List
+from itertools import chain
+from typing import Iterator, List
+from src.config import Settings, get_settings
 from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+from src.repositories import InstanceRepository
+from src.utils.fleet import gc_paused, iter_fleet, load_fleet
 
 
 def get_mock_instances() -> List[EC2Instance]:
@@ -59,5 +63,39 @@ def get_mock_instances() -> List[EC2Instance]:
     ]
 
 
-# Simulamos una base de datos en memoria
-MOCK_INSTANCES_DB = {instance.id: instance for instance in get_mock_instances()}
+def iter_mock_fleet(settings: Settings) -> Iterator[EC2Instance]:
+    """
+    Itera las instancias iniciales de la base simulada
+    
+    Son las instancias de ejemplo más, si se define ``EC2_MOCK_FLEET_SIZE``,
+    una flota sintética de ese tamaño generada con ``EC2_MOCK_FLEET_SEED``.
+    La flota se genera a medida que se consume.
+    """
+    instances = get_mock_instances()
+    if settings.ec2_mock_fleet_size <= 0:
+        return iter(instances)
+    return chain(instances, iter_fleet(settings.ec2_mock_fleet_size, seed=settings.ec2_mock_fleet_seed))
+
+
+def load_mock_fleet(settings: Settings) -> InstanceRepository:
+    """
+    Crea el repositorio con las instancias de ``iter_mock_fleet``
+    
+    La flota sintética se carga por columnas (``load_fleet``), sin crear un
+    ``EC2Instance`` por instancia.
+    """
+    repository = InstanceRepository(get_mock_instances())
+    if settings.ec2_mock_fleet_size > 0:
+        load_fleet(repository, settings.ec2_mock_fleet_size, seed=settings.ec2_mock_fleet_seed)
+    return repository
+
+
+def __getattr__(name: str):
+    # La base simulada, en memoria e indexada por estado, región y tipo, se
+    # carga en el primer acceso: con persistencia (EC2_DATA_DIR) no se usa
+    if name == "MOCK_INSTANCES_DB":
+        global MOCK_INSTANCES_DB
+        with gc_paused():
+            MOCK_INSTANCES_DB = load_mock_fleet(get_settings())
+        return MOCK_INSTANCES_DB
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,260 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from src.app import app
+from src.config import Settings
+from src.models import InstanceState
+from src.repositories import InstanceRepository
+from src.services.admission import (
+    AdmissionControl,
+    BatchTooLarge,
+    Overloaded,
+    RateLimited,
+    RateLimiter,
+    is_throttling,
+)
+from src.services.backends import InMemoryBackend
+from src.services.ec2_service import EC2Service, ec2_service
+from src.services.metrics import admission_rejections
+from src.utils.mock_data import get_mock_instances
+
+client = TestClient(app)
+
+
+class FakeClock:
+    """Reloj controlable para probar la recarga de los buckets"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class ThrottlingError(Exception):
+    """Error con la forma de un ``botocore.exceptions.ClientError``"""
+    
+    def __init__(self, code: str = "RequestLimitExceeded"):
+        super().__init__(f"An error occurred ({code})")
+        self.response = {"Error": {"Code": code}}
+
+
+class TestRateLimiter:
+    """Tests para los token buckets por clave"""
+    
+    def test_burst_then_refill(self):
+        """Test para admitir una ráfaga y luego a la tasa configurada"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=3, clock=clock)
+        
+        assert [limiter.acquire({"a": 1}) for _ in range(4)] == [None, None, None, "a"]
+        assert limiter.retry_after("a") == pytest.approx(0.5)
+        # Otra clave tiene su propio bucket
+        assert limiter.acquire({"b": 1}) is None
+        
+        clock.now = 0.5
+        assert limiter.acquire({"a": 1}) is None
+        assert limiter.acquire({"a": 1}) == "a"
+    
+    def test_all_or_nothing(self):
+        """Test para no consumir tokens de ninguna clave si alguna no alcanza"""
+        limiter = RateLimiter(rate=1, burst=5, clock=FakeClock())
+        assert limiter.acquire({"us-east-1": 4}) is None
+        
+        assert limiter.acquire({"eu-west-1": 2, "us-east-1": 2}) == "us-east-1"
+        assert limiter.acquire({"eu-west-1": 5}) is None
+    
+    def test_costs_above_burst_never_admitted(self):
+        """Test para cobrar el costo completo y no admitir un costo mayor a la ráfaga"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=10, burst=5, clock=clock)
+        
+        assert limiter.exceeds_burst(6) and not limiter.exceeds_burst(5)
+        assert not RateLimiter(rate=0, burst=5).exceeds_burst(50)
+        assert limiter.acquire({"a": 50}) == "a"
+        assert limiter.acquire({"a": 5}) is None
+        assert limiter.acquire({"a": 1}) == "a"
+    
+    def test_disabled_and_lru(self):
+        """Test para no limitar con tasa 0 y recordar a lo sumo maxsize claves"""
+        assert RateLimiter(rate=0, burst=1).acquire({"a": 100}) is None
+        
+        limiter = RateLimiter(rate=1, burst=1, maxsize=2, clock=FakeClock())
+        for key in ("a", "b", "c"):
+            limiter.acquire({key: 1})
+        assert len(limiter) == 2
+        # "a" fue desalojada: vuelve con el bucket lleno
+        assert limiter.acquire({"a": 1}) is None
+    
+    def test_adaptive_backoff_and_recovery(self):
+        """Test para reducir la tasa ante throttling y recuperarla con los éxitos"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=10, burst=10, clock=clock)
+        limiter.acquire({"us-east-1": 1})
+        
+        limiter.backoff("us-east-1")
+        limiter.backoff("us-east-1")
+        assert limiter.rate_for("us-east-1") == pytest.approx(5)
+        assert limiter.acquire({"us-east-1": 1}) == "us-east-1"
+        
+        clock.now = 1.0
+        limiter.backoff("us-east-1")
+        assert limiter.rate_for("us-east-1") == pytest.approx(2.5)
+        
+        for _ in range(100):
+            limiter.recover("us-east-1")
+        assert limiter.rate_for("us-east-1") == 10
+
+
+class TestAdmissionControl:
+    """Tests para los límites de admisión"""
+    
+    def test_in_flight_cap(self):
+        """Test para rechazar mutaciones por encima del tope y liberar lugares"""
+        admission = AdmissionControl(RateLimiter(0, 1), RateLimiter(0, 1), max_in_flight=1)
+        admission.enter()
+        
+        with pytest.raises(Overloaded) as error:
+            admission.enter()
+        assert error.value.retry_after_header == "1"
+        
+        admission.leave()
+        admission.enter()
+    
+    def test_region_limit(self):
+        """Test para limitar las instancias por región con el tiempo de espera correcto"""
+        admission = AdmissionControl(RateLimiter(0, 1), RateLimiter(1, 2, clock=FakeClock()))
+        admission.admit_regions({"us-east-1": 2})
+        
+        with pytest.raises(RateLimited) as error:
+            admission.admit_regions({"us-east-1": 1, "eu-west-1": 1})
+        assert not isinstance(error.value, Overloaded)
+        assert error.value.reason == "region"
+        assert error.value.retry_after == pytest.approx(1)
+    
+    def test_batch_larger_than_region_burst(self):
+        """Test para rechazar un lote con más instancias en una región que su ráfaga"""
+        admission = AdmissionControl(RateLimiter(0, 1), RateLimiter(2, 10, clock=FakeClock()))
+        
+        with pytest.raises(BatchTooLarge) as error:
+            admission.admit_regions({"us-east-1": 1000})
+        assert "split the batch" in str(error.value)
+        assert not isinstance(error.value, RateLimited)
+        assert (error.value.region, error.value.limit) == ("us-east-1", 10)
+        # El bucket sigue lleno para lotes que sí entran
+        admission.admit_regions({"us-east-1": 10})
+    
+    def test_adaptive_requires_region_rate(self):
+        """Test para fallar al configurar el modo adaptativo sin límite por región"""
+        with pytest.raises(ValueError):
+            AdmissionControl.from_settings(Settings(ec2_rate_limit_adaptive=True))
+        assert AdmissionControl.from_settings(
+            Settings(ec2_rate_limit_adaptive=True, ec2_rate_limit_region_rate=5)
+        ).adaptive
+    
+    def test_throttling_detection(self):
+        """Test para reconocer el throttling de AWS en la cadena de excepciones"""
+        try:
+            try:
+                raise ThrottlingError()
+            except ThrottlingError as e:
+                raise RuntimeError("Failed to stop") from e
+        except RuntimeError as e:
+            assert is_throttling(e)
+        assert not is_throttling(ThrottlingError("InvalidInstanceID.NotFound"))
+        assert not is_throttling(ValueError("boom"))
+
+
+class TestServiceAdmission:
+    """Tests para los límites por región y el throttling en EC2Service"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.backend = InMemoryBackend(InstanceRepository(get_mock_instances()))
+        self.service = EC2Service(backend=self.backend, cache=None)
+        self.service.admission = AdmissionControl(
+            RateLimiter(0, 1),
+            RateLimiter(1, 1, clock=FakeClock()),
+            adaptive=True,
+        )
+    
+    def test_region_limit_rejects_without_applying(self):
+        """Test para rechazar la detención sin tocar la instancia"""
+        self.service.stop_instance("i-1234567890abcdef0")
+        
+        # i-0987654321fedcba0 también está en us-east-1
+        with pytest.raises(RateLimited):
+            self.service.stop_instance("i-0987654321fedcba0")
+        assert self.backend.get_instance("i-0987654321fedcba0").state == InstanceState.RUNNING
+        
+        # Otra región tiene su propio bucket
+        results = self.service.stop_instances(["i-fedcba0987654321"])
+        assert results[0].success
+    
+    def test_backend_throttling_backs_off(self):
+        """Test para reportar el throttling del backend como sobrecarga y reducir la tasa de la región"""
+        rejected = admission_rejections.value(("backend",))
+        
+        with patch.object(self.backend, "stop_instances", side_effect=ThrottlingError()):
+            with pytest.raises(Overloaded) as error:
+                self.service.stop_instances(["i-1234567890abcdef0"])
+        
+        assert error.value.retry_after >= 1
+        assert self.service.admission.regions.rate_for("us-east-1") == pytest.approx(0.5)
+        assert admission_rejections.value(("backend",)) == rejected + 1
+
+
+class TestAdmissionRoutes:
+    """Tests para los rechazos HTTP con Retry-After"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        from src.utils.mock_data import MOCK_INSTANCES_DB
+        MOCK_INSTANCES_DB.clear()
+        MOCK_INSTANCES_DB.update({instance.id: instance for instance in get_mock_instances()})
+    
+    def test_client_rate_limit(self):
+        """Test para responder 429 al superar la tasa del cliente, sin afectar las lecturas"""
+        limiter = RateLimiter(rate=0.5, burst=1, clock=FakeClock())
+        with patch.object(ec2_service.admission, "clients", limiter):
+            assert client.post("/instances/i-1234567890abcdef0/stop").status_code == 200
+            response = client.post("/instances/i-0987654321fedcba0/stop")
+            assert client.get("/instances/").status_code == 200
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "2"
+        assert "Rate limit exceeded" in response.json()["detail"]
+    
+    def test_in_flight_cap(self):
+        """Test para responder 503 cuando se alcanzó el tope de mutaciones en curso"""
+        with patch.object(ec2_service.admission, "in_flight", 1), \
+                patch.object(ec2_service.admission, "max_in_flight", 1):
+            response = client.post("/instances/stop", json={"instance_ids": ["i-1234567890abcdef0"]})
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    
+    def test_region_rate_limit(self):
+        """Test para responder 429 cuando la región de la instancia superó su tasa"""
+        limiter = RateLimiter(rate=1, burst=1, clock=FakeClock())
+        with patch.object(ec2_service.admission, "regions", limiter):
+            assert client.post("/instances/i-1234567890abcdef0/stop").status_code == 200
+            response = client.post("/instances/stop", json={"instance_ids": ["i-0987654321fedcba0"]})
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+        assert "us-east-1" in response.json()["detail"]
+    
+    def test_batch_larger_than_region_burst(self):
+        """Test para responder 413 sin Retry-After a un lote que ninguna espera haría admisible"""
+        limiter = RateLimiter(rate=1, burst=1, clock=FakeClock())
+        with patch.object(ec2_service.admission, "regions", limiter):
+            response = client.post(
+                "/instances/stop", json={"instance_ids": ["i-1234567890abcdef0", "i-0987654321fedcba0"]}
+            )
+        
+        assert response.status_code == 413
+        assert "Retry-After" not in response.headers
+        assert "split the batch" in response.json()["detail"]
+        assert ec2_service.get_instance_by_id("i-1234567890abcdef0").state == InstanceState.RUNNING
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.models import AWSRegion, InstanceState, RegionFailure
+from src.repositories import InstanceRepository
+from src.services.async_ec2_service import AsyncEC2Service
+from src.services.backends import InMemoryBackend
+from src.services.ec2_service import EC2Service
+from src.utils.mock_data import get_mock_instances
+
+
+class SlowBackend(InMemoryBackend):
+    """Backend en memoria que simula la latencia de I/O de boto3"""
+    
+    blocking = True
+    
+    def __init__(self, repository, delay: float):
+        super().__init__(repository)
+        self.delay = delay
+        self.threads = set()
+    
+    def get_instance(self, instance_id):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return super().get_instance(instance_id)
+
+
+class TestAsyncEC2Service:
+    """Tests para la fachada asíncrona del servicio"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.repository = InstanceRepository(get_mock_instances())
+    
+    @pytest.mark.asyncio
+    async def test_non_blocking_backend_runs_inline(self):
+        """Test para backends en memoria: se invocan sin thread pool"""
+        service = AsyncEC2Service(EC2Service(backend=InMemoryBackend(self.repository)))
+        
+        result = await service.stop_instance("i-1234567890abcdef0")
+        
+        assert result.current_state == InstanceState.STOPPING
+        assert service._executor is None
+    
+    @pytest.mark.asyncio
+    async def test_blocking_backend_runs_concurrently(self):
+        """Test para backends bloqueantes: las llamadas no serializan el event loop"""
+        backend = SlowBackend(self.repository, delay=0.2)
+        service = AsyncEC2Service(EC2Service(backend=backend, cache=None), max_concurrency=8)
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            service.get_instance_by_id("i-1234567890abcdef0") for _ in range(8)
+        ])
+        elapsed = time.perf_counter() - started
+        service.shutdown()
+        
+        assert all(instance is not None for instance in results)
+        assert elapsed < 0.2 * 4
+        assert all(name.startswith("ec2-backend") for name in backend.threads)
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Test para el límite de llamadas concurrentes al backend"""
+        backend = SlowBackend(self.repository, delay=0.1)
+        service = AsyncEC2Service(EC2Service(backend=backend, cache=None), max_concurrency=2)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            service.get_instance_by_id("i-1234567890abcdef0") for _ in range(4)
+        ])
+        elapsed = time.perf_counter() - started
+        service.shutdown()
+        
+        assert elapsed >= 0.2
+        assert len(backend.threads) <= 2
+
+
+class RegionalBackend(InMemoryBackend):
+    """Backend en memoria con latencia y fallos configurables por región"""
+    
+    blocking = True
+    
+    def __init__(self, repository, delays, failing=()):
+        super().__init__(repository)
+        self.delays = delays
+        self.failing = set(failing)
+    
+    def iter_with_cursors(self, region=None, **filters):
+        time.sleep(self.delays.get(region, 0))
+        if region in self.failing:
+            raise RuntimeError(f"Region {region} unavailable")
+        return super().iter_with_cursors(region=region, **filters)
+
+
+class TestRegionFanout:
+    """Tests para el listado multi-región en paralelo"""
+    
+    @pytest.mark.asyncio
+    async def test_results_stream_in_completion_order(self):
+        """Test para entregar cada región apenas termina, con fallos y timeouts"""
+        backend = RegionalBackend(
+            InstanceRepository(get_mock_instances()),
+            delays={AWSRegion.US_EAST_1: 0.15, AWSRegion.US_WEST_2: 1.0},
+            failing={AWSRegion.EU_WEST_1},
+        )
+        service = AsyncEC2Service(EC2Service(backend=backend, cache=None), max_concurrency=8)
+        regions = [AWSRegion.US_EAST_1, AWSRegion.US_WEST_2, AWSRegion.EU_WEST_1, AWSRegion.AP_SOUTHEAST_1]
+        
+        started = time.perf_counter()
+        results = [result async for result in service.iter_instances_by_region(regions, timeout=0.5)]
+        elapsed = time.perf_counter() - started
+        service.shutdown()
+        
+        assert elapsed < 1.0
+        by_region = {result.region: result for result in results}
+        assert {result.region for result in results[:2]} == {"eu-west-1", "ap-southeast-1"}
+        assert [result.region for result in results[2:]] == ["us-east-1", "us-west-2"]
+        assert isinstance(by_region["eu-west-1"], RegionFailure)
+        assert "unavailable" in by_region["eu-west-1"].error
+        assert len(results[2].instances) == 2
+        assert isinstance(results[3], RegionFailure)
+        assert "timed out" in results[3].error.lower()
@@ -0,0 +1,340 @@
+import itertools
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from moto import mock_ec2
+from src.config import Settings
+from src.models import InstanceState, InstanceType, AWSRegion
+from src.services.backends import Boto3Backend, EC2Backend, InMemoryBackend, SQLiteBackend, create_backend
+from src.services.ec2_service import EC2Service
+from src.repositories import InstanceRepository
+from src.utils.mock_data import get_mock_instances
+
+
+def _launch(client, name: str, instance_type: str = "t3.micro", count: int = 1):
+    """Lanza instancias en moto con un tag Name"""
+    response = client.run_instances(
+        ImageId="ami-12c6146b",
+        MinCount=count,
+        MaxCount=count,
+        InstanceType=instance_type,
+        TagSpecifications=[{"ResourceType": "instance", "Tags": [{"Key": "Name", "Value": name}]}],
+    )
+    return [instance["InstanceId"] for instance in response["Instances"]]
+
+
+class TestInMemoryBackend:
+    """Tests para el backend en memoria"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.backend = InMemoryBackend(InstanceRepository(get_mock_instances()))
+    
+    def test_iter_instances_filters(self):
+        """Test para iterar con filtros y prefijo de nombre"""
+        instances = list(self.backend.iter_instances(state=InstanceState.RUNNING, name_prefix="data"))
+        
+        assert [instance.id for instance in instances] == ["i-0987654321fedcba0"]
+    
+    def test_stop_instances(self):
+        """Test para aplicar un lote de transiciones"""
+        instance = self.backend.get_instance("i-1234567890abcdef0")
+        
+        states = self.backend.stop_instances([(instance, InstanceState.STOPPING)])
+        
+        assert states == {"i-1234567890abcdef0": InstanceState.STOPPING}
+        assert self.backend.get_instance("i-1234567890abcdef0").state == InstanceState.STOPPING
+    
+    def test_count_instances(self):
+        """Test para contar por celdas igual que recorriendo las instancias"""
+        for group_by in ([], ["state"], ["region", "type"], ["type", "state", "region"]):
+            assert self.backend.count_instances(group_by) == EC2Backend.count_instances(self.backend, group_by)
+        
+        assert self.backend.count_instances(["region"], state=InstanceState.RUNNING) == {
+            ("eu-west-1",): 1,
+            ("us-east-1",): 2,
+        }
+        with pytest.raises(ValueError):
+            self.backend.count_instances(["name"])
+
+
+class TestBoto3Backend:
+    """Tests para el backend boto3 contra moto en proceso"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.mock = mock_ec2()
+        self.mock.start()
+        self.backend = Boto3Backend(regions=["us-east-1", "eu-west-1"], page_size=5)
+        self.us_ids = _launch(self.backend.client("us-east-1"), "db-primary", "m5.large", count=3)
+        self.eu_ids = _launch(self.backend.client("eu-west-1"), "web-eu")
+    
+    def teardown_method(self):
+        """Limpieza después de cada test"""
+        self.mock.stop()
+    
+    def test_client_reused_per_region(self):
+        """Test para verificar que se reutiliza un cliente por región"""
+        assert self.backend.client("us-east-1") is self.backend.client(AWSRegion.US_EAST_1)
+        assert self.backend.client("us-east-1") is not self.backend.client("eu-west-1")
+        assert self.backend.config.max_pool_connections == 50
+    
+    def test_iter_instances_all_regions(self):
+        """Test para listar instancias de todas las regiones configuradas"""
+        instances = list(self.backend.iter_instances())
+        
+        assert {instance.id for instance in instances} == set(self.us_ids + self.eu_ids)
+        eu_instance = next(instance for instance in instances if instance.id in self.eu_ids)
+        assert eu_instance.region == "eu-west-1"
+        assert eu_instance.name == "web-eu"
+        assert eu_instance.launch_time.endswith("Z")
+    
+    def test_iter_instances_filters_and_cursor(self):
+        """Test para filtros nativos de EC2 y reanudación por cursor"""
+        instances = list(self.backend.iter_instances(
+            region=AWSRegion.US_EAST_1,
+            instance_type=InstanceType.M5_LARGE,
+            name_prefix="db-"
+        ))
+        assert len(instances) == 3
+        
+        (_, cursor, _), = itertools.islice(self.backend.iter_with_cursors(region=AWSRegion.US_EAST_1), 1)
+        resumed = list(self.backend.iter_instances(region=AWSRegion.US_EAST_1, after=cursor))
+        assert [instance.id for instance in resumed] == [instance.id for instance in instances[1:]]
+        with pytest.raises(ValueError):
+            list(self.backend.iter_instances(after="i-1234567890abcdef0"))
+    
+    def test_cursor_resumes_from_next_token(self):
+        """Test para reanudar desde el NextToken de la página, sin volver a recorrer las anteriores"""
+        client = self.backend.client("us-east-1")
+        for index in range(9):
+            _launch(client, f"batch-{index}")
+        calls = []
+        client.meta.events.register("before-call.ec2.DescribeInstances", lambda **kwargs: calls.append(kwargs))
+        service = EC2Service(backend=self.backend, cache=None)
+        
+        listed, next_token, pages = [], None, 0
+        while True:
+            page = service.get_all_instances(region=AWSRegion.US_EAST_1, limit=2, next_token=next_token)
+            listed.extend(instance.id for instance in page)
+            pages += 1
+            next_token = service.get_next_token(page, 2)
+            if next_token is None:
+                break
+        
+        assert len(listed) == len(set(listed)) == 12
+        # Una llamada por página del listado, más una por cada página de EC2 que se cruza
+        ec2_pages = len({call["params"].get("NextToken") for call in calls})
+        assert len(calls) <= pages + ec2_pages
+    
+    def test_unknown_instance_type_skipped(self):
+        """Test para omitir las instancias de un tipo que el modelo no conoce"""
+        unknown = _launch(self.backend.client("us-east-1"), "graviton", "m6g.large")
+        
+        instances = list(self.backend.iter_instances(region=AWSRegion.US_EAST_1))
+        
+        assert {instance.id for instance in instances} == set(self.us_ids)
+        assert self.backend.get_instances(unknown) == {}
+    
+    def test_stop_instances_single_call_per_region(self):
+        """Test para verificar que un lote se mapea a una llamada StopInstances"""
+        instances = self.backend.get_instances(self.us_ids + ["i-nonexistent"])
+        assert set(instances) == set(self.us_ids)
+        
+        client = self.backend.client("us-east-1")
+        calls = []
+        client.meta.events.register("before-call.ec2.StopInstances", lambda **kwargs: calls.append(kwargs))
+        
+        states = self.backend.stop_instances([(instance, InstanceState.STOPPING) for instance in instances.values()])
+        
+        assert len(calls) == 1
+        assert set(states) == set(self.us_ids)
+        assert all(state in (InstanceState.STOPPING, InstanceState.STOPPED) for state in states.values())
+    
+    def test_service_with_boto3_backend(self):
+        """Test para EC2Service con el backend boto3"""
+        service = EC2Service(backend=self.backend)
+        
+        page = service.get_all_instances(region=AWSRegion.US_EAST_1, limit=2)
+        next_token = service.get_next_token(page, 2)
+        rest = service.get_all_instances(region=AWSRegion.US_EAST_1, limit=2, next_token=next_token)
+        assert {instance.id for instance in page + rest} == set(self.us_ids)
+        
+        results = service.stop_instances([self.us_ids[0], "i-nonexistent"])
+        assert results[0].success is True
+        assert results[1].success is False
+
+
+class TestSQLiteBackend:
+    """Tests para el backend SQLite compartido entre workers"""
+    
+    @pytest.fixture(autouse=True)
+    def database(self, tmp_path):
+        """Base nueva por test, cargada con los datos mock"""
+        self.path = str(tmp_path / "instances.db")
+        self.backend = SQLiteBackend(self.path, page_size=2)
+        self.backend.seed(get_mock_instances())
+    
+    def test_seed_only_if_empty(self):
+        """Test para no volver a cargar una base ya inicializada"""
+        assert SQLiteBackend(self.path).seed(get_mock_instances()) == 0
+    
+    def test_iter_instances_filters_and_cursor(self):
+        """Test para filtrar y paginar por ID a través de varias consultas"""
+        ids = [instance.id for instance in self.backend.iter_instances()]
+        running = list(self.backend.iter_instances(state=InstanceState.RUNNING, region=AWSRegion.US_EAST_1))
+        prefixed = list(self.backend.iter_instances(name_prefix="web"))
+        
+        assert ids == sorted(instance.id for instance in get_mock_instances())
+        assert [instance.id for instance in self.backend.iter_instances(after=ids[1])] == ids[2:]
+        assert {instance.id for instance in running} == {"i-1234567890abcdef0", "i-0987654321fedcba0"}
+        assert [instance.name for instance in prefixed] == ["web-server-prod"]
+    
+    def test_get_instances(self):
+        """Test para leer un lote de IDs"""
+        found = self.backend.get_instances(["i-1234567890abcdef0", "i-nonexistent"])
+        
+        assert list(found) == ["i-1234567890abcdef0"]
+        assert found["i-1234567890abcdef0"].type == InstanceType.T3_MEDIUM
+    
+    def test_stop_is_compare_and_set(self):
+        """Test para no aplicar una transición sobre un estado desactualizado"""
+        stale = self.backend.get_instance("i-1234567890abcdef0")
+        version = self.backend.get_version()
+        
+        assert self.backend.stop_instances([(stale, InstanceState.STOPPING)]) == {
+            "i-1234567890abcdef0": InstanceState.STOPPING
+        }
+        assert self.backend.stop_instances([(stale, InstanceState.STOPPING)]) == {}
+        assert self.backend.get_version() == version + 1
+        assert self.backend.get_instance_version("i-1234567890abcdef0") == version + 1
+    
+    def test_set_state_expected_state(self):
+        """Test para transiciones condicionadas al estado actual"""
+        instance_id = "i-5678901234abcdef"
+        
+        assert self.backend.set_state(instance_id, InstanceState.STOPPED, expected_state=InstanceState.RUNNING) is None
+        assert self.backend.set_state(instance_id, InstanceState.STOPPED, expected_state=InstanceState.STOPPING).state == "stopped"
+    
+    def test_changes_visible_across_workers(self):
+        """Test para dos servicios (como dos workers) sobre la misma base"""
+        first = EC2Service(backend=self.backend)
+        second = EC2Service(backend=SQLiteBackend(self.path))
+        stale = second.backend.get_instance("i-1234567890abcdef0")
+        
+        assert first.stop_instance("i-1234567890abcdef0").success
+        assert second.get_instance_by_id("i-1234567890abcdef0").state == "stopping"
+        assert second.get_fleet_version() == first.get_fleet_version()
+        
+        # El otro worker pierde la carrera si escribe sobre lo que leyó antes del stop
+        assert second.backend.stop_instances([(stale, InstanceState.STOPPING)]) == {}
+        result = second.stop_instance("i-1234567890abcdef0")
+        assert not result.success
+        assert result.message == "Instance i-1234567890abcdef0 is already stopping"
+    
+    def test_count_instances_follow_changes(self):
+        """Test para los contadores por combinación mantenidos por triggers"""
+        service = EC2Service(backend=self.backend)
+        service.stop_instance("i-1234567890abcdef0")
+        service.simulate_state_transition("i-1234567890abcdef0")
+        
+        for group_by in ([], ["state"], ["region", "type"], ["state", "region", "type"]):
+            assert self.backend.count_instances(group_by) == EC2Backend.count_instances(self.backend, group_by)
+        assert self.backend.count_instances(["state"], region=AWSRegion.US_EAST_1) == {
+            ("running",): 1,
+            ("stopped",): 1,
+        }
+    
+    def test_counts_rebuilt_for_existing_database(self):
+        """Test para calcular los contadores de una base creada antes de que existieran"""
+        connection = self.backend.connection
+        connection.execute("DELETE FROM instance_counts")
+        connection.execute("UPDATE meta SET value = 0 WHERE key = 'counts'")
+        
+        reopened = SQLiteBackend(self.path)
+        
+        assert reopened.count_instances([]) == {(): 5}
+        assert reopened.count_instances(["state"]) == EC2Backend.count_instances(reopened, ["state"])
+    
+    def test_service_batch_and_transition(self):
+        """Test para el lote y la transición automática sobre SQLite"""
+        service = EC2Service(backend=self.backend)
+        
+        results = service.stop_instances(["i-1234567890abcdef0", "i-abcdef1234567890", "i-nonexistent"])
+        
+        assert [result.success for result in results] == [True, False, False]
+        assert service.cache is None
+        assert service.simulate_state_transition("i-1234567890abcdef0") == InstanceState.STOPPED
+        assert service.simulate_state_transition("i-1234567890abcdef0") is None
+    
+    def test_epoch_identifies_database(self, tmp_path):
+        """Test para compartir la época entre conexiones a la base y cambiarla con una base nueva"""
+        assert SQLiteBackend(self.path).get_epoch() == self.backend.get_epoch()
+        assert SQLiteBackend(str(tmp_path / "other.db")).get_epoch() != self.backend.get_epoch()
+    
+    def test_serialize_uses_versions_read_with_rows(self):
+        """Test para cachear el JSON con la versión leída junto a la fila, aunque otro worker la cambie después"""
+        service = EC2Service(backend=self.backend)
+        page = service.get_all_instances(limit=2)
+        SQLiteBackend(self.path).set_state(page[0].id, InstanceState.STOPPING)
+        statements = []
+        self.backend.connection.set_trace_callback(statements.append)
+        
+        assert json.loads(service.serialize_instances(page))[0]["state"] == "running"
+        assert statements == []
+        
+        # La página siguiente trae la versión nueva y no reutiliza el JSON viejo
+        body = service.serialize_instances(service.get_all_instances(limit=2))
+        assert json.loads(body)[0]["state"] == "stopping"
+
+    
+    def test_close_all_thread_connections(self):
+        """Test para cerrar en close las conexiones abiertas por los threads del executor"""
+        barrier = threading.Barrier(4)
+        opened = {}
+        
+        def open_connection(_):
+            barrier.wait()
+            self.backend.get_instance("i-1234567890abcdef0")
+            opened[threading.get_ident()] = self.backend.connection
+        
+        def is_closed(_):
+            # Cada thread prueba su propia conexión
+            barrier.wait()
+            try:
+                opened[threading.get_ident()].execute("SELECT 1")
+            except sqlite3.ProgrammingError:
+                return True
+            return False
+        
+        # Los threads siguen vivos al cerrar, como en el apagado de la app
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(open_connection, range(4)))
+            self.backend.close()
+            closed = list(executor.map(is_closed, range(4)))
+        
+        assert len(opened) == 4
+        assert closed == [True] * 4
+        # Después de cerrar, el thread abre una conexión nueva
+        assert self.backend.get_instance("i-1234567890abcdef0").state == InstanceState.RUNNING
+
+class TestCreateBackend:
+    """Tests para la selección de backend por configuración"""
+    
+    def test_memory_backend_default(self):
+        """Test para el backend por defecto"""
+        assert isinstance(create_backend(Settings()), InMemoryBackend)
+    
+    def test_sqlite_backend(self, tmp_path):
+        """Test para crear el backend sqlite inicializado con los datos mock"""
+        backend = create_backend(Settings(ec2_backend="sqlite", ec2_sqlite_path=str(tmp_path / "ec2.db")))
+        
+        assert isinstance(backend, SQLiteBackend)
+        assert len(list(backend.iter_instances())) == len(get_mock_instances())
+    
+    def test_unknown_backend(self):
+        """Test para un backend inexistente"""
+        with pytest.raises(ValueError):
+            create_backend(Settings(ec2_backend="unknown"))
@@ -0,0 +1,83 @@
+import pytest
+from benchmarks.bench_hot_paths import compare, main, run_suite
+from benchmarks.bench_recovery import measure_recovery, prepare
+from benchmarks.bench_startup import by_package, parse_importtime, run_stage
+from src.utils.mock_data import MOCK_INSTANCES_DB
+
+
+class TestBenchmarkSuite:
+    """Tests para la suite de benchmarks"""
+    
+    def test_compare_flags_regressions(self):
+        """Test para detectar regresiones de latencia y throughput según la tolerancia"""
+        baseline = {
+            "10/get_instance_by_id": {"p95_ms": 1.0, "ops_per_s": 1000.0},
+            "10/stop_instance": {"p95_ms": 1.0, "ops_per_s": 1000.0},
+        }
+        results = {
+            "10/get_instance_by_id": {"p95_ms": 1.1, "ops_per_s": 950.0},
+            "10/stop_instance": {"p95_ms": 1.5, "ops_per_s": 500.0},
+            "1000/stop_instance": {"p95_ms": 9.0, "ops_per_s": 1.0},
+        }
+        
+        regressions = compare(results, baseline, tolerance=0.2)
+        
+        assert len(regressions) == 2
+        assert all(regression.startswith("10/stop_instance") for regression in regressions)
+    
+    @pytest.mark.slow
+    def test_run_suite(self, tmp_path):
+        """Test para correr la suite completa sobre flotas chicas y compararla contra sí misma"""
+        results = run_suite([10, 1000], iterations=50, verbose=False)
+        
+        assert set(results) >= {"10/stop_instance", "1000/asgi GET /instances/{id}"}
+        for result in results.values():
+            assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+            assert result["ops_per_s"] > 0
+        # La base mock de la app vuelve a las instancias de ejemplo
+        assert len(MOCK_INSTANCES_DB) == 5
+        
+        baseline = tmp_path / "baseline.json"
+        assert main(["--sizes", "10", "--iterations", "50", "--save-baseline", str(baseline)]) == 0
+        assert main(["--sizes", "10", "--iterations", "50", "--baseline", str(baseline), "--tolerance", "100"]) == 0
+
+
+class TestStartupBenchmark:
+    """Tests para el benchmark de arranque"""
+    
+    def test_parse_importtime(self):
+        """Test para parsear la salida de -X importtime y agrupar por paquete"""
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     fastapi.params",
+            "import time:        30 |        150 |   fastapi",
+            "import time:        50 |         50 | src.config",
+            "otra línea",
+        ])
+        
+        entries = parse_importtime(output)
+        
+        assert [entry.module for entry in entries] == ["fastapi.params", "fastapi", "src.config"]
+        assert entries[1].cumulative_us == 150
+        assert by_package(entries) == {"fastapi": 150, "src": 50}
+    
+    def test_app_import_skips_boto3_and_backend(self):
+        """Test para no importar boto3/moto ni construir la flota al importar la app"""
+        result = run_stage("import src.app", runs=1)
+        
+        modules = {entry.module for entry in result["entries"]}
+        assert "src.app" in modules
+        assert not {"boto3", "botocore", "moto", "src.utils.mock_data"} & modules
+
+
+class TestRecoveryBenchmark:
+    """Tests para el benchmark de recuperación"""
+    
+    def test_prepare_and_recover(self, tmp_path):
+        """Test para recuperar la flota generada con sus cambios de estado del journal"""
+        prepare(str(tmp_path), instances=100, transitions=30)
+        
+        result = measure_recovery(str(tmp_path), runs=2)
+        
+        assert result["instances"] == 100
+        assert len(result["runs_ms"]) == 2
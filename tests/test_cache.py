@@ -0,0 +1,140 @@
+import threading
+import time
+import pytest
+from src.models import AWSRegion, InstanceState
+from src.repositories import InstanceRepository
+from src.services.backends import InMemoryBackend
+from src.services.cache import TTLCache
+from src.services.ec2_service import EC2Service
+from src.utils.mock_data import get_mock_instances
+
+
+class FakeClock:
+    """Reloj controlable para probar vencimientos"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Tests para el cache TTL con LRU"""
+    
+    def test_hit_and_miss_counters(self):
+        """Test para los contadores de hits y misses"""
+        cache = TTLCache(ttl=10)
+        
+        assert cache.get_or_load("a", lambda: 1) == 1
+        assert cache.get_or_load("a", lambda: 2) == 1
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    def test_ttl_expiration(self):
+        """Test para el vencimiento de entradas"""
+        clock = FakeClock()
+        cache = TTLCache(ttl=5, clock=clock)
+        
+        cache.get_or_load("a", lambda: 1)
+        clock.now = 6
+        
+        assert cache.get_or_load("a", lambda: 2) == 2
+    
+    def test_lru_eviction(self):
+        """Test para el desalojo de la entrada menos usada"""
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.get_or_load("a", lambda: 1)
+        cache.get_or_load("b", lambda: 2)
+        cache.get_or_load("a", lambda: 1)
+        
+        cache.get_or_load("c", lambda: 3)
+        
+        assert cache.get_or_load("a", lambda: "reloaded") == 1
+        assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+        assert cache.stats()["evictions"] >= 1
+    
+    def test_invalidate_tags(self):
+        """Test para la invalidación selectiva por tags"""
+        cache = TTLCache(ttl=10)
+        cache.get_or_load("east", lambda: 1, tags=["us-east-1"])
+        cache.get_or_load("west", lambda: 2, tags=["us-west-2"])
+        
+        assert cache.invalidate_tags("us-east-1") == 1
+        
+        assert cache.get_or_load("east", lambda: "reloaded") == "reloaded"
+        assert cache.get_or_load("west", lambda: "reloaded") == 2
+    
+    def test_stampede_protection(self):
+        """Test para verificar que misses concurrentes ejecutan un único loader"""
+        cache = TTLCache(ttl=10)
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value"
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1
+        assert results == ["value"] * 10
+    
+    def test_loader_error_not_cached(self):
+        """Test para no cachear errores del loader"""
+        cache = TTLCache(ttl=10)
+        
+        with pytest.raises(RuntimeError):
+            cache.get_or_load("a", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+        
+        assert cache.get_or_load("a", lambda: 1) == 1
+
+
+class TestEC2ServiceCache:
+    """Tests para el cache de lecturas de EC2Service"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.cache = TTLCache(ttl=60)
+        self.service = EC2Service(
+            backend=InMemoryBackend(InstanceRepository(get_mock_instances())),
+            cache=self.cache,
+        )
+    
+    def test_listing_is_cached_per_filter(self):
+        """Test para cachear cada combinación de filtros por separado"""
+        self.service.get_all_instances(region=AWSRegion.US_EAST_1)
+        self.service.get_all_instances(region=AWSRegion.US_EAST_1)
+        self.service.get_all_instances(region=AWSRegion.EU_WEST_1)
+        
+        stats = self.cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+    
+    def test_stop_invalidates_affected_entries(self):
+        """Test para la invalidación selectiva al detener una instancia"""
+        running_east = self.service.get_all_instances(state=InstanceState.RUNNING, region=AWSRegion.US_EAST_1)
+        self.service.get_all_instances(region=AWSRegion.EU_WEST_1)
+        assert len(running_east) == 2
+        
+        self.service.stop_instance("i-1234567890abcdef0")
+        
+        running_east = self.service.get_all_instances(state=InstanceState.RUNNING, region=AWSRegion.US_EAST_1)
+        assert [instance.id for instance in running_east] == ["i-0987654321fedcba0"]
+        assert self.service.get_instance_by_id("i-1234567890abcdef0").state == InstanceState.STOPPING
+        
+        # La entrada de otra región sigue cacheada
+        hits = self.cache.stats()["hits"]
+        self.service.get_all_instances(region=AWSRegion.EU_WEST_1)
+        assert self.cache.stats()["hits"] == hits + 1
@@ -1,6 +1,11 @@
+import json
+import sys
+import threading
 import pytest
 from unittest.mock import Mock, patch
 from src.services.ec2_service import EC2Service
+from src.services.serialization import InstanceJSONCache
+from src.utils.fleet import iter_fleet
 from src.models import InstanceState, InstanceType, AWSRegion
 from src.utils.mock_data import MOCK_INSTANCES_DB
 
@@ -116,6 +121,45 @@ class TestEC2Service:
         updated_instance = self.ec2_service.get_instance_by_id(instance_id)
         assert updated_instance.state == InstanceState.STOPPED
     
+    def test_simulate_state_transition_table(self):
+        """Test para las transiciones automáticas pending→running y shutting-down→terminated"""
+        MOCK_INSTANCES_DB.set_state("i-1234567890abcdef0", InstanceState.PENDING)
+        MOCK_INSTANCES_DB.set_state("i-0987654321fedcba0", InstanceState.SHUTTING_DOWN)
+        
+        assert self.ec2_service.simulate_state_transition("i-1234567890abcdef0") == InstanceState.RUNNING
+        assert self.ec2_service.simulate_state_transition("i-0987654321fedcba0") == InstanceState.TERMINATED
+        # Sin estado intermedio no hay transición
+        assert self.ec2_service.simulate_state_transition("i-abcdef1234567890") is None
+        # Con from_state solo transiciona si la instancia sigue en ese estado
+        assert self.ec2_service.simulate_state_transition("i-5678901234abcdef", InstanceState.PENDING) is None
+    
+    def test_state_change_listeners(self):
+        """Test para la notificación de cambios de estado a los listeners"""
+        changes = []
+        self.ec2_service.add_listener(changes.append)
+        
+        self.ec2_service.stop_instance("i-1234567890abcdef0")
+        self.ec2_service.simulate_state_transition("i-1234567890abcdef0")
+        
+        assert [(change.previous_state, change.current_state) for change in changes] == [
+            ("running", "stopping"),
+            ("stopping", "stopped"),
+        ]
+        assert changes[0].region == "us-east-1"
+    
+    def test_backend_built_on_first_use(self):
+        """Test para construir el backend configurado recién en su primer uso"""
+        backend = Mock(blocking=False, shared=False)
+        with patch('src.services.ec2_service.create_backend', return_value=backend) as create_backend:
+            service = EC2Service()
+            create_backend.assert_not_called()
+            
+            assert service.backend is backend
+            assert service.cache is None
+            assert service.backend is backend
+        
+        create_backend.assert_called_once()
+    
     @patch('src.services.ec2_service.logger')
     def test_logging_get_instances(self, mock_logger):
         """Test para verificar que se registran los logs correctamente"""
@@ -133,5 +177,130 @@ class TestEC2Service:
         self.ec2_service.stop_instance(instance_id)
         
         mock_logger.info.assert_called()
-        info_calls = [call.args[0] for call in mock_logger.info.call_args_list]
+        # Los mensajes usan argumentos %-style, formateados recién al emitirse
+        info_calls = [call.args[0] % call.args[1:] for call in mock_logger.info.call_args_list]
         assert any(f"Attempting to stop instance: {instance_id}" in call for call in info_calls)
+    
+    def test_get_all_instances_filters(self):
+        """Test para filtrar instancias por estado, región, tipo y prefijo"""
+        running = self.ec2_service.get_all_instances(state=InstanceState.RUNNING)
+        assert len(running) == 3
+        assert all(instance.state == InstanceState.RUNNING for instance in running)
+        
+        us_east = self.ec2_service.get_all_instances(
+            region=AWSRegion.US_EAST_1,
+            instance_type=InstanceType.M5_LARGE
+        )
+        assert [instance.id for instance in us_east] == ["i-0987654321fedcba0"]
+        
+        by_name = self.ec2_service.get_all_instances(name_prefix="web-")
+        assert [instance.name for instance in by_name] == ["web-server-prod"]
+    
+    def test_get_all_instances_pagination(self):
+        """Test para recorrer las instancias con el cursor next_token"""
+        seen = []
+        next_token = None
+        while True:
+            page = self.ec2_service.get_all_instances(limit=2, next_token=next_token)
+            seen.extend(instance.id for instance in page)
+            next_token = self.ec2_service.get_next_token(page, 2)
+            if next_token is None:
+                break
+        
+        assert seen == sorted(MOCK_INSTANCES_DB)
+    
+    def test_get_all_instances_invalid_token(self):
+        """Test para un cursor next_token inválido"""
+        with pytest.raises(ValueError) as exc_info:
+            self.ec2_service.get_all_instances(next_token="not-a-token")
+        
+        assert "next_token" in str(exc_info.value)
+    
+    def test_stop_instances_batch(self):
+        """Test para detener varias instancias con fallos parciales"""
+        instance_ids = [
+            "i-1234567890abcdef0",  # RUNNING
+            "i-abcdef1234567890",  # STOPPED
+            "i-nonexistent",
+            "i-1234567890abcdef0",  # Repetida
+        ]
+        
+        results = self.ec2_service.stop_instances(instance_ids)
+        
+        assert [result.instance_id for result in results] == instance_ids[:3]
+        assert results[0].success is True
+        assert results[0].current_state == InstanceState.STOPPING
+        assert results[1].success is False
+        assert "already stopped" in results[1].message.lower()
+        assert results[2].success is False
+        assert results[2].previous_state is None
+        assert "not found" in results[2].message.lower()
+        
+        updated_instance = self.ec2_service.get_instance_by_id("i-1234567890abcdef0")
+        assert updated_instance.state == InstanceState.STOPPING
+    
+    def test_serialize_instances_reuses_cached_json(self):
+        """Test para la serialización con JSON pre-serializado por instancia"""
+        instances = self.ec2_service.get_all_instances()
+        
+        body = self.ec2_service.serialize_instances(instances)
+        assert json.loads(body) == [instance.model_dump(mode="json") for instance in instances]
+        
+        self.ec2_service.serialize_instances(instances)
+        assert self.ec2_service.json_cache.hits == len(instances)
+    
+    def test_summarize_instances(self):
+        """Test para el resumen agrupado de la flota"""
+        summary = self.ec2_service.summarize_instances(["region", "state", "region"], state=InstanceState.RUNNING)
+        
+        assert summary.group_by == ["region", "state"]
+        assert summary.total == 3
+        assert [(group.region, group.state, group.count) for group in summary.groups] == [
+            ("eu-west-1", "running", 1),
+            ("us-east-1", "running", 2),
+        ]
+        assert self.ec2_service.summarize_instances([]).model_dump() == {"group_by": [], "total": 5, "groups": [
+            {"state": None, "region": None, "type": None, "count": 5}
+        ]}
+    
+    def test_serialize_instances_invalidated_on_change(self):
+        """Test para invalidar el JSON cacheado cuando la instancia cambia"""
+        instance_id = "i-1234567890abcdef0"
+        instance = self.ec2_service.get_instance_by_id(instance_id)
+        assert b'"state":"running"' in self.ec2_service.serialize_instances([instance])
+        
+        self.ec2_service.stop_instance(instance_id)
+        
+        # Las instancias leídas son copias: se vuelve a leer la versión actual
+        instance = self.ec2_service.get_instance_by_id(instance_id)
+        assert b'"state":"stopping"' in self.ec2_service.serialize_instances([instance])
+    
+    def test_json_cache_concurrent_eviction(self):
+        """Test para leer, insertar y descartar entradas del cache de JSON desde muchos threads"""
+        cache = InstanceJSONCache(maxsize=2)
+        instances = list(iter_fleet(2000, seed=5))
+        barrier = threading.Barrier(16)
+        errors = []
+        
+        def worker(offset):
+            barrier.wait()
+            try:
+                for index in range(len(instances)):
+                    instance = instances[(index + offset) % len(instances)]
+                    assert json.loads(cache.dumps(instance, 1))["id"] == instance.id
+            except Exception as e:
+                errors.append(e)
+        
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            workers = [threading.Thread(target=worker, args=(n * 125,)) for n in range(16)]
+            for worker_thread in workers:
+                worker_thread.start()
+            for worker_thread in workers:
+                worker_thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        
+        assert errors == []
+        assert len(cache) <= 2
@@ -0,0 +1,82 @@
+import ipaddress
+from collections import Counter
+from datetime import datetime
+from src.config import Settings
+from src.models import EC2Instance, InstanceState
+from src.repositories import InstanceRepository
+from src.utils.fleet import REGION_WEIGHTS, STATE_WEIGHTS, generate_fleet, load_fleet
+from src.utils.mock_data import get_mock_instances, iter_mock_fleet, load_mock_fleet
+
+
+class TestFleetGenerator:
+    """Tests para el generador de flotas sintéticas"""
+    
+    @classmethod
+    def setup_class(cls):
+        """Una flota compartida por los tests de la clase"""
+        cls.fleet = generate_fleet(20_000, seed=7)
+    
+    def test_deterministic(self):
+        """Test para generar la misma flota con la misma semilla, y extenderla al crecer"""
+        assert generate_fleet(12_000, seed=7) == self.fleet[:12_000]
+        assert generate_fleet(50, seed=8) != generate_fleet(50, seed=7)
+    
+    def test_unique_ids(self):
+        """Test para IDs únicos"""
+        ids = {instance.id for instance in self.fleet}
+        
+        assert len(ids) == len(self.fleet)
+        assert all(instance_id.startswith("i-") and len(instance_id) == 19 for instance_id in ids)
+    
+    def test_distributions(self):
+        """Test para respetar las proporciones de estados y regiones"""
+        for field, weights in (("state", STATE_WEIGHTS), ("region", REGION_WEIGHTS)):
+            counts = Counter(getattr(instance, field) for instance in self.fleet)
+            total = sum(weights.values())
+            for value, weight in weights.items():
+                assert abs(counts[value.value] / len(self.fleet) - weight / total) < 0.02
+    
+    def test_valid_records(self):
+        """Test para generar registros que pasan la validación del modelo"""
+        for instance in self.fleet[:1000]:
+            assert EC2Instance.model_validate(instance.model_dump()) == instance
+    
+    def test_ips_and_launch_times(self):
+        """Test para IPs privadas en 10/8, públicas solo en instancias encendidas y fechas ISO"""
+        for instance in self.fleet:
+            assert ipaddress.ip_address(instance.private_ip) in ipaddress.ip_network("10.0.0.0/8")
+            if instance.public_ip is not None:
+                assert ipaddress.ip_address(instance.public_ip).is_global
+                assert instance.state not in (InstanceState.STOPPED, InstanceState.TERMINATED)
+            datetime.strptime(instance.launch_time, "%Y-%m-%dT%H:%M:%SZ")
+    
+    def test_load_fleet_matches_iter_fleet(self):
+        """Test para cargar por columnas las mismas instancias que genera iter_fleet"""
+        repository = load_fleet(InstanceRepository(), 20_000, seed=7)
+        
+        assert dict(repository.items()) == {instance.id: instance for instance in self.fleet}
+
+
+class TestMockFleet:
+    """Tests para la selección de la flota inicial"""
+    
+    def test_examples_only_by_default(self):
+        """Test para cargar solo las instancias de ejemplo sin EC2_MOCK_FLEET_SIZE"""
+        assert list(iter_mock_fleet(Settings())) == get_mock_instances()
+    
+    def test_synthetic_fleet_size(self):
+        """Test para agregar la flota sintética configurada"""
+        instances = list(iter_mock_fleet(Settings(ec2_mock_fleet_size=1000, ec2_mock_fleet_seed=3)))
+        
+        assert len(instances) == 1005
+        assert instances[:5] == get_mock_instances()
+    
+    def test_load_mock_fleet(self):
+        """Test para crear el repositorio inicial con la misma flota que iter_mock_fleet"""
+        settings = Settings(ec2_mock_fleet_size=1000, ec2_mock_fleet_seed=3)
+        repository = load_mock_fleet(settings)
+        
+        assert dict(repository.items()) == {instance.id: instance for instance in iter_mock_fleet(settings)}
+        assert list(load_mock_fleet(Settings()).items()) == [
+            (instance.id, instance) for instance in sorted(get_mock_instances(), key=lambda instance: instance.id)
+        ]
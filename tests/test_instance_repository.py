@@ -0,0 +1,334 @@
+import gc
+import sys
+import threading
+import tracemalloc
+
+import pytest
+from src.models import EC2Instance, InstanceState, InstanceType, AWSRegion
+from src.repositories import InstanceRepository
+from src.repositories.encoding import (
+    STATES,
+    pack_ipv4,
+    pack_timestamp,
+    timestamp_key,
+    unpack_ipv4,
+    unpack_timestamp,
+)
+from src.utils.fleet import iter_fleet, iter_fleet_columns, load_fleet
+from src.utils.mock_data import get_mock_instances
+
+
+class TestInstanceRepository:
+    """Tests para el repositorio indexado de instancias"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.repository = InstanceRepository(get_mock_instances())
+    
+    def test_behaves_like_dict(self):
+        """Test para la interfaz de mapping"""
+        assert len(self.repository) == 5
+        assert "i-1234567890abcdef0" in self.repository
+        assert self.repository.get("i-nonexistent") is None
+        assert self.repository["i-1234567890abcdef0"].name == "web-server-prod"
+        with pytest.raises(KeyError):
+            self.repository["i-nonexistent"]
+    
+    def test_materializes_equal_instances(self):
+        """Test para reconstruir las instancias tal como se guardaron, incluso con IPs no canónicas"""
+        for instance in get_mock_instances():
+            assert self.repository[instance.id] == instance
+            assert self.repository[instance.id].model_dump() == instance.model_dump()
+        
+        # 34.567.89.123 no es una IPv4 válida: se conserva tal cual
+        assert self.repository["i-0987654321fedcba0"].public_ip == "34.567.89.123"
+        assert self.repository["i-abcdef1234567890"].public_ip is None
+    
+    def test_reads_are_copies(self):
+        """Test para verificar que modificar una instancia leída no altera el almacén"""
+        instance = self.repository["i-1234567890abcdef0"]
+        instance.state = InstanceState.STOPPED
+        
+        assert self.repository["i-1234567890abcdef0"].state == InstanceState.RUNNING
+    
+    def test_iter_ids_sorted(self):
+        """Test para recorrer los IDs ordenados desde un cursor"""
+        all_ids = list(self.repository.iter_ids())
+        assert all_ids == sorted(self.repository)
+        
+        assert list(self.repository.iter_ids(after=all_ids[2])) == all_ids[3:]
+    
+    def test_iter_ids_with_indexes(self):
+        """Test para consultas por índice simple y compuesto"""
+        running = list(self.repository.iter_ids(state=InstanceState.RUNNING))
+        assert running == ["i-0987654321fedcba0", "i-1234567890abcdef0", "i-fedcba0987654321"]
+        
+        combined = list(self.repository.iter_ids(
+            state=InstanceState.RUNNING,
+            region=AWSRegion.US_EAST_1,
+            instance_type=InstanceType.M5_LARGE
+        ))
+        assert combined == ["i-0987654321fedcba0"]
+        
+        assert list(self.repository.iter_ids(region=AWSRegion.SA_EAST_1)) == []
+    
+    def test_set_state_updates_indexes(self):
+        """Test para la actualización incremental de índices al cambiar el estado"""
+        instance_id = "i-1234567890abcdef0"
+        
+        self.repository.set_state(instance_id, InstanceState.STOPPING)
+        
+        assert self.repository[instance_id].state == InstanceState.STOPPING
+        assert instance_id not in self.repository.iter_ids(state=InstanceState.RUNNING)
+        assert instance_id in self.repository.iter_ids(
+            state=InstanceState.STOPPING,
+            region=AWSRegion.US_EAST_1
+        )
+    
+    def test_iter_ids_name_prefix(self):
+        """Test para filtrar por prefijo del nombre sin materializar instancias"""
+        assert list(self.repository.iter_ids(name_prefix="web-")) == ["i-1234567890abcdef0"]
+        assert list(self.repository.iter_ids(state=InstanceState.RUNNING, name_prefix="d")) == ["i-0987654321fedcba0"]
+        assert list(self.repository.iter_ids(state=InstanceState.STOPPED, name_prefix="d")) == []
+        # Un prefijo más largo que el nombre no debe leer el nombre siguiente del buffer
+        assert list(self.repository.iter_ids(name_prefix="web-server-prodd")) == []
+    
+    def test_count(self):
+        """Test para contar por filtros usando el tamaño de las celdas"""
+        assert self.repository.count() == 5
+        assert self.repository.count(state=InstanceState.RUNNING) == 3
+        assert self.repository.count(state=InstanceState.RUNNING, region=AWSRegion.US_EAST_1) == 2
+        assert self.repository.count(region=AWSRegion.SA_EAST_1) == 0
+    
+    def test_count_by(self):
+        """Test para agrupar conteos por cualquier combinación de estado, región y tipo"""
+        assert self.repository.count_by([]) == {(): 5}
+        assert self.repository.count_by(["state"]) == {("running",): 3, ("stopped",): 1, ("stopping",): 1}
+        assert self.repository.count_by(["region", "state"], instance_type=InstanceType.T3_MEDIUM) == {
+            ("us-east-1", "running"): 1,
+        }
+        
+        self.repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        assert self.repository.count_by(["state"])[("stopping",)] == 2
+        assert self.repository.count_by(["state"], region=AWSRegion.SA_EAST_1) == {}
+    
+    def test_set_state_nonexistent(self):
+        """Test para cambiar el estado de una instancia inexistente"""
+        with pytest.raises(KeyError):
+            self.repository.set_state("i-nonexistent", InstanceState.STOPPED)
+    
+    def test_reassign_and_delete(self):
+        """Test para reasignar y eliminar instancias manteniendo los índices"""
+        instance = self.repository["i-abcdef1234567890"]
+        replacement = instance.model_copy(update={"state": InstanceState.RUNNING})
+        
+        self.repository[instance.id] = replacement
+        assert instance.id in self.repository.iter_ids(state=InstanceState.RUNNING)
+        assert instance.id not in self.repository.iter_ids(state=InstanceState.STOPPED)
+        
+        del self.repository[instance.id]
+        assert instance.id not in self.repository
+        assert instance.id not in self.repository.iter_ids()
+        assert instance.id not in self.repository.launched_between()
+    
+    def test_launched_between(self):
+        """Test para el índice ordenado por launch_time"""
+        launched = self.repository.launched_between("2024-01-12T00:00:00Z", "2024-01-19T00:00:00Z")
+        
+        assert launched == ["i-fedcba0987654321", "i-1234567890abcdef0", "i-5678901234abcdef"]
+        
+        # Los extremos pueden tener cualquier forma ISO 8601
+        assert self.repository.launched_between("2024-01-12", "2024-01-19T00:00:00+00:00") == launched
+        with pytest.raises(ValueError):
+            self.repository.launched_between("not-a-date")
+    
+    def test_clear_and_update(self):
+        """Test para la recarga masiva usada al resetear los datos mock"""
+        self.repository.clear()
+        assert len(self.repository) == 0
+        assert list(self.repository.iter_ids(state=InstanceState.RUNNING)) == []
+        
+        self.repository.update({instance.id: instance for instance in get_mock_instances()})
+        assert len(self.repository) == 5
+        assert len(list(self.repository.iter_ids(state=InstanceState.RUNNING))) == 3
+    
+    def test_versions(self):
+        """Test para el contador de versión de la flota y por instancia"""
+        fleet_version = self.repository.version
+        other_version = self.repository.instance_version("i-0987654321fedcba0")
+        
+        self.repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        
+        assert self.repository.version > fleet_version
+        assert self.repository.instance_version("i-1234567890abcdef0") == self.repository.version
+        assert self.repository.instance_version("i-0987654321fedcba0") == other_version
+        assert self.repository.instance_version("i-nonexistent") is None
+        
+        version = self.repository.version
+        self.repository.clear()
+        assert self.repository.version > version
+    
+    def test_reads_consistent_during_writes(self):
+        """Test para no combinar un ID con la fila de otro mientras se reordenan los índices"""
+        fleet = list(iter_fleet(2000, seed=3))
+        repository = InstanceRepository(fleet[1000:])
+        targets = [instance.id for instance in fleet[1000:]]
+        mismatches = []
+        done = threading.Event()
+        
+        def write():
+            # Cada lote inserta IDs entre los existentes y desplaza sus posiciones
+            for _ in range(5):
+                for start in range(0, 1000, 50):
+                    repository.update({instance.id: instance for instance in fleet[start:start + 50]})
+                    for instance in fleet[start:start + 50]:
+                        del repository[instance.id]
+            done.set()
+        
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        writer = threading.Thread(target=write)
+        try:
+            writer.start()
+            while not done.is_set():
+                for instance_id in targets[::25]:
+                    instance = repository.get(instance_id)
+                    if instance is None or instance.id != instance_id:
+                        mismatches.append(instance_id)
+        finally:
+            writer.join()
+            sys.setswitchinterval(interval)
+        
+        assert mismatches == []
+
+class TestColumnarStorage:
+    """Tests para la representación compacta del repositorio"""
+    
+    def test_ipv4_round_trip(self):
+        """Test para empaquetar IPv4 canónicas y rechazar las demás"""
+        for address in ("10.0.1.10", "54.123.45.67", "255.255.255.255", "0.0.0.1"):
+            assert unpack_ipv4(pack_ipv4(address)) == address
+        
+        for address in ("34.567.89.123", "10.1", "010.0.0.1", "not-an-ip", "1.2.3.4 "):
+            assert pack_ipv4(address) is None
+        assert pack_ipv4(None) is None
+    
+    def test_timestamp_round_trip(self):
+        """Test para empaquetar fechas canónicas y rechazar las demás"""
+        for value in ("2024-01-15T10:30:00Z", "1970-01-01T00:00:00Z", "2099-12-31T23:59:59Z", "1960-05-05T05:05:05Z"):
+            assert unpack_timestamp(pack_timestamp(value)) == value
+        
+        for value in ("2024-01-15T10:30:00", "2024-01-15T24:00:00Z", "2024-02-30T10:30:00Z", "2024-01-15T10:30:00.5Z"):
+            assert pack_timestamp(value) is None
+        
+        assert timestamp_key("2024-01-15T10:30:00Z") == timestamp_key("2024-01-15T07:30:00-03:00")
+        assert timestamp_key("2024-01-15") == pack_timestamp("2024-01-15T00:00:00Z")
+        assert timestamp_key("yesterday") is None
+    
+    def test_non_canonical_values_survive_updates(self):
+        """Test para conservar valores no canónicos al reasignar y borrar filas"""
+        repository = InstanceRepository()
+        instance = EC2Instance(
+            id="i-odd",
+            name="odd",
+            type=InstanceType.T3_MICRO,
+            state=InstanceState.RUNNING,
+            region=AWSRegion.US_EAST_1,
+            launch_time="2024-01-15 10:30",
+            private_ip="0.0.0.0",
+            public_ip="999.1.1.1",
+        )
+        repository[instance.id] = instance
+        assert repository[instance.id] == instance
+        assert repository.launched_between("2024-01-15", "2024-01-16") == ["i-odd"]
+        
+        repository[instance.id] = instance.model_copy(update={"name": "renamed", "public_ip": "1.1.1.1"})
+        assert repository[instance.id].public_ip == "1.1.1.1"
+        assert repository[instance.id].name == "renamed"
+        
+        del repository[instance.id]
+        repository["i-other"] = instance.model_copy(update={"id": "i-other", "private_ip": None, "public_ip": None})
+        assert repository["i-other"].private_ip is None
+        assert repository["i-other"].public_ip is None
+    
+    def test_filters_across_cells(self):
+        """Test para verificar los filtros y el cursor contra un recorrido completo"""
+        fleet = list(iter_fleet(3_000, seed=7))
+        repository = InstanceRepository(fleet)
+        
+        filters = [
+            {"state": InstanceState.RUNNING},
+            {"region": AWSRegion.EU_WEST_1},
+            {"state": "stopped", "instance_type": "t3.micro"},
+            {"state": InstanceState.RUNNING, "region": AWSRegion.US_EAST_1, "instance_type": InstanceType.M5_LARGE},
+        ]
+        for query in filters:
+            expected = sorted(
+                instance.id for instance in fleet
+                if instance.state == STATES.values[STATES.encode(query.get("state", instance.state))]
+                and instance.region == getattr(query.get("region"), "value", instance.region)
+                and instance.type == getattr(query.get("instance_type"), "value", query.get("instance_type", instance.type))
+            )
+            assert list(repository.iter_ids(**query)) == expected
+            assert repository.count(**query) == len(expected)
+            assert list(repository.iter_ids(after=expected[10], **query)) == expected[11:]
+    
+    def test_load_columns_matches_models(self):
+        """Test para la carga por columnas: mismos datos e índices que cargar los modelos, sumados a los existentes"""
+        expected = InstanceRepository(get_mock_instances())
+        loaded = InstanceRepository(get_mock_instances())
+        for repository in (expected, loaded):
+            repository.set_state("i-1234567890abcdef0", InstanceState.STOPPED)
+        version = loaded.version
+        
+        expected.update({instance.id: instance for instance in iter_fleet(3_000, seed=7)})
+        load_fleet(loaded, 3_000, seed=7)
+        
+        assert dict(loaded.items()) == dict(expected.items())
+        for query in ({}, {"state": InstanceState.STOPPED}, {"region": AWSRegion.US_EAST_1, "instance_type": "t3.medium"}):
+            assert list(loaded.iter_ids(**query)) == list(expected.iter_ids(**query))
+        assert list(loaded.iter_ids(name_prefix="web-prod")) == list(expected.iter_ids(name_prefix="web-prod"))
+        assert loaded.count_by(["state", "region", "type"]) == expected.count_by(["state", "region", "type"])
+        assert loaded.launched_between() == expected.launched_between()
+        assert loaded.launched_between("2024-01-12", "2024-03-01") == expected.launched_between("2024-01-12", "2024-03-01")
+        assert loaded.version > version
+        assert loaded.instance_version(next(iter(iter_fleet(1, seed=7))).id) == loaded.version
+    
+    def test_load_columns_rejects_duplicates(self):
+        """Test para rechazar IDs repetidos o existentes sin cargar nada"""
+        repository = InstanceRepository(get_mock_instances())
+        columns = next(iter_fleet_columns(100, seed=7))
+        
+        with pytest.raises(ValueError):
+            repository.load_columns([columns, columns])
+        assert len(repository) == 5
+        assert list(repository.iter_ids()) == sorted(instance.id for instance in get_mock_instances())
+        
+        repository.load_columns([columns])
+        version = repository.version
+        with pytest.raises(ValueError):
+            repository.load_columns([columns])
+        assert len(repository) == 105
+        assert repository.version == version
+        assert repository.count() == 105
+        assert len(repository.launched_between()) == 105
+    
+    def test_memory_footprint(self):
+        """Test para verificar que el almacén ocupa varias veces menos que un dict de modelos"""
+        size = 20_000
+        gc.collect()
+        tracemalloc.start()
+        try:
+            models = {instance.id: instance for instance in iter_fleet(size)}
+            models_bytes = tracemalloc.get_traced_memory()[0]
+            del models
+            gc.collect()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            repository = InstanceRepository(iter_fleet(size))
+            repository_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        finally:
+            tracemalloc.stop()
+        
+        assert len(repository) == size
+        assert models_bytes / repository_bytes >= 5
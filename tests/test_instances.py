@@ -1,8 +1,16 @@
+import asyncio
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 from src.app import app
 from src.models import InstanceState, InstanceType, AWSRegion, EC2Instance, StopInstanceResponse
+from src.repositories import InstanceRepository
+from src.routes.instances import _sse_events
+from src.services.backends import InMemoryBackend
+from src.services.ec2_service import EC2Service
+from src.services.notifications import StateChangeHub
+from src.utils.mock_data import get_mock_instances
 
 client = TestClient(app)
 
@@ -32,6 +40,142 @@ class TestInstancesRoutes:
         for field in required_fields:
             assert field in instance
     
+    def test_get_instances_filtered(self):
+        """Test para GET /instances con filtros"""
+        response = client.get("/instances/", params={"state": "running", "region": "us-east-1"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 2
+        assert all(instance["state"] == "running" for instance in data)
+        assert all(instance["region"] == "us-east-1" for instance in data)
+    
+    def test_get_instances_pagination(self):
+        """Test para GET /instances paginado con X-Next-Token"""
+        response = client.get("/instances/", params={"limit": 3})
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        next_token = response.headers["X-Next-Token"]
+        
+        response = client.get("/instances/", params={"limit": 3, "next_token": next_token})
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert "X-Next-Token" not in response.headers
+    
+    def test_get_instances_invalid_token(self):
+        """Test para GET /instances con un cursor inválido"""
+        response = client.get("/instances/", params={"next_token": "not-a-token"})
+        
+        assert response.status_code == 400
+    
+    def test_get_instances_fanout(self):
+        """Test para GET /instances/fanout - stream NDJSON por región"""
+        response = client.get("/instances/fanout", params={"regions": ["us-east-1", "eu-west-1"], "state": "running"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["type"] for line in lines] == ["region", "region", "summary"]
+        assert {line["region"] for line in lines[:2]} == {"us-east-1", "eu-west-1"}
+        summary = lines[-1]
+        assert summary["total_instances"] == 3
+        assert summary["failed"] == []
+    
+    def test_summarize_instances(self):
+        """Test para GET /instances/summary con varios campos de agrupación"""
+        response = client.get("/instances/summary", params={"group_by": ["state", "type"], "region": "us-east-1"})
+        
+        assert response.status_code == 200
+        assert response.json() == {
+            "group_by": ["state", "type"],
+            "total": 2,
+            "groups": [
+                {"state": "running", "type": "m5.large", "count": 1},
+                {"state": "running", "type": "t3.medium", "count": 1},
+            ],
+        }
+        assert client.get("/instances/summary").json()["groups"][0] == {"state": "running", "count": 3}
+        assert client.get("/instances/summary", params={"group_by": "name"}).status_code == 422
+    
+    def test_summarize_instances_etag(self):
+        """Test para revalidar el resumen con el ETag de la flota"""
+        etag = client.get("/instances/summary").headers["ETag"]
+        assert client.get("/instances/summary", headers={"If-None-Match": etag}).status_code == 304
+        
+        client.post("/instances/i-1234567890abcdef0/stop")
+        response = client.get("/instances/summary", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert {"state": "stopping", "count": 2} in response.json()["groups"]
+    
+    def test_get_instances_etag_not_modified(self):
+        """Test para GET /instances con If-None-Match - 304 sin cuerpo"""
+        response = client.get("/instances/")
+        etag = response.headers["ETag"]
+        
+        response = client.get("/instances/", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+    
+    def test_get_instances_etag_changes_after_stop(self):
+        """Test para verificar que el ETag cambia al detener una instancia"""
+        etag = client.get("/instances/").headers["ETag"]
+        client.post("/instances/i-1234567890abcdef0/stop")
+        
+        response = client.get("/instances/", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+    
+    def test_get_instance_etag(self):
+        """Test para GET /instances/{id} con If-None-Match"""
+        instance_id = "i-1234567890abcdef0"
+        etag = client.get(f"/instances/{instance_id}").headers["ETag"]
+        
+        assert client.get(f"/instances/{instance_id}", headers={"If-None-Match": etag}).status_code == 304
+        
+        # Un cambio en otra instancia no invalida el ETag de esta
+        client.post("/instances/i-0987654321fedcba0/stop")
+        assert client.get(f"/instances/{instance_id}", headers={"If-None-Match": etag}).status_code == 304
+        
+        client.post(f"/instances/{instance_id}/stop")
+        assert client.get(f"/instances/{instance_id}", headers={"If-None-Match": etag}).status_code == 200
+    
+    def test_etag_not_reused_across_restarts(self):
+        """Test para no responder 304 a un ETag de otro arranque con la misma versión"""
+        etag = client.get("/instances/").headers["ETag"]
+        
+        with patch("src.services.backends.base.BOOT_EPOCH", "restarted"):
+            response = client.get("/instances/", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('W/"restarted-')
+    
+    def test_export_ndjson(self):
+        """Test para GET /instances/export - NDJSON en streaming"""
+        response = client.get("/instances/export")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines] == sorted(line["id"] for line in lines)
+        assert len(lines) == 5
+    
+    @patch('src.routes.instances.EXPORT_PAGE_SIZE', 2)
+    def test_export_csv_paginated(self):
+        """Test para GET /instances/export - CSV recorriendo varias páginas"""
+        response = client.get("/instances/export", params={"format": "csv", "state": "running"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = response.text.splitlines()
+        assert rows[0] == "id,name,type,state,region,launch_time,private_ip,public_ip"
+        assert len(rows) == 4
+        assert all(",running," in row for row in rows[1:])
+    
     def test_get_instance_by_id_success(self):
         """Test para GET /instances/{id} - éxito"""
         instance_id = "i-1234567890abcdef0"
@@ -94,6 +238,84 @@ class TestInstancesRoutes:
         data = response.json()
         assert "already stopping" in data["detail"].lower()
     
+    def test_stop_instance_idempotency_key(self):
+        """Test para POST /instances/{id}/stop - reintento con Idempotency-Key"""
+        instance_id = "i-1234567890abcdef0"
+        headers = {"Idempotency-Key": "test-stop-idempotency-key"}
+        
+        first = client.post(f"/instances/{instance_id}/stop", headers=headers)
+        retry = client.post(f"/instances/{instance_id}/stop", headers=headers)
+        without_key = client.post(f"/instances/{instance_id}/stop")
+        conflict = client.post("/instances/i-0987654321fedcba0/stop", headers=headers)
+        
+        assert first.status_code == 200
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert without_key.status_code == 400
+        assert conflict.status_code == 422
+    
+    def test_stop_instances_batch(self):
+        """Test para POST /instances/stop - lote con fallos parciales"""
+        response = client.post("/instances/stop", json={
+            "instance_ids": ["i-1234567890abcdef0", "i-0987654321fedcba0", "i-nonexistent"]
+        })
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["stopped"] == 2
+        assert data["failed"] == 1
+        assert data["results"][0]["current_state"] == "stopping"
+        assert data["results"][2]["success"] is False
+        assert "not found" in data["results"][2]["message"].lower()
+    
+    def test_stop_instances_empty_batch(self):
+        """Test para POST /instances/stop - lote vacío"""
+        response = client.post("/instances/stop", json={"instance_ids": []})
+        
+        assert response.status_code == 422
+    
+    def test_wait_already_in_state(self):
+        """Test para GET /instances/{id}/wait - la instancia ya está en el estado"""
+        response = client.get("/instances/i-1234567890abcdef0/wait", params={"state": "running", "timeout": 1})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reached"] is True
+        assert data["instance"]["state"] == "running"
+    
+    def test_wait_timeout(self):
+        """Test para GET /instances/{id}/wait - vence el timeout"""
+        response = client.get("/instances/i-1234567890abcdef0/wait", params={"state": "stopped", "timeout": 0.1})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reached"] is False
+        assert data["waited_ms"] >= 100
+    
+    def test_wait_reached_after_transition(self):
+        """Test para GET /instances/{id}/wait - se despierta con la transición"""
+        import threading
+        from src.services.ec2_service import ec2_service
+        
+        instance_id = "i-5678901234abcdef"  # Esta instancia está STOPPING
+        timer = threading.Timer(0.2, ec2_service.simulate_state_transition, args=[instance_id])
+        timer.start()
+        
+        response = client.get(f"/instances/{instance_id}/wait", params={"state": "stopped", "timeout": 5})
+        timer.join()
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reached"] is True
+        assert data["instance"]["state"] == "stopped"
+        assert data["waited_ms"] < 5000
+    
+    def test_wait_not_found(self):
+        """Test para GET /instances/{id}/wait - instancia inexistente"""
+        response = client.get("/instances/i-nonexistent/wait", params={"state": "stopped", "timeout": 1})
+        
+        assert response.status_code == 404
+    
     def test_root_endpoint(self):
         """Test para el endpoint raíz"""
         response = client.get("/")
@@ -140,6 +362,16 @@ class TestInstancesRoutes:
         data = response.json()
         assert "Error stopping instance" in data["detail"]
     
+    def test_lifespan_starts_transition_scheduler(self):
+        """Test para verificar que el scheduler corre durante el ciclo de vida de la app"""
+        from src.services.scheduler import transition_scheduler
+        
+        with TestClient(app):
+            assert transition_scheduler.running
+            assert transition_scheduler.pending >= 1
+        
+        assert not transition_scheduler.running
+    
     def test_openapi_docs(self):
         """Test para verificar que la documentación OpenAPI está disponible"""
         response = client.get("/docs")
@@ -159,3 +391,49 @@ class TestInstancesRoutes:
         # Verificar que no hay errores CORS en las respuestas
         assert response.status_code == 200
         # FastAPI maneja automáticamente las opciones CORS
+    
+    def test_get_instances_body_matches_model(self):
+        """Test para verificar que el cuerpo pre-serializado respeta el modelo"""
+        response = client.get("/instances/")
+        
+        assert response.headers["content-type"] == "application/json"
+        for data in response.json():
+            assert EC2Instance.model_validate(data).model_dump(mode="json") == data
+
+
+class TestInstanceEvents:
+    """Tests para el feed SSE de cambios de estado"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.service = EC2Service(backend=InMemoryBackend(InstanceRepository(get_mock_instances())))
+        self.hub = StateChangeHub(self.service)
+    
+    @pytest.mark.asyncio
+    async def test_sse_events_format(self):
+        """Test para el formato de los eventos, el aviso de descartes y el heartbeat"""
+        with self.hub.subscribe(maxsize=1) as subscription:
+            events = _sse_events(subscription, heartbeat=0.05)
+            assert await events.__anext__() == b": connected\n\n"
+            
+            self.service.stop_instance("i-1234567890abcdef0")
+            self.service.stop_instance("i-0987654321fedcba0")
+            await asyncio.sleep(0)
+            
+            dropped = await events.__anext__()
+            assert dropped == b'event: dropped\ndata: {"dropped": 1}\n\n'
+            
+            event = (await events.__anext__()).decode()
+            lines = event.strip().split("\n")
+            assert lines[:2] == ["id: 1", "event: state-change"]
+            payload = json.loads(lines[2][len("data: "):])
+            assert payload["instance_id"] == "i-0987654321fedcba0"
+            assert payload["current_state"] == "stopping"
+            
+            assert await events.__anext__() == b": keep-alive\n\n"
+            await events.aclose()
+    
+    def test_events_route_registered(self):
+        """Test para la ruta del feed, declarada antes de /instances/{instance_id}"""
+        paths = [route.path for route in app.routes]
+        assert paths.index("/instances/events") < paths.index("/instances/{instance_id}")
@@ -0,0 +1,154 @@
+import json
+import logging
+import queue
+
+import pytest
+from fastapi.testclient import TestClient
+from src.app import app
+from src.config import Settings
+from src.logging_config import (
+    SAMPLED_KEY,
+    DeferredQueueHandler,
+    JSONFormatter,
+    SamplingFilter,
+    configure_logging,
+    dropped_records,
+    parse_sample_rates,
+    request_scope,
+)
+
+client = TestClient(app)
+
+
+class ListHandler(logging.Handler):
+    """Handler que guarda los registros emitidos"""
+    
+    def __init__(self):
+        super().__init__()
+        self.records = []
+    
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(level=logging.INFO, msg="Instance %s not found", args=("i-1",)):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+class TestSampling:
+    """Tests para el sampling de logs por ruta"""
+    
+    def test_parse_sample_rates(self):
+        """Test para leer las tasas por ruta"""
+        rates = parse_sample_rates(["/instances/{instance_id}=0.01", " /instances/ = 0.5"])
+        assert rates == {"/instances/{instance_id}": 0.01, "/instances/": 0.5}
+        
+        with pytest.raises(ValueError):
+            parse_sample_rates(["/instances/"])
+        with pytest.raises(ValueError):
+            parse_sample_rates(["/instances/=2"])
+    
+    def test_logs_outside_request_always_kept(self):
+        """Test para conservar los logs emitidos fuera de un request"""
+        sampling = SamplingFilter(default_rate=0.0)
+        record = make_record()
+        
+        assert sampling.filter(record) is True
+        assert record.route is None
+    
+    def test_decision_taken_once_per_request(self):
+        """Test para conservar o descartar todas las líneas INFO de un request, nunca los warnings"""
+        sampling = SamplingFilter(default_rate=0.0, route_rates={"/kept": 1.0})
+        dropped_scope = {"type": "http"}
+        kept_scope = {"type": "http", "route": type("Route", (), {"path": "/kept"})()}
+        
+        token = request_scope.set(dropped_scope)
+        try:
+            assert sampling.filter(make_record()) is False
+            assert sampling.filter(make_record(logging.DEBUG)) is False
+            assert sampling.filter(make_record(logging.WARNING)) is True
+            assert sampling.filter(make_record(logging.ERROR)) is True
+        finally:
+            request_scope.reset(token)
+        assert dropped_scope[SAMPLED_KEY] is False
+        
+        token = request_scope.set(kept_scope)
+        try:
+            record = make_record()
+            assert sampling.filter(record) is True
+            assert record.route == "/kept"
+        finally:
+            request_scope.reset(token)
+    
+    def test_route_sampling_through_app(self):
+        """Test para descartar los logs de éxito de una ruta y conservar sus warnings"""
+        handler = ListHandler()
+        handler.addFilter(SamplingFilter(route_rates={"/instances/{instance_id}": 0.0}))
+        route_logger = logging.getLogger("src.routes.instances")
+        route_logger.addHandler(handler)
+        try:
+            client.get("/instances/i-1234567890abcdef0")
+            client.get("/instances/i-nonexistent")
+            client.get("/instances/")
+        finally:
+            route_logger.removeHandler(handler)
+        
+        messages = [(record.levelno, record.getMessage(), record.route) for record in handler.records]
+        assert (logging.WARNING, "Instance i-nonexistent not found", "/instances/{instance_id}") in messages
+        assert all(route != "/instances/{instance_id}" for level, _, route in messages if level == logging.INFO)
+        assert (logging.INFO, "GET /instances endpoint called", "/instances/") in messages
+
+
+class TestHandlers:
+    """Tests para el formato JSON y la cola de logs"""
+    
+    def test_json_formatter(self):
+        """Test para emitir un objeto JSON por registro"""
+        record = make_record(logging.WARNING)
+        record.route = "/instances/{instance_id}"
+        
+        entry = json.loads(JSONFormatter().format(record))
+        
+        assert entry["level"] == "WARNING"
+        assert entry["logger"] == "test"
+        assert entry["message"] == "Instance i-1 not found"
+        assert entry["route"] == "/instances/{instance_id}"
+        assert "exception" not in entry
+    
+    def test_queue_handler_defers_formatting(self):
+        """Test para encolar el registro sin formatear sus argumentos"""
+        handler = DeferredQueueHandler(queue.Queue())
+        record = make_record()
+        
+        handler.handle(record)
+        
+        queued = handler.queue.get_nowait()
+        assert queued is record
+        assert queued.msg == "Instance %s not found"
+        assert queued.args == ("i-1",)
+    
+    def test_full_queue_drops_without_blocking(self):
+        """Test para descartar y contar los registros cuando la cola está llena"""
+        handler = DeferredQueueHandler(queue.Queue(1))
+        before = dropped_records.value(("INFO",))
+        
+        handler.handle(make_record())
+        handler.handle(make_record())
+        
+        assert handler.queue.qsize() == 1
+        assert dropped_records.value(("INFO",)) == before + 1
+    
+    def test_configure_logging_json_with_listener(self, capsys):
+        """Test para escribir JSON desde el thread del listener"""
+        root = logging.getLogger()
+        previous_handlers, previous_level = list(root.handlers), root.level
+        try:
+            listener = configure_logging(Settings(ec2_log_format="json", ec2_log_queue_size=100))
+            logging.getLogger("src.test").info("Stopped %s instances", 3)
+            listener.stop()
+        finally:
+            root.handlers[:] = previous_handlers
+            root.setLevel(previous_level)
+        
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert {"level": "INFO", "logger": "src.test", "message": "Stopped 3 instances"}.items() <= lines[-1].items()
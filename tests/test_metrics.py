@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from src.app import app
+from src.services.ec2_service import EC2Service
+from src.services.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    http_request_duration,
+    http_requests,
+    service_duration,
+    service_errors,
+    timed,
+)
+
+client = TestClient(app)
+
+
+class TestMetrics:
+    """Tests para las métricas con shards por thread"""
+    
+    def test_counter_sums_thread_shards(self):
+        """Test para sumar los incrementos hechos desde varios threads"""
+        counter = Counter("jobs_total", "Jobs", ("queue",))
+        
+        def work():
+            for _ in range(1000):
+                counter.inc(("fast",))
+        
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(("slow",), 2)
+        
+        assert counter.value(("fast",)) == 8000
+        assert counter.value(("slow",)) == 2
+        assert len(counter._shards) == 9
+    
+    def test_gauge_inc_and_dec_in_different_threads(self):
+        """Test para un gauge que sube en un thread y baja en otro"""
+        gauge = Gauge("in_flight", "En curso")
+        gauge.inc()
+        thread = threading.Thread(target=gauge.dec)
+        thread.start()
+        thread.join()
+        
+        assert gauge.value() == 0
+    
+    def test_histogram_render(self):
+        """Test para el formato de texto de Prometheus de un histograma"""
+        histogram = Histogram("latency_seconds", "Latencia", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, ('/a"b',))
+        
+        assert histogram.render().splitlines() == [
+            "# HELP latency_seconds Latencia",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+            'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a\\"b"} 3.65',
+            'latency_seconds_count{route="/a\\"b"} 4',
+        ]
+    
+    def test_registry_rejects_duplicates(self):
+        """Test para no registrar dos métricas con el mismo nombre"""
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests")
+        
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "Requests")
+    
+    def test_timed_records_errors(self):
+        """Test para medir una función y contar sus excepciones por tipo"""
+        @timed("failing")
+        def failing():
+            raise KeyError("boom")
+        
+        with pytest.raises(KeyError):
+            failing()
+        
+        assert service_duration.count(("failing",)) == 1
+        assert service_errors.value(("failing", "KeyError")) == 1
+
+
+class TestMetricsEndpoint:
+    """Tests para el middleware y el endpoint /metrics"""
+    
+    def test_requests_labeled_by_route_template(self):
+        """Test para etiquetar por plantilla de ruta y no por path"""
+        labels = ("GET", "/instances/{instance_id}", "404")
+        before = http_requests.value(labels)
+        latencies = http_request_duration.count(("GET", "/instances/{instance_id}"))
+        
+        client.get("/instances/i-nonexistent-1")
+        client.get("/instances/i-nonexistent-2")
+        client.get("/unknown/path")
+        
+        assert http_requests.value(labels) == before + 2
+        assert http_request_duration.count(("GET", "/instances/{instance_id}")) == latencies + 2
+        assert http_requests.value(("GET", "unmatched", "404")) >= 1
+    
+    def test_metrics_endpoint(self):
+        """Test para exponer las métricas HTTP y de EC2Service en formato Prometheus"""
+        client.get("/instances/")
+        
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'http_requests_total{method="GET",route="/instances/",status="200"}' in body
+        assert 'http_response_size_bytes_count{method="GET",route="/instances/"}' in body
+        assert 'http_requests_in_flight{method="GET"} 1' in body
+        assert 'ec2_service_duration_seconds_count{method="get_all_instances"}' in body
+    
+    def test_service_methods_instrumented(self):
+        """Test para medir cada método público de EC2Service"""
+        before = service_duration.count(("get_instance_by_id",))
+        
+        EC2Service().get_instance_by_id("i-1234567890abcdef0")
+        
+        assert service_duration.count(("get_instance_by_id",)) == before + 1
+        assert EC2Service.get_instance_by_id.__name__ == "get_instance_by_id"
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from src.models import InstanceState
+from src.repositories import InstanceRepository
+from src.services.backends import InMemoryBackend
+from src.services.ec2_service import EC2Service
+from src.services.notifications import StateChangeHub
+from src.utils.mock_data import get_mock_instances
+
+
+class TestStateChangeHub:
+    """Tests para el hub de notificaciones de cambios de estado"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.service = EC2Service(backend=InMemoryBackend(InstanceRepository(get_mock_instances())))
+        self.hub = StateChangeHub(self.service)
+    
+    @pytest.mark.asyncio
+    async def test_waiter_resolved_on_target_state(self):
+        """Test para despertar a quien espera el estado alcanzado"""
+        instance_id = "i-1234567890abcdef0"
+        
+        with self.hub.watch(instance_id, InstanceState.STOPPED) as stopped, \
+                self.hub.watch(instance_id, InstanceState.STOPPING) as stopping:
+            self.service.stop_instance(instance_id)
+            change = await asyncio.wait_for(stopping, 1)
+            
+            assert change.current_state == "stopping"
+            assert not stopped.done()
+        
+        assert self.hub.waiting == 0
+    
+    @pytest.mark.asyncio
+    async def test_change_from_other_thread(self):
+        """Test para cambios originados en un thread del pool"""
+        instance_id = "i-5678901234abcdef"
+        
+        with self.hub.watch(instance_id, InstanceState.STOPPED) as stopped:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.service.simulate_state_transition, instance_id
+            )
+            change = await asyncio.wait_for(stopped, 1)
+        
+        assert change.previous_state == "stopping"
+    
+    @pytest.mark.asyncio
+    async def test_many_parked_waiters(self):
+        """Test para miles de esperas estacionadas sobre distintas instancias"""
+        entries = [self.hub.watch(f"i-{number}", InstanceState.STOPPED) for number in range(5000)]
+        for entry in entries:
+            entry.__enter__()
+        assert self.hub.waiting == 5000
+        
+        with self.hub.watch("i-1234567890abcdef0", InstanceState.STOPPING) as stopping:
+            self.service.stop_instance("i-1234567890abcdef0")
+            await asyncio.wait_for(stopping, 1)
+        
+        for entry in entries:
+            entry.__exit__(None, None, None)
+        assert self.hub.waiting == 0
+    
+    @pytest.mark.asyncio
+    async def test_subscription_filters(self):
+        """Test para suscripciones filtradas por región y estado"""
+        with self.hub.subscribe(regions=["us-west-2"]) as west, \
+                self.hub.subscribe(states=[InstanceState.STOPPING]) as stopping, \
+                self.hub.subscribe() as everything:
+            assert self.hub.subscribers == 3
+            self.service.stop_instance("i-1234567890abcdef0")
+            self.service.simulate_state_transition("i-5678901234abcdef")
+            
+            changes = await everything.get(timeout=1)
+            assert [change.instance_id for change in changes] == ["i-1234567890abcdef0", "i-5678901234abcdef"]
+            assert [change.current_state for change in await stopping.get(timeout=1)] == ["stopping"]
+            assert await west.get(timeout=0.05) == []
+        
+        assert self.hub.subscribers == 0
+    
+    @pytest.mark.asyncio
+    async def test_subscription_drops_oldest(self):
+        """Test para descartar los eventos más viejos cuando la cola está llena"""
+        with self.hub.subscribe(maxsize=2) as subscription:
+            for instance_id in ["i-1234567890abcdef0", "i-0987654321fedcba0", "i-fedcba0987654321"]:
+                self.service.stop_instance(instance_id)
+            await asyncio.sleep(0)
+            
+            changes = await subscription.get(timeout=1)
+        
+        assert [change.instance_id for change in changes] == ["i-0987654321fedcba0", "i-fedcba0987654321"]
+        assert subscription.dropped == 1
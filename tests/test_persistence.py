@@ -0,0 +1,214 @@
+import os
+import threading
+
+import pytest
+from src.config import Settings
+from src.models import InstanceState
+from src.repositories import InstanceRepository
+from src.repositories.persistence import (
+    InstanceStore,
+    SNAPSHOT_FILE,
+    journal_segments,
+    read_journal,
+    read_snapshot,
+    write_snapshot,
+)
+from src.services.backends import create_backend
+from src.utils.fleet import iter_fleet, load_fleet
+from src.utils.mock_data import get_mock_instances
+
+
+def _seed():
+    return list(get_mock_instances()) + list(iter_fleet(200, seed=7))
+
+
+def _assert_same(recovered: InstanceRepository, expected: InstanceRepository):
+    """Mismas instancias, versiones e índices"""
+    assert dict(recovered.items()) == dict(expected.items())
+    assert recovered.version == expected.version
+    assert recovered.instance_version("i-1234567890abcdef0") == expected.instance_version("i-1234567890abcdef0")
+    assert list(recovered.iter_ids(state=InstanceState.RUNNING)) == list(expected.iter_ids(state=InstanceState.RUNNING))
+    assert list(recovered.iter_ids(name_prefix="web")) == list(expected.iter_ids(name_prefix="web"))
+    assert recovered.count_by(["state", "region"]) == expected.count_by(["state", "region"])
+    assert recovered.launched_between() == expected.launched_between()
+
+
+class TestSnapshots:
+    """Tests para los snapshots binarios del repositorio"""
+    
+    def test_round_trip(self, tmp_path):
+        """Test para recuperar columnas, índices, valores no canónicos y filas libres"""
+        repository = InstanceRepository(_seed())
+        renamed = repository["i-abcdef1234567890"].model_copy(update={"name": "renamed-environment"})
+        repository[renamed.id] = renamed
+        del repository["i-fedcba0987654321"]
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        
+        path = str(tmp_path / SNAPSHOT_FILE)
+        columns, _ = repository.export_columns()
+        write_snapshot(path, columns, 42)
+        columns, lsn = read_snapshot(path)
+        recovered = InstanceRepository.from_columns(columns)
+        
+        assert lsn == 42
+        _assert_same(recovered, repository)
+        assert recovered["i-0987654321fedcba0"].public_ip == "34.567.89.123"
+        assert "i-fedcba0987654321" not in recovered
+        
+        # El repositorio recuperado sigue aceptando escrituras
+        recovered["i-fedcba0987654321"] = get_mock_instances()[3]
+        assert recovered["i-fedcba0987654321"] == get_mock_instances()[3]
+    
+    def test_corrupted_snapshot(self, tmp_path):
+        """Test para rechazar un snapshot con una sección dañada"""
+        path = str(tmp_path / SNAPSHOT_FILE)
+        columns, _ = InstanceRepository(_seed()).export_columns()
+        write_snapshot(path, columns, 0)
+        with open(path, "r+b") as snapshot:
+            snapshot.seek(-16, os.SEEK_END)
+            snapshot.write(b"\xff" * 8)
+        
+        with pytest.raises(ValueError):
+            read_snapshot(path)
+
+
+class TestInstanceStore:
+    """Tests para la recuperación desde snapshot y journal"""
+    
+    def test_seeds_empty_directory(self, tmp_path):
+        """Test para cargar la flota inicial y escribir el primer snapshot"""
+        store = InstanceStore(str(tmp_path))
+        repository = store.open(_seed)
+        store.close()
+        
+        assert len(repository) == 205
+        assert os.path.exists(store.snapshot_path)
+        
+        # El segundo arranque no vuelve a generar la flota
+        store = InstanceStore(str(tmp_path))
+        recovered = store.open(lambda: pytest.fail("seed called on recovery"))
+        store.close()
+        _assert_same(recovered, repository)
+    
+    def test_seeds_with_loaded_repository(self, tmp_path):
+        """Test para usar tal cual el repositorio que devuelve la semilla (carga por columnas)"""
+        store = InstanceStore(str(tmp_path))
+        seeded = load_fleet(InstanceRepository(get_mock_instances()), 200, seed=7)
+        repository = store.open(lambda: seeded)
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        store.close()
+        
+        assert repository is seeded
+        store = InstanceStore(str(tmp_path))
+        recovered = store.open(lambda: pytest.fail("seed called on recovery"))
+        store.close()
+        _assert_same(recovered, repository)
+        assert recovered.keys() == InstanceRepository(_seed()).keys()
+    
+    def test_replays_journal_after_crash(self, tmp_path):
+        """Test para aplicar los registros del journal posteriores al snapshot"""
+        store = InstanceStore(str(tmp_path))
+        repository = store.open(_seed)
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPED)
+        repository["i-abcdef1234567890"] = repository["i-abcdef1234567890"].model_copy(update={"name": "renamed"})
+        del repository["i-fedcba0987654321"]
+        store.journal.flush()
+        # Caída: sin snapshot final ni cierre ordenado
+        store.close(snapshot=False)
+        
+        store = InstanceStore(str(tmp_path))
+        recovered = store.open(_seed)
+        store.close()
+        
+        _assert_same(recovered, repository)
+        assert recovered["i-1234567890abcdef0"].state == InstanceState.STOPPED
+        assert recovered["i-abcdef1234567890"].name == "renamed"
+    
+    def test_clear_is_journaled(self, tmp_path):
+        """Test para registrar el vaciado del repositorio"""
+        store = InstanceStore(str(tmp_path))
+        repository = store.open(_seed)
+        repository.clear()
+        repository.update({"i-1234567890abcdef0": get_mock_instances()[0]})
+        store.close(snapshot=False)
+        
+        store = InstanceStore(str(tmp_path))
+        recovered = store.open(_seed)
+        store.close()
+        assert list(recovered) == ["i-1234567890abcdef0"]
+    
+    def test_discards_torn_tail(self, tmp_path):
+        """Test para descartar un registro escrito a medias y seguir escribiendo detrás"""
+        store = InstanceStore(str(tmp_path))
+        repository = store.open(_seed)
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        store.close(snapshot=False)
+        (segment,) = [path for path in journal_segments(str(tmp_path)) if os.path.getsize(path)]
+        with open(segment, "ab") as journal:
+            journal.write(b"\x01\x02\x03")
+        
+        store = InstanceStore(str(tmp_path))
+        recovered = store.open(_seed)
+        recovered.set_state("i-1234567890abcdef0", InstanceState.STOPPED)
+        store.close(snapshot=False)
+        
+        assert [op for _, op, _ in read_journal(segment)] == [1]
+        store = InstanceStore(str(tmp_path))
+        assert store.open(_seed)["i-1234567890abcdef0"].state == InstanceState.STOPPED
+        store.close()
+    
+    def test_snapshot_removes_old_segments(self, tmp_path):
+        """Test para borrar los segmentos cubiertos por un snapshot"""
+        store = InstanceStore(str(tmp_path))
+        repository = store.open(_seed)
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        
+        lsn = store.snapshot()
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPED)
+        store.close(snapshot=False)
+        
+        assert lsn == 1
+        (segment,) = journal_segments(str(tmp_path))
+        assert [lsn for lsn, _, _ in read_journal(segment)] == [2]
+        store = InstanceStore(str(tmp_path))
+        assert store.open(_seed)["i-1234567890abcdef0"].state == InstanceState.STOPPED
+        store.close()
+    
+    def test_snapshot_rotates_outside_repository_lock(self, tmp_path):
+        """Test para rotar el journal sin el lock del repositorio y conservar lo escrito después de la copia"""
+        store = InstanceStore(str(tmp_path))
+        repository = store.open(_seed)
+        repository.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        rotate = store.journal.rotate
+        
+        def rotate_after_write():
+            # Con el lock del repositorio tomado, el writer quedaría bloqueado
+            writer = threading.Thread(target=repository.set_state, args=("i-1234567890abcdef0", InstanceState.STOPPED))
+            writer.start()
+            writer.join(timeout=5)
+            assert not writer.is_alive()
+            return rotate()
+        
+        store.journal.rotate = rotate_after_write
+        assert store.snapshot() == 1
+        store.close(snapshot=False)
+        
+        # El segmento con el registro 2 no está cubierto por el snapshot: se conserva
+        assert [lsn for path in journal_segments(str(tmp_path)) for lsn, _, _ in read_journal(path)] == [1, 2]
+        store = InstanceStore(str(tmp_path))
+        assert store.open(_seed)["i-1234567890abcdef0"].state == InstanceState.STOPPED
+        store.close()
+    
+    def test_memory_backend_survives_restart(self, tmp_path):
+        """Test para conservar un cambio de estado del backend en memoria entre reinicios"""
+        settings = Settings(ec2_data_dir=str(tmp_path), ec2_transitions_enabled=False)
+        backend = create_backend(settings)
+        backend.set_state("i-1234567890abcdef0", InstanceState.STOPPING)
+        backend.close()
+        
+        backend = create_backend(settings)
+        try:
+            assert backend.get_instance("i-1234567890abcdef0").state == InstanceState.STOPPING
+        finally:
+            backend.close()
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from src.models import InstanceState
+from src.repositories import InstanceRepository
+from src.services.async_ec2_service import AsyncEC2Service
+from src.services.backends import InMemoryBackend
+from src.services.ec2_service import EC2Service
+from src.services.scheduler import StateTransitionScheduler
+from src.utils.mock_data import get_mock_instances
+
+
+def _build_scheduler(repository, delay: float = 0.05) -> StateTransitionScheduler:
+    service = AsyncEC2Service(EC2Service(backend=InMemoryBackend(repository)))
+    return StateTransitionScheduler(service, delays={
+        InstanceState.PENDING: delay,
+        InstanceState.STOPPING: delay,
+        InstanceState.SHUTTING_DOWN: delay,
+    })
+
+
+async def _wait_until(condition, timeout: float = 2.0):
+    """Espera activa acotada hasta que se cumpla la condición"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+class TestStateTransitionScheduler:
+    """Tests para el scheduler de transiciones automáticas"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.repository = InstanceRepository(get_mock_instances())
+    
+    @pytest.mark.asyncio
+    async def test_existing_intermediate_states_are_scheduled(self):
+        """Test para agendar al iniciar las instancias que ya estaban en stopping"""
+        scheduler = _build_scheduler(self.repository)
+        
+        await scheduler.start()
+        assert scheduler.pending == 1
+        await _wait_until(lambda: self.repository["i-5678901234abcdef"].state == InstanceState.STOPPED)
+        await scheduler.stop()
+        
+        assert scheduler.applied == 1
+    
+    @pytest.mark.asyncio
+    async def test_stop_is_completed_in_background(self):
+        """Test para completar stopping→stopped después de detener una instancia"""
+        scheduler = _build_scheduler(self.repository)
+        await scheduler.start()
+        
+        result = await scheduler.service.stop_instance("i-1234567890abcdef0")
+        assert result.current_state == InstanceState.STOPPING
+        
+        await _wait_until(lambda: self.repository["i-1234567890abcdef0"].state == InstanceState.STOPPED)
+        await scheduler.stop()
+    
+    @pytest.mark.asyncio
+    async def test_pending_and_shutting_down_transitions(self):
+        """Test para pending→running y shutting-down→terminated"""
+        self.repository.set_state("i-1234567890abcdef0", InstanceState.PENDING)
+        self.repository.set_state("i-0987654321fedcba0", InstanceState.SHUTTING_DOWN)
+        scheduler = _build_scheduler(self.repository)
+        
+        await scheduler.start()
+        await _wait_until(lambda: scheduler.pending == 0 and scheduler.applied == 3)
+        await scheduler.stop()
+        
+        assert self.repository["i-1234567890abcdef0"].state == InstanceState.RUNNING
+        assert self.repository["i-0987654321fedcba0"].state == InstanceState.TERMINATED
+    
+    @pytest.mark.asyncio
+    async def test_stale_transition_is_skipped(self):
+        """Test para ignorar una transición si la instancia ya cambió de estado"""
+        scheduler = _build_scheduler(self.repository, delay=10)
+        await scheduler.start()
+        
+        self.repository.set_state("i-5678901234abcdef", InstanceState.RUNNING)
+        scheduler.schedule("i-5678901234abcdef", InstanceState.STOPPING, delay=0)
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        
+        assert self.repository["i-5678901234abcdef"].state == InstanceState.RUNNING
+    
+    @pytest.mark.asyncio
+    async def test_many_transitions_single_task(self):
+        """Test para miles de transiciones en curso con una única tarea"""
+        template = get_mock_instances()[0]
+        fleet = [
+            template.model_copy(update={"id": f"i-{number:017x}", "state": InstanceState.STOPPING})
+            for number in range(20_000)
+        ]
+        repository = InstanceRepository(fleet)
+        scheduler = _build_scheduler(repository, delay=0.1)
+        tasks_before = len(asyncio.all_tasks())
+        
+        await scheduler.start()
+        assert scheduler.pending == 20_000
+        assert len(asyncio.all_tasks()) == tasks_before + 1
+        
+        await _wait_until(lambda: scheduler.applied == 20_000, timeout=10)
+        await scheduler.stop()
+        
+        assert all(instance.state == InstanceState.STOPPED for instance in repository.values())
@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.responses import ORJSONResponse
+from src.app import app
+from src.config import Settings
+from src.server import APP, main, server_options, worker_count
+
+
+class TestServerProfiles:
+    """Tests para los perfiles de arranque del servidor"""
+    
+    def test_dev_profile_reloads_single_process(self):
+        """Test para el perfil dev: reload y un solo proceso"""
+        options = server_options(Settings(ec2_server_port=9000))
+        
+        assert options == {"host": "0.0.0.0", "port": 9000, "reload": True, "log_level": "info"}
+    
+    def test_prod_profile(self):
+        """Test para el perfil prod: workers, uvloop/httptools, keep-alive, backlog y apagado ordenado"""
+        options = server_options(Settings(
+            ec2_server_mode="prod",
+            ec2_server_workers=4,
+            ec2_server_keep_alive=30,
+            ec2_server_backlog=4096,
+            ec2_server_graceful_timeout=10,
+        ))
+        
+        assert "reload" not in options
+        assert options["workers"] == 4
+        assert options["loop"] in ("uvloop", "asyncio")
+        assert options["http"] in ("httptools", "h11")
+        assert options["timeout_keep_alive"] == 30
+        assert options["backlog"] == 4096
+        assert options["timeout_graceful_shutdown"] == 10
+        assert options["access_log"] is False
+    
+    def test_worker_count_defaults_to_cores(self):
+        """Test para usar un worker por núcleo cuando no se configuran"""
+        assert worker_count(3) == 3
+        assert worker_count(0) >= 1
+    
+    def test_unknown_mode(self):
+        """Test para rechazar un perfil inexistente"""
+        with pytest.raises(ValueError):
+            server_options(Settings(ec2_server_mode="staging"))
+    
+    def test_main_cli_overrides(self):
+        """Test para que los argumentos de línea de comandos pisen la configuración"""
+        with patch("uvicorn.run") as run, patch("src.server.configure_logging"):
+            assert main(["--mode", "prod", "--workers", "2", "--port", "9001"]) == 0
+        
+        (app_path,), options = run.call_args
+        assert app_path == APP
+        assert options["workers"] == 2
+        assert options["port"] == 9001
+    
+    def test_orjson_default_response(self):
+        """Test para responder JSON con orjson por defecto"""
+        pytest.importorskip("orjson")
+        assert app.router.default_response_class is ORJSONResponse
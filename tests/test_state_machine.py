@@ -0,0 +1,134 @@
+import threading
+import pytest
+from src.models import InstanceState
+from src.repositories import InstanceRepository
+from src.services.backends import InMemoryBackend
+from src.services.ec2_service import EC2Service, IdempotencyKeyReused
+from src.services.locking import StripedLock
+from src.services.state_machine import InstanceAction, next_state, resolve_stop
+from src.utils.mock_data import get_mock_instances
+
+
+class TestStateMachine:
+    """Tests para la tabla de transiciones"""
+    
+    def test_stop_transitions(self):
+        """Test para las transiciones de una detención"""
+        assert next_state(InstanceAction.STOP, InstanceState.RUNNING) == InstanceState.STOPPING
+        assert next_state(InstanceAction.STOP, "pending") == InstanceState.STOPPED
+        assert next_state(InstanceAction.STOP, InstanceState.STOPPED) is None
+    
+    def test_resolve_stop_messages(self):
+        """Test para los mensajes de cada estado"""
+        assert resolve_stop("i-1", "running") == (InstanceState.STOPPING, "Instance i-1 is now stopping")
+        assert resolve_stop("i-1", "shutting-down") == (None, "Instance i-1 is already stopping")
+        assert resolve_stop("i-1", "terminated") == (None, "Instance i-1 is terminated and cannot be stopped")
+    
+    def test_every_state_has_stop_message(self):
+        """Test para cubrir todos los estados en la tabla de mensajes"""
+        for state in InstanceState:
+            resolve_stop("i-1", state)
+
+
+class TestStripedLock:
+    """Tests para los locks por franjas"""
+    
+    def test_hold_many_keys_in_order(self):
+        """Test para tomar varias claves (y repetidas) sin deadlock"""
+        locks = StripedLock(stripes=4)
+        keys = [f"i-{number}" for number in range(20)]
+        
+        def worker(ordered):
+            for _ in range(200):
+                with locks.hold(*ordered):
+                    pass
+        
+        threads = [threading.Thread(target=worker, args=(keys if n % 2 else keys[::-1],)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert not any(thread.is_alive() for thread in threads)
+
+
+class TestConcurrentStops:
+    """Tests de concurrencia sobre una misma instancia"""
+    
+    def setup_method(self):
+        """Configuración antes de cada test"""
+        self.service = EC2Service(backend=InMemoryBackend(InstanceRepository(get_mock_instances())), cache=None)
+        self.changes = []
+        self.service.add_listener(self.changes.append)
+    
+    def _hammer(self, target, threads: int = 32):
+        barrier = threading.Barrier(threads)
+        results = []
+        
+        def worker():
+            barrier.wait()
+            results.append(target())
+        
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for worker_thread in workers:
+            worker_thread.start()
+        for worker_thread in workers:
+            worker_thread.join()
+        return results
+    
+    def test_single_transition_under_contention(self):
+        """Test para que muchos threads detengan la misma instancia una única vez"""
+        instance_id = "i-1234567890abcdef0"
+        
+        results = self._hammer(lambda: self.service.stop_instance(instance_id))
+        
+        assert sum(1 for result in results if result.success) == 1
+        assert len(self.changes) == 1
+        assert self.service.get_instance_by_id(instance_id).state == "stopping"
+    
+    def test_stops_and_transitions_interleaved(self):
+        """Test para detenciones y transiciones automáticas compitiendo"""
+        instance_id = "i-1234567890abcdef0"
+        
+        def stop_or_complete(counter=iter(range(1000))):
+            if next(counter) % 2:
+                return self.service.simulate_state_transition(instance_id)
+            return self.service.stop_instance(instance_id)
+        
+        self._hammer(stop_or_complete)
+        self.service.simulate_state_transition(instance_id)
+        
+        # Cada transición se aplica una sola vez, sin importar el orden de los threads
+        assert [(change.previous_state, change.current_state) for change in self.changes] == [
+            ("running", "stopping"),
+            ("stopping", "stopped"),
+        ]
+    
+    def test_idempotent_retries(self):
+        """Test para reintentos concurrentes con el mismo Idempotency-Key"""
+        instance_id = "i-1234567890abcdef0"
+        
+        results = self._hammer(lambda: self.service.stop_instance(instance_id, idempotency_key="retry-1"))
+        
+        assert all(result.success for result in results)
+        assert {result.message for result in results} == {f"Instance {instance_id} is now stopping"}
+        assert len(self.changes) == 1
+    
+    def test_idempotency_key_reused_for_other_instance(self):
+        """Test para rechazar una clave usada con otra instancia"""
+        self.service.stop_instance("i-1234567890abcdef0", idempotency_key="key")
+        
+        with pytest.raises(IdempotencyKeyReused):
+            self.service.stop_instance("i-0987654321fedcba0", idempotency_key="key")
+    
+    def test_idempotent_batch(self):
+        """Test para reintentos de un lote con el mismo Idempotency-Key"""
+        instance_ids = ["i-1234567890abcdef0", "i-0987654321fedcba0"]
+        
+        first = self.service.stop_instances(instance_ids, idempotency_key="batch")
+        retry = self.service.stop_instances(instance_ids, idempotency_key="batch")
+        
+        assert retry == first
+        assert all(result.success for result in retry)
+        assert len(self.changes) == 2
+        with pytest.raises(IdempotencyKeyReused):
+            self.service.stop_instances(instance_ids[:1], idempotency_key="batch")